@@ -1,6 +1,7 @@
 from google.adk.agents.llm_agent import Agent
 from google.adk.tools.tool_context import ToolContext
 from google.adk.tools.load_artifacts_tool import load_artifacts_tool
+from google.adk.models import LlmResponse
 from google.genai import types
 
 # Add webdriver manager if available
@@ -12,8 +13,12 @@ except ImportError:
 
 import time
 import re
+import base64
 import urllib.parse
 import random
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 from PIL import Image
 import json
@@ -38,6 +43,30 @@ from selenium.common.exceptions import (
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
+from .links import LINK_INDEX_SCRIPT, build_link_records, filter_links, site_key
+from .crawler import FocusedCrawler
+from .saturation import SaturationMonitor
+from .figures import summarize_figures
+from .postprocess import PostProcessor, parse_page_html
+from .storage import write_dataset, load_dataset, dataset_filename
+from .memprofile import MemoryProfiler
+from .fetch import USER_AGENT, fetch_url, decode_body
+from .refresh import refresh_records, content_fingerprint, html_fingerprint
+from .budget import BudgetManager, session_file_token
+from .serp import paginate_results, RESULTS_PER_PAGE, MAX_SERP_PAGES
+from .replay import Recorder, Recording, ReplayDriver
+from .health import HealthTracker, is_blocked_page, PAGE_STATUS_SCRIPT
+from .deadlines import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+from .modelcache import ModelCache, request_key, volatile_values, repeats_volatile_values, MB
+from .documents import preflight, classify_url, extract_pdf, extract_text_document, HTML, PDF, TEXT, MEDIA, OFFICE
+from .sessions import (
+    SessionManager,
+    SessionDriverProxy,
+    SessionLimitError,
+    current_session_id,
+    session_id_from_context
+)
+
 # Constants
 MAX_RETRIES = 3
 PAGE_LOAD_TIMEOUT = 20  # Increased timeout
@@ -46,10 +75,47 @@ MAX_TEXT_LENGTH = 50000  # Limit text to prevent token overflow
 WAIT_BETWEEN_ACTIONS = 2  # Increased wait time between actions for more human-like behavior
 SCROLL_INTERVAL = 500    # Pixels to scroll each time
 SCROLL_PAUSE_TIME = 1    # Time to pause between scrolls
-
-# Global variables
-driver = None
-tool_context_instance = None
+CRAWL_MAX_DEPTH = 1      # How many clicks beyond the search results the crawler follows
+CRAWL_MAX_PAGES = 30     # Extra pages the focused crawler may visit per research run
+CRAWL_TIME_BUDGET = 300  # Seconds the focused crawler may spend per research run
+SATURATION_WINDOW = 10       # Pages averaged when checking whether research is saturated
+SATURATION_THRESHOLD = 3.0   # Mean information gain per page below which research stops (0 disables)
+MAX_CONCURRENT_SESSIONS = 4  # Research sessions sharing this process's browser at once
+SESSION_IDLE_TIMEOUT = 900   # Seconds before an idle session's browser tab is reaped
+POSTPROCESS_WORKERS = None   # Processes parsing page HTML in parallel (None uses every core)
+POSTPROCESS_BATCH_SIZE = 4   # Pages sent to a parsing process at once
+# Research dataset format (json, jsonl, jsonl.gz, jsonl.zst, parquet); json keeps the legacy pretty-printed file
+DATASET_FORMAT = os.environ.get("IDEAI_DATASET_FORMAT", "json")
+# Search results page; point IDEAI_SEARCH_URL at a fixture server for offline runs
+SEARCH_URL = os.environ.get("IDEAI_SEARCH_URL", "https://www.google.com/search?hl=en&q={query}")
+PROFILE_MEMORY = os.environ.get("IDEAI_PROFILE_MEMORY") == "1"  # Write a memory timeline for every research run
+SESSION_TOKEN_BUDGET = 400000  # Tokens of tool output a session may feed back to the model
+TOOL_OUTPUT_MAX_TOKENS = 12000 # Upper bound for a single tool output before it is offloaded
+# Browser backend: "chrome" (live), "record:<dir>" (live, saving every page) or "replay:<dir>" (offline)
+BROWSER_BACKEND = os.environ.get("IDEAI_BROWSER_BACKEND", "chrome")
+FULL_PAGE_MAX_HEIGHT = 8000    # Pixels of page height a full-page screenshot is clipped to
+FULL_PAGE_SCALE = 0.5          # Downscale factor for full-page screenshots taken during research
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive failures before a domain is skipped
+CIRCUIT_OPEN_SECONDS = 300     # How long a failing domain is skipped before one trial visit
+# Race pages slower than their p90 load time against a static fetch
+HEDGED_NAVIGATION = os.environ.get("IDEAI_HEDGED_NAVIGATION") == "1"
+HEDGE_MIN_TIMEOUT = 5          # Seconds a hedged browser load gets at least
+PAGE_TIME_BUDGET = 60          # Seconds one page visit and extraction may take at most
+SCROLL_TIME_BUDGET = 20        # Seconds scroll_to_bottom keeps scrolling pages that keep growing
+MIN_PAGE_SECONDS = 5           # Time-boxed runs stop visiting pages once less than this is left
+DEADLINE_RESERVE = 15          # Seconds of a time-boxed run kept for saving and analysis
+SEARCH_TIME_SHARE = 0.25       # Share of a time-boxed run that collecting search results may use
+PREFLIGHT_TIMEOUT = 5          # Seconds the HEAD/sniff check of a target may take
+STATIC_FINGERPRINT_TIMEOUT = 10  # Seconds the static copy fetched next to a browser visit may take
+ANALYSIS_SUMMARY_CHARS = 300   # Text per page kept in the analysis prompt once figures are aggregated
+ANALYSIS_MAX_HEADINGS = 12     # Headings per page kept in the analysis prompt once figures are aggregated
+# Identical model requests are answered from disk; IDEAI_MODEL_CACHE=0 turns this off
+MODEL_CACHE_ENABLED = os.environ.get("IDEAI_MODEL_CACHE", "1") != "0"
+MODEL_CACHE_PATH = os.environ.get("IDEAI_MODEL_CACHE_PATH", "model_cache.sqlite")
+MODEL_CACHE_MAX_MB = 200       # Size of cached responses before the least recently used are evicted
+MODEL_CACHE_MAX_AGE = 7 * 24 * 3600  # Seconds a cached response is served
+# Session state keys that bypass the cache: "temp:" for one invocation, the other for the whole session
+MODEL_CACHE_SKIP_KEYS = ("temp:skip_model_cache", "skip_model_cache")
 
 
 # Browser setup - with better initialization
@@ -65,71 +131,429 @@ def setup_chrome_options():
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-extensions")
     options.add_argument("--disable-popup-blocking")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
+    options.add_argument(f"user-agent={USER_AGENT}")
     return options
 
-def initialize_driver():
-    """Initialize the browser driver if not already initialized."""
-    global driver
-    if driver is None:
+def pause(seconds: float):
+    """Waits between browser actions; replayed sessions run without any waiting."""
+    if recording is None:
+        time.sleep(current_deadline().cap(seconds))
+
+def wait_until(condition, seconds: float):
+    """Waits for a condition on the session's browser.
+    
+    Replayed pages are complete snapshots, so a replay checks the condition once instead of polling.
+    """
+    if recording is None:
+        return WebDriverWait(driver, seconds).until(condition)
+    try:
+        result = condition(driver)
+    except NoSuchElementException:
+        result = None
+    if not result:
+        raise TimeoutException("Condition not met in the replayed page")
+    return result
+
+def launch_browser():
+    """Starts the shared Chrome browser that every research session attaches to."""
+    if recording is not None:
+        return ReplayDriver(recording)
+    
+    try:
+        print("🚀 Initializing Chrome browser...")
+        options = setup_chrome_options()
+        
+        # Use ChromeDriverManager for automatic webdriver management
+        # If ChromeDriverManager is not available, fall back to standard initialization
         try:
-            print("🚀 Initializing Chrome browser...")
-            options = setup_chrome_options()
+            from webdriver_manager.chrome import ChromeDriverManager
+            from selenium.webdriver.chrome.service import Service
+            service = Service(ChromeDriverManager().install())
+            browser = selenium.webdriver.Chrome(service=service, options=options)
+        except ImportError:
+            print("Using standard Chrome initialization...")
+            browser = selenium.webdriver.Chrome(options=options)
             
-            # Use ChromeDriverManager for automatic webdriver management
-            # If ChromeDriverManager is not available, fall back to standard initialization
-            try:
-                from webdriver_manager.chrome import ChromeDriverManager
-                from selenium.webdriver.chrome.service import Service
-                service = Service(ChromeDriverManager().install())
-                driver = selenium.webdriver.Chrome(service=service, options=options)
-            except ImportError:
-                print("Using standard Chrome initialization...")
-                driver = selenium.webdriver.Chrome(options=options)
-                
-            driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
-            print(f"✅ Browser initialized successfully. Version: {driver.capabilities['browserVersion']}")
-            return "Browser initialized successfully"
-        except Exception as e:
-            print(f"❌ Browser initialization failed: {str(e)}")
-            # Try alternative initialization methods
-            try:
-                print("Attempting alternative browser initialization...")
-                options = setup_chrome_options()
-                driver = selenium.webdriver.Chrome(options=options)
-                driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
-                return "Browser initialized successfully with alternative method"
-            except Exception as e2:
-                return f"Failed to initialize browser: {str(e2)}. Make sure Chrome is installed."
-    return "Browser already initialized"
+        browser.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        print(f"✅ Browser initialized successfully. Version: {browser.capabilities['browserVersion']}")
+        return browser
+    except Exception as e:
+        print(f"❌ Browser initialization failed: {str(e)}")
+        # Try alternative initialization methods
+        print("Attempting alternative browser initialization...")
+        options = setup_chrome_options()
+        browser = selenium.webdriver.Chrome(options=options)
+        browser.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        return browser
+
+# Record/replay state for deterministic offline runs
+recorder = None
+recording = None
+
+# Tools that never touch a browser and so are not subject to the session cap
+BROWSERLESS_TOOLS = {
+    "close_browser_session", "generate_business_ideas", "analyze_business_data",
+    "fetch_payload", "get_context_budget", "set_model_cache", "get_model_cache_stats", "load_artifacts",
+}
+
+# Token accounting of tool outputs, large payloads are offloaded behind handles
+budget_manager = BudgetManager(
+    session_tokens=SESSION_TOKEN_BUDGET,
+    max_output_tokens=TOOL_OUTPUT_MAX_TOKENS
+)
+
+# Browser state is kept per ADK session; `driver` always refers to the calling session's tab.
+# A session's offloaded payloads go with it when it is closed or reaped.
+session_manager = SessionManager(
+    launch_browser,
+    max_sessions=MAX_CONCURRENT_SESSIONS,
+    idle_timeout=SESSION_IDLE_TIMEOUT,
+    on_close=budget_manager.discard_payloads
+)
+driver = SessionDriverProxy(session_manager)
+
+# Per-domain circuit breaker shared by all sessions, plus the pool hedged browser loads and static fetches race in
+health_tracker = HealthTracker(
+    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    open_seconds=CIRCUIT_OPEN_SECONDS
+)
+hedge_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SESSIONS * 2, thread_name_prefix="ideai-hedge")
+# Static copies of browser-visited pages, fingerprinted so a later refresh compares like with like
+fingerprint_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SESSIONS, thread_name_prefix="ideai-fingerprint")
+
+# Prompt/response cache in front of the model, plus the keys of calls waiting for a response
+model_cache = ModelCache(
+    MODEL_CACHE_PATH,
+    max_bytes=MODEL_CACHE_MAX_MB * MB,
+    max_age=MODEL_CACHE_MAX_AGE,
+    enabled=MODEL_CACHE_ENABLED
+)
+pending_model_calls: Dict[str, Dict[str, Any]] = {}
+# A model call that raises never reaches the after-callback; its pending entry is dropped after this long
+PENDING_MODEL_CALL_MAX_AGE = 600
+
+# Sequence number that keeps screenshots taken within the same second apart
+screenshot_counter = itertools.count(1)
+
+def use_browser_backend(backend: str) -> str:
+    """Switches between live Chrome ("chrome"), recording ("record:<dir>") and offline replay ("replay:<dir>")."""
+    global recorder, recording, BROWSER_BACKEND
+    session_manager.shutdown()
+    mode, _, directory = backend.partition(":")
+    recorder = Recorder(directory) if mode == "record" else None
+    recording = Recording(directory) if mode == "replay" else None
+    BROWSER_BACKEND = backend
+    print(f"🎞️ Browser backend: {backend}")
+    return f"Browser backend set to {backend}"
+
+if BROWSER_BACKEND != "chrome":
+    use_browser_backend(BROWSER_BACKEND)
+
+def current_session():
+    """Returns the browser session of the ADK session making the current tool call."""
+    return session_manager.get(current_session_id.get())
+
+def bind_tool_session(tool, args, tool_context):
+    """Routes every tool call to the browser session of the calling ADK session."""
+    session_id = session_id_from_context(tool_context)
+    current_session_id.set(session_id)
+    if getattr(tool, "name", None) in BROWSERLESS_TOOLS:
+        return None
+    if not session_manager.has_capacity_for(session_id):
+        return {
+            "status": "error",
+            "message": f"Too many concurrent research sessions ({MAX_CONCURRENT_SESSIONS}). Please try again later."
+        }
+    if session_manager.is_open(session_id):
+        # Browser tools must not drive a tab that a losing hedged load still holds
+        settle_pending_load(current_session())
+    return None
+
+def fit_tool_output(tool, args, tool_context, tool_response):
+    """Accounts for every tool output and trims it to the session's remaining context budget."""
+    session_id = session_id_from_context(tool_context)
+    fitted = budget_manager.fit(session_id, getattr(tool, "name", str(tool)), tool_response)
+    return fitted if fitted is not tool_response else None
+
+def _without_call_ids(content: dict) -> dict:
+    """Drops the per-run ids ADK gives function calls and responses, which would defeat the cache."""
+    for part in content.get("parts") or []:
+        for field in ("function_call", "function_response"):
+            if isinstance(part.get(field), dict):
+                part[field].pop("id", None)
+    return content
+
+def model_request_contents(llm_request) -> list:
+    """Returns the conversation of a model request as JSON-like data without per-run call ids."""
+    return [_without_call_ids(content.model_dump(mode="json", exclude_none=True))
+            for content in llm_request.contents]
+
+def model_request_key(llm_request, contents: Optional[list] = None) -> str:
+    """Hashes the model, system instruction, conversation and tool results of a model request."""
+    config = llm_request.config
+    system_instruction = getattr(config, "system_instruction", None) or ""
+    if isinstance(system_instruction, types.Content):
+        system_instruction = " ".join(part.text or "" for part in system_instruction.parts or [])
+    if contents is None:
+        contents = model_request_contents(llm_request)
+    return request_key(llm_request.model or "", str(system_instruction), contents, llm_request.tools_dict.keys())
+
+def serve_cached_model_response(callback_context, llm_request):
+    """Answers a model call from the cache when the same request was answered before."""
+    if not model_cache.enabled or any(callback_context.state.get(key) for key in MODEL_CACHE_SKIP_KEYS):
+        model_cache.record_bypass()
+        return None
+    contents = model_request_contents(llm_request)
+    key = model_request_key(llm_request, contents)
+    cached = model_cache.get(key)
+    if cached is not None:
+        return LlmResponse.model_validate_json(cached)
+    now = time.time()
+    for invocation_id, pending in list(pending_model_calls.items()):
+        if now - pending["started"] > PENDING_MODEL_CALL_MAX_AGE:
+            pending_model_calls.pop(invocation_id, None)
+    pending_model_calls[callback_context.invocation_id] = {
+        "key": key,
+        "volatile": volatile_values(contents),
+        "started": now,
+    }
+    return None
+
+def store_model_response(callback_context, llm_response):
+    """Caches the complete response of a model call that missed the cache.
+    
+    Responses that repeat a per-run value of the request, such as a payload
+    handle in a fetch_payload call, are only valid for this run and are not stored.
+    """
+    # Streaming chunks arrive first; only the final response is stored
+    if llm_response.partial:
+        return None
+    pending = pending_model_calls.pop(callback_context.invocation_id, None)
+    if pending and llm_response.content and not llm_response.error_code:
+        data = llm_response.model_dump(mode="json", exclude_none=True)
+        _without_call_ids(data["content"])
+        response = json.dumps(data)
+        if not repeats_volatile_values(json.dumps(data["content"], ensure_ascii=False), pending["volatile"]):
+            model_cache.put(pending["key"], response)
+    return None
+
+def set_model_cache(enabled: bool, tool_context: ToolContext) -> str:
+    """Turns the model response cache on or off for the rest of this session.
+    
+    Args:
+        enabled: False to always call the model, e.g. when fresh answers are needed
+    """
+    tool_context.state["skip_model_cache"] = not enabled
+    return f"Model cache {'enabled' if enabled else 'disabled'} for this session"
+
+def get_model_cache_stats() -> dict:
+    """Returns hits, misses, hit rate and size of the model response cache."""
+    return model_cache.stats()
+
+def fetch_payload(handle: str, offset: int = 0, max_chars: int = 0) -> dict:
+    """Reads part of a tool output that was offloaded to save context.
+    
+    Args:
+        handle: The payload_handle returned in place of the full output
+        offset: Character position to start reading from
+        max_chars: Characters to return (0 uses as much as the budget allows)
+    """
+    payload = budget_manager.load_payload(current_session_id.get(), handle)
+    if payload is None:
+        return {"status": "error", "message": f"Unknown payload handle: {handle}"}
+    limit = budget_manager.char_limit(current_session_id.get()) - 400
+    if max_chars > 0:
+        limit = min(limit, max_chars)
+    chunk = payload[offset:offset + limit]
+    return {
+        "status": "success",
+        "handle": handle,
+        "offset": offset,
+        "next_offset": offset + len(chunk) if offset + len(chunk) < len(payload) else None,
+        "total_chars": len(payload),
+        "content": chunk
+    }
+
+def get_context_budget() -> dict:
+    """Returns how much of the session's context budget tool outputs have used."""
+    return budget_manager.session(current_session_id.get()).summary()
+
+def initialize_driver():
+    """Initialize the browser for the current session if not already initialized."""
+    if session_manager.is_open(current_session_id.get()):
+        return "Browser already initialized"
+    try:
+        current_session()
+        return "Browser initialized successfully"
+    except SessionLimitError as e:
+        return str(e)
+    except Exception as e:
+        return f"Failed to initialize browser: {str(e)}. Make sure Chrome is installed."
+
+def close_browser_session() -> str:
+    """Closes the browser tab of the current session and frees its slot."""
+    session_manager.close(current_session_id.get())
+    return "Browser session closed"
+
+def delayed_static_fetch(url: str, delay: float, cancelled: threading.Event, timeout: float) -> Optional[dict]:
+    """Fetches a page without the browser unless the browser load finishes within delay seconds."""
+    if cancelled.wait(delay):
+        return None
+    print(f"🏁 Page slower than its p90 ({delay:.1f}s), hedging with a static fetch: {url}")
+    return fetch_url(url, timeout=timeout)
+
+def usable_static_copy(response: Optional[dict]) -> bool:
+    """Checks whether a hedged static fetch returned a real HTML page rather than an error or bot wall."""
+    if not response or response.get("error") or response.get("status") != 200:
+        return False
+    if "html" not in response["headers"].get("content-type", "html"):
+        return False
+    content = parse_page_html(decode_body(response))
+    return not is_blocked_page(content["title"], content["main_content"])
+
+def load_in_browser(session_driver, url: str, load_timeout: float):
+    """Runs a hedged browser load and restores the page load timeout once it is over."""
+    try:
+        session_driver.get(url)
+    finally:
+        if load_timeout != PAGE_LOAD_TIMEOUT:
+            session_driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+
+def race_navigation(session, url: str, load_timeout: float, hedge_fetch) -> Optional[dict]:
+    """Races a browser load against a hedged static fetch.
+    
+    Returns the static response when it wins, None when the browser wins,
+    and re-raises the browser's error when neither produced a page.
+    """
+    browser_load = hedge_executor.submit(load_in_browser, session.driver, url, load_timeout)
+    # WebDriver can't abort a load in flight; a losing load finishes in the background
+    session.state["pending_load"] = browser_load
+    pending = {browser_load, hedge_fetch}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        if browser_load in done and browser_load.exception() is None:
+            return None
+        if hedge_fetch in done and usable_static_copy(hedge_fetch.result()):
+            return hedge_fetch.result()
+    browser_load.result()
+
+def settle_pending_load(session, timeout: Optional[float] = None) -> bool:
+    """Waits for a browser load that lost a hedge race; True once the tab takes commands again.
+    
+    The losing load keeps the tab busy and restores its page load timeout when
+    it ends, so no other driver command may run before it has finished.
+    """
+    pending_load = session.state.get("pending_load")
+    if pending_load is None:
+        return True
+    done, _ = wait([pending_load], timeout=timeout)
+    if not done:
+        return False
+    session.state.pop("pending_load", None)
+    return True
 
 def go_to_url(url: str) -> str:
     """Navigates the browser to the given URL with retry logic."""
+    return navigate(url)
+
+def navigate(url: str, hedge: bool = False) -> str:
+    """Navigates the session's browser to a URL with retry logic.
+    
+    Domains that keep failing or block us are skipped for a while (circuit
+    breaker) and retries back off exponentially with jitter. With hedge, a
+    page slower than its usual p90 load time is raced against a static fetch;
+    when that wins, the page is left in session.state["static_page"] and the
+    browser tab still shows the previous page, so only callers that consume
+    the static copy (visit_and_extract) may hedge.
+    """
     initialize_driver()
     print(f"🌐 Navigating to URL: {url}")
     
     # Add http prefix if missing
     if not url.startswith(("http://", "https://")):
         url = "https://" + url
+    url = url.strip()
+    
+    invalidate_link_index()
+    session = current_session()
+    session.state.pop("static_page", None)
+    deadline = current_deadline()
+    
+    # A browser load that lost a hedge race still holds the tab; let it finish first
+    if not settle_pending_load(session, timeout=deadline.cap(PAGE_LOAD_TIMEOUT)):
+        return f"Timeout error loading {url}: the previous page is still loading"
     
     for attempt in range(MAX_RETRIES):
+        if not health_tracker.allow(url):
+            return f"Error navigating to {url}: {site_key(url)} keeps failing, skipped until its circuit closes"
+        if attempt > 0:
+            pause(health_tracker.backoff(attempt - 1))
+        if deadline.expired():
+            return f"Timeout error loading {url}: deadline reached"
+        
+        # Only wait about twice the usual load time when a static fetch backs the browser up
+        # Replays have nothing to race: the recording already holds whichever copy won
+        hedge_after = health_tracker.p90(url) if hedge and recording is None else None
+        hedge_fetch = None
+        cancel_hedge = threading.Event()
+        load_timeout = PAGE_LOAD_TIMEOUT
+        if hedge_after:
+            load_timeout = min(load_timeout, max(HEDGE_MIN_TIMEOUT, hedge_after * 2))
+        # Never let the browser wait past the caller's deadline
+        load_timeout = max(1, deadline.cap(load_timeout))
+        if hedge_after:
+            hedge_fetch = hedge_executor.submit(delayed_static_fetch, url, hedge_after, cancel_hedge,
+                                                max(1, deadline.cap(PAGE_LOAD_TIMEOUT)))
+        if load_timeout != PAGE_LOAD_TIMEOUT:
+            session.driver.set_page_load_timeout(load_timeout)
+        
+        start = time.time()
         try:
-            driver.get(url.strip())
+            if hedge_fetch is not None:
+                # Whichever of the browser and the static fetch produces the page first wins
+                response = race_navigation(session, url, load_timeout, hedge_fetch)
+                if response is not None:
+                    health_tracker.record_success(url, time.time() - start)
+                    session.state["static_page"] = {"url": url, "html": decode_body(response)}
+                    return f"Loaded static copy of: {url} (faster than the browser after {time.time() - start:.1f}s)"
+            else:
+                driver.get(url)
+            cancel_hedge.set()
+            
+            page_status = driver.execute_script(PAGE_STATUS_SCRIPT) or {}
+            blocked = is_blocked_page(driver.title, page_status.get("text") or "", page_status.get("status"))
+            if blocked:
+                health_tracker.record_failure(url, "blocked")
+                return f"Error navigating to {url}: blocked by the site ({blocked})"
+            health_tracker.record_success(url, time.time() - start)
+            
             # Allow some time for JavaScript content to load
-            time.sleep(WAIT_BETWEEN_ACTIONS)
+            pause(WAIT_BETWEEN_ACTIONS)
             
             # Simulate human-like scrolling behavior right after loading
             perform_human_scrolling()
             
+            if recorder is not None:
+                recorder.record(driver, url)
+            
             return f"Successfully navigated to: {url}"
         except TimeoutException:
+            health_tracker.record_failure(url, "timeout")
+            if deadline.expired():
+                return f"Timeout error loading {url}: deadline reached"
             if attempt < MAX_RETRIES - 1:
                 print(f"Timeout while loading {url}, retry {attempt + 1}")
                 continue
             else:
                 return f"Timeout error loading {url} after {MAX_RETRIES} attempts"
         except WebDriverException as e:
+            health_tracker.record_failure(url, "error")
             return f"Error navigating to {url}: {str(e)}"
+        finally:
+            cancel_hedge.set()
+            # Hedged loads restore the timeout themselves, possibly after this call returned
+            if load_timeout != PAGE_LOAD_TIMEOUT and hedge_fetch is None:
+                session.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
 
 def perform_human_scrolling():
     """Simulates human-like scrolling behavior to load page content dynamically"""
@@ -140,21 +564,24 @@ def perform_human_scrolling():
         # Scroll a few times with random intervals to mimic human behavior
         scroll_attempts = random.randint(3, 6)
         for i in range(scroll_attempts):
+            if current_deadline().expired():
+                break
+            
             # Scroll down with variable distance
             scroll_amount = random.randint(300, 800)
             driver.execute_script(f"window.scrollBy(0, {scroll_amount});")
             
             # Add random pause between scrolls (0.5 to 2 seconds)
-            time.sleep(random.uniform(0.5, 2.0))
+            pause(random.uniform(0.5, 2.0))
             
             # Sometimes scroll back up a little bit
             if random.random() > 0.7:  # 30% chance
                 driver.execute_script(f"window.scrollBy(0, -{random.randint(100, 300)});")
-                time.sleep(random.uniform(0.3, 1.0))
+                pause(random.uniform(0.3, 1.0))
                 
         # Finally, scroll to bottom to make sure we've loaded all content
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(WAIT_BETWEEN_ACTIONS)
+        pause(WAIT_BETWEEN_ACTIONS)
         
         # And back to a reasonable viewing position
         driver.execute_script("window.scrollTo(0, Math.max(document.body.scrollHeight / 3, 600));")
@@ -163,15 +590,46 @@ def perform_human_scrolling():
     except Exception as e:
         print(f"⚠️ Error during scrolling: {str(e)}")
 
-def take_screenshot() -> dict:
-    """Takes a screenshot and saves it with a timestamp."""
+def capture_full_page(filename: str, max_height: int = FULL_PAGE_MAX_HEIGHT, scale: float = 1.0):
+    """Captures the whole page in one Chrome DevTools call instead of scrolling viewport by viewport."""
+    metrics = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+    content_size = metrics.get("cssContentSize") or metrics["contentSize"]
+    width = content_size["width"]
+    height = min(content_size["height"], max_height)
+    
+    screenshot = driver.execute_cdp_cmd("Page.captureScreenshot", {
+        "format": "png",
+        "captureBeyondViewport": True,
+        "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": scale}
+    })
+    with open(filename, "wb") as f:
+        f.write(base64.b64decode(screenshot["data"]))
+
+def take_screenshot(full_page: bool = False, max_height: int = FULL_PAGE_MAX_HEIGHT, scale: float = 1.0) -> dict:
+    """Takes a screenshot and saves it under a name unique to the session and call.
+    
+    Args:
+        full_page: Capture the entire page instead of just the visible viewport
+        max_height: Pixel height a full-page capture is clipped to
+        scale: Downscale factor for full-page captures (e.g. 0.5 for half size)
+    """
     initialize_driver()
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"screenshot_{timestamp}.png"
+    # Several captures a second and concurrent sessions would otherwise overwrite each other
+    session_token = session_file_token(current_session_id.get())
+    filename = f"screenshot_{session_token}_{timestamp}_{next(screenshot_counter):04d}.png"
     print(f"📸 Taking screenshot: {filename}")
     
     try:
-        driver.save_screenshot(filename)
+        if full_page:
+            try:
+                capture_full_page(filename, max_height=max_height, scale=scale)
+            except WebDriverException as e:
+                # Browsers without DevTools support still get a viewport screenshot
+                print(f"⚠️ Full-page capture unavailable, using viewport: {str(e)}")
+                driver.save_screenshot(filename)
+        else:
+            driver.save_screenshot(filename)
         print(f"Screenshot saved to {filename}")
         
         # We won't use tool_context to save artifacts, just return the file info
@@ -193,8 +651,10 @@ def get_page_source() -> str:
     print("📄 Getting page source...")
     try:
         source = driver.page_source
-        if len(source) > MAX_TEXT_LENGTH:
-            return source[:MAX_TEXT_LENGTH] + "\n... [truncated]"
+        # Shrink the output as the session's context budget runs out
+        limit = min(MAX_TEXT_LENGTH, budget_manager.char_limit(current_session_id.get()))
+        if len(source) > limit:
+            return source[:limit] + "\n... [truncated]"
         return source
     except Exception as e:
         return f"Error getting page source: {str(e)}"
@@ -245,9 +705,9 @@ def click_element_with_text(text: str) -> str:
                     try:
                         # Try to scroll the element into view
                         driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-                        time.sleep(WAIT_BETWEEN_ACTIONS)
+                        pause(WAIT_BETWEEN_ACTIONS)
                         element.click()
-                        time.sleep(WAIT_BETWEEN_ACTIONS)
+                        pause(WAIT_BETWEEN_ACTIONS)
                         return f"Successfully clicked element with text: '{text}'"
                     except (ElementNotInteractableException, ElementClickInterceptedException):
                         continue
@@ -265,21 +725,72 @@ def click_element_with_text(text: str) -> str:
     except Exception as e:
         return f"Error clicking element: {str(e)}"
 
+def invalidate_link_index():
+    """Drops the cached link index so the next lookup re-harvests the page."""
+    link_index_cache = current_session().link_index
+    link_index_cache["token"] = None
+    link_index_cache["page_url"] = None
+    link_index_cache["links"] = []
+
+def get_link_index(refresh: bool = False) -> List[Dict[str, Any]]:
+    """Returns the link index for the current page, harvesting it in one script call when stale."""
+    initialize_driver()
+    link_index_cache = current_session().link_index
+    known_token = None if refresh else link_index_cache["token"]
+    result = driver.execute_script(LINK_INDEX_SCRIPT, known_token) or {}
+    
+    if result.get("links") is not None:
+        page_url = driver.current_url
+        link_index_cache["token"] = result.get("token")
+        link_index_cache["page_url"] = page_url
+        link_index_cache["links"] = build_link_records(result["links"], page_url)
+        print(f"🔗 Indexed {len(link_index_cache['links'])} links on {page_url}")
+    
+    return link_index_cache["links"]
+
+def list_page_links(scope: str = "all", visible_only: bool = False, limit: int = 100) -> str:
+    """Lists links on the current page from the link index.
+    
+    Args:
+        scope: Which links to return (all, internal, external)
+        visible_only: Only return links that are visible on the page
+        limit: Maximum number of links to return
+    """
+    print(f"🔗 Listing {scope} links on page")
+    try:
+        links = filter_links(get_link_index(), scope=scope, visible_only=visible_only)
+        return json.dumps([
+            {key: link[key] for key in ("href", "text", "rel", "internal", "visible")}
+            for link in links[:limit]
+        ], indent=2)
+    except Exception as e:
+        return json.dumps([{"error": f"Error listing links: {str(e)}"}])
+
 def click_link_by_url_pattern(pattern: str) -> str:
     """Clicks a link that contains the given URL pattern."""
     initialize_driver()
     print(f"🔗 Looking for link with URL pattern: '{pattern}'")
     
     try:
-        links = driver.find_elements(By.TAG_NAME, "a")
-        for link in links:
-            href = link.get_attribute("href")
-            if href and pattern.lower() in href.lower():
+        matches = filter_links(get_link_index(), pattern=pattern)
+        # Prefer links the user could actually see and click
+        matches.sort(key=lambda link: not link["visible"])
+        
+        for match in matches:
+            try:
+                link = driver.find_element(By.CSS_SELECTOR, f"a[data-ideai-link='{match['index']}']")
                 driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", link)
-                time.sleep(WAIT_BETWEEN_ACTIONS)
+                pause(WAIT_BETWEEN_ACTIONS)
                 link.click()
-                time.sleep(WAIT_BETWEEN_ACTIONS)
+                pause(WAIT_BETWEEN_ACTIONS)
+                invalidate_link_index()
                 return f"Clicked link with URL containing '{pattern}'"
+            except (NoSuchElementException, StaleElementReferenceException):
+                # The page changed under us, rebuild the index on the next call
+                invalidate_link_index()
+                continue
+            except (ElementNotInteractableException, ElementClickInterceptedException):
+                continue
                 
         return f"No link found with URL pattern '{pattern}'"
     except Exception as e:
@@ -314,9 +825,9 @@ def enter_text_into_element(selector: str, text_to_enter: str, selector_type: st
         for char in text_to_enter:
             element.send_keys(char)
             # Small random delay between keystrokes
-            time.sleep(random.uniform(0.05, 0.15))
+            pause(random.uniform(0.05, 0.15))
             
-        time.sleep(WAIT_BETWEEN_ACTIONS)
+        pause(WAIT_BETWEEN_ACTIONS)
         return f"Entered text into {selector_type} selector: {selector}"
     except NoSuchElementException:
         return f"Element with {selector_type} '{selector}' not found"
@@ -329,7 +840,7 @@ def press_enter() -> str:
     try:
         active_element = driver.switch_to.active_element
         active_element.send_keys(Keys.RETURN)
-        time.sleep(WAIT_BETWEEN_ACTIONS)
+        pause(WAIT_BETWEEN_ACTIONS)
         return "Pressed Enter key"
     except Exception as e:
         return f"Error pressing Enter: {str(e)}"
@@ -358,15 +869,17 @@ def scroll_down(pixels: int = 500) -> str:
         window.lastProgress = 0;
         window.requestAnimationFrame(scrollStep);
         """)
-        time.sleep(random.uniform(1.0, 2.0))  # Variable wait time
+        pause(random.uniform(1.0, 2.0))  # Variable wait time
         return f"Scrolled down {pixels} pixels"
     except Exception as e:
         return f"Error scrolling: {str(e)}"
 
 def scroll_to_bottom() -> str:
-    """Scrolls to the bottom of the page gradually."""
+    """Scrolls to the bottom of the page gradually, for at most SCROLL_TIME_BUDGET seconds."""
     initialize_driver()
     print("⬇️ Scrolling to bottom of page")
+    # Infinite-scroll pages never reach a bottom, so scrolling gets its own slice of the deadline
+    deadline = current_deadline().child(SCROLL_TIME_BUDGET)
     try:
         # Get initial page height
         total_height = driver.execute_script("return document.body.scrollHeight")
@@ -375,12 +888,17 @@ def scroll_to_bottom() -> str:
         
         # Scroll in steps with variable speed
         while current_position + viewport_height < total_height:
+            if deadline.expired():
+                print(f"⏱️ Page still growing at {total_height}px, stopped scrolling at the deadline")
+                return f"Stopped scrolling at {current_position}px, the page kept loading more content"
+            
             # Calculate a random scroll distance (between 300-800 pixels)
             scroll_step = random.randint(300, 800)
             driver.execute_script(f"window.scrollBy(0, {scroll_step});")
             
             # Random pause between scrolls
-            time.sleep(random.uniform(0.3, 1.2))
+            with deadline_scope(deadline):
+                pause(random.uniform(0.3, 1.2))
             
             # Update position
             current_position = driver.execute_script("return window.pageYOffset")
@@ -392,7 +910,7 @@ def scroll_to_bottom() -> str:
         
         # Final scroll to ensure we're at the bottom
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(WAIT_BETWEEN_ACTIONS)
+        pause(WAIT_BETWEEN_ACTIONS)
         return "Scrolled to bottom of page"
     except Exception as e:
         return f"Error scrolling to bottom: {str(e)}"
@@ -404,17 +922,11 @@ def wait_for_element(selector: str, selector_type: str = "css", timeout: int = 1
     
     try:
         if selector_type.lower() == "id":
-            element = WebDriverWait(driver, timeout).until(
-                EC.presence_of_element_located((By.ID, selector))
-            )
+            element = wait_until(EC.presence_of_element_located((By.ID, selector)), timeout)
         elif selector_type.lower() == "css":
-            element = WebDriverWait(driver, timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-            )
+            element = wait_until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)), timeout)
         elif selector_type.lower() == "xpath":
-            element = WebDriverWait(driver, timeout).until(
-                EC.presence_of_element_located((By.XPATH, selector))
-            )
+            element = wait_until(EC.presence_of_element_located((By.XPATH, selector)), timeout)
         else:
             return f"Invalid selector type: {selector_type}"
             
@@ -431,7 +943,7 @@ def extract_google_search_results() -> str:
     
     try:
         # Wait longer for results to load (increase from 10 to 15 seconds)
-        time.sleep(3)  # Add initial pause to ensure page is loaded
+        pause(3)  # Add initial pause to ensure page is loaded
         
         # Try multiple selector patterns to adapt to Google's changing structure
         result_selectors = [
@@ -449,9 +961,7 @@ def extract_google_search_results() -> str:
         for selector in result_selectors:
             try:
                 # Wait for results with this specific selector
-                WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                )
+                wait_until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)), 5)
                 
                 # Find all search result containers with this selector
                 result_elements = driver.find_elements(By.CSS_SELECTOR, selector)
@@ -551,28 +1061,17 @@ def extract_google_search_results() -> str:
                 # Take a screenshot to help with debugging
                 driver.save_screenshot("search_results_debug.png")
                 
-                # Get all links on the page
-                all_links = driver.find_elements(By.TAG_NAME, "a")
+                # Use the link index instead of querying every <a> element
                 search_links = []
-                
-                # Filter for links that look like search results
-                for link in all_links:
-                    href = link.get_attribute("href")
+                for link in get_link_index():
+                    href = link["raw_href"]
                     
-                    # Skip non-links and Google internal links
-                    if not href or not href.startswith("http") or "google" in href:
+                    # Skip Google internal links
+                    if "google" in href:
                         continue
-                        
-                    # Get text either from the link itself or a nearby h3
-                    link_text = link.text
                     
-                    try:
-                        # Try to find a nearby h3
-                        parent = driver.execute_script("return arguments[0].parentNode;", link)
-                        h3 = parent.find_element(By.TAG_NAME, "h3")
-                        link_text = h3.text
-                    except Exception:
-                        pass
+                    # Prefer a nearby h3 over the link text
+                    link_text = link["heading"] or link["text"]
                     
                     if link_text and len(link_text) > 10:  # Likely a result title
                         search_links.append((link_text, href))
@@ -622,19 +1121,24 @@ def extract_page_content() -> dict:
         except NoSuchElementException:
             pass
         
-        # Extract headings
-        for heading_level in range(1, 7):  # h1 through h6
-            heading_elements = driver.find_elements(By.CSS_SELECTOR, f"h{heading_level}")
-            for heading in heading_elements:
-                if heading.text.strip():
-                    page_info["headings"].append({
-                        "level": heading_level,
-                        "text": heading.text.strip()
-                    })
+        # Every element read is a browser round trip, so long pages check the deadline as they go
+        deadline = current_deadline()
+        
+        # Extract headings in document order, like the HTML parser does
+        heading_elements = driver.find_elements(By.CSS_SELECTOR, "h1, h2, h3, h4, h5, h6")
+        for heading in heading_elements:
+            deadline.check("heading extraction")
+            text = heading.text.strip()
+            if text:
+                page_info["headings"].append({
+                    "level": int(heading.tag_name[1]),
+                    "text": text
+                })
         
         # Extract paragraph content with better structure
         paragraphs = driver.find_elements(By.CSS_SELECTOR, "p")
         for i, p in enumerate(paragraphs):
+            deadline.check("paragraph extraction")
             text = p.text.strip()
             if text:
                 page_info["paragraphs"].append({
@@ -645,6 +1149,7 @@ def extract_page_content() -> dict:
         # Extract list items
         lists = driver.find_elements(By.CSS_SELECTOR, "ul, ol")
         for i, list_element in enumerate(lists):
+            deadline.check("list extraction")
             items = list_element.find_elements(By.CSS_SELECTOR, "li")
             list_items = []
             for item in items:
@@ -684,6 +1189,7 @@ def extract_page_content() -> dict:
         # Extract sections with headings - improved approach
         current_section = None
         for element in driver.find_elements(By.CSS_SELECTOR, "h1, h2, h3, h4, h5, h6, p, ul, ol"):
+            deadline.check("section extraction")
             tag_name = element.tag_name
             
             # If it's a heading, start a new section
@@ -709,6 +1215,12 @@ def extract_page_content() -> dict:
             page_info["sections"].append(current_section)
         
         return page_info
+    except DeadlineExceeded as e:
+        # Keep what was extracted so far
+        page_info["truncated"] = str(e)
+        if not page_info["main_content"] and page_info["paragraphs"]:
+            page_info["main_content"] = "\n\n".join(p["text"] for p in page_info["paragraphs"])[:MAX_TEXT_LENGTH]
+        return page_info
     except Exception as e:
         return {"error": f"Error extracting page content: {str(e)}"}
 
@@ -719,32 +1231,108 @@ def search_google(query: str) -> str:
     
     # Format and encode the query
     formatted_query = query.strip().replace(" ", "+")
-    search_url = f"https://www.google.com/search?hl=en&q={formatted_query}"
+    search_url = SEARCH_URL.format(query=formatted_query)
     
     # Navigate to Google search
     result = go_to_url(search_url)
     if "Error" in result or "Timeout" in result:
         return f"Failed to load Google search: {result}"
     
-    time.sleep(WAIT_BETWEEN_ACTIONS * 2)  # Give more time for search results to load
+    pause(WAIT_BETWEEN_ACTIONS * 2)  # Give more time for search results to load
     
     # Perform human-like scrolling to load all results
     perform_human_scrolling()
     
     return "Google search completed. Use extract_google_search_results() to get results."
 
-def analyze_business_data(data_list: List[Dict[str, Any]]) -> str:
-    """Analyzes collected business data and provides insights."""
+def collect_search_results(query: str, max_results: int = SEARCH_RESULTS_TO_VISIT) -> dict:
+    """Collects search results across as many result pages as needed to reach max_results.
+    
+    Args:
+        query: The search query
+        max_results: Number of unique results to collect
+    """
+    initialize_driver()
+    print(f"🔍 Collecting up to {max_results} search results for: {query}")
+    
+    search_url = SEARCH_URL.format(query=query.strip().replace(" ", "+"))
+    
+    def load_page(url):
+        result = go_to_url(url)
+        if "Error" in result or "Timeout" in result:
+            print(f"⚠️ Failed to load results page: {result}")
+            return []
+        pause(WAIT_BETWEEN_ACTIONS * 2)
+        results = [r for r in json.loads(extract_google_search_results()) if "url" in r]
+        # Without a "Next" link this is the last results page
+        return {"results": results, "has_next": bool(results) and bool(driver.find_elements(By.ID, "pnnext"))}
+    
+    try:
+        collected = paginate_results(
+            search_url,
+            load_page,
+            max_results=max_results,
+            per_page=RESULTS_PER_PAGE,
+            max_pages=MAX_SERP_PAGES,
+            # Static prefetches would go online in replays and bypass the recorder while recording
+            prefetch=recording is None and recorder is None
+        )
+        print(f"Collected {len(collected['results'])} search results: {collected['stats']}")
+        return collected
+    except Exception as e:
+        return {"results": [], "stats": {}, "error": f"Error collecting search results: {str(e)}"}
+
+def compact_page_record(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduces a page record to a short summary and its headings for the analysis prompt."""
+    content = page.get("content") or {}
+    summary = content.get("meta_description") or content.get("main_content") or ""
+    return {
+        "url": page.get("url"),
+        "title": page.get("title"),
+        "status": page.get("status"),
+        "summary": summary[:ANALYSIS_SUMMARY_CHARS],
+        "headings": [heading.get("text") for heading in content.get("headings", [])[:ANALYSIS_MAX_HEADINGS]],
+    }
+
+def analyze_business_data(data_list: List[Dict[str, Any]], figure_table: str = "") -> str:
+    """Analyzes collected business data and provides insights.
+    
+    When market figures can be reconciled across the pages, the prompt gets
+    their statistics plus a short summary per page instead of the full text.
+    
+    Args:
+        data_list: The collected website data
+        figure_table: Reconciled cross-site statistics of market figures, if available
+    """
     print("📊 Analyzing business data")
     
+    if not figure_table:
+        try:
+            # Empty when no figures were found, which keeps the full page text
+            figure_table = summarize_figures(data_list)["table"]
+        except RuntimeError as e:
+            print(f"⚠️ Sending full page text, figures could not be aggregated: {str(e)}")
+    
+    page_data = data_list
+    figures_section = ""
+    if figure_table:
+        page_data = [compact_page_record(page) for page in data_list]
+        figures_section = f"""
+    Market figures reconciled across all websites (USD-normalized, outliers excluded from the weighted median):
+    
+    {figure_table}
+    
+    Prefer these statistics over individual numbers quoted on single pages.
+    """
+    
     analysis_prompt = f"""
     You are an expert business analyst specializing in providing insights on business niches.
     
     You have collected data from {len(data_list)} websites about a specific business niche. 
     Below is the collected data:
     
-    {json.dumps(data_list, indent=2)}
-    
+    {json.dumps(page_data, indent=2)}
+    {figures_section}
     Please analyze this data and provide:
     
     1. Market Overview: Summarize the current state of this business niche
@@ -763,12 +1351,105 @@ def analyze_business_data(data_list: List[Dict[str, Any]]) -> str:
     
     return analysis_prompt
 
-def extract_website_data(url: str) -> dict:
-    """Visits a website and extracts relevant business data."""
+def extract_website_data(url: str, defer_parsing: bool = False) -> dict:
+    """Visits a website and extracts relevant business data.
+    
+    Args:
+        url: The website to visit
+        defer_parsing: Keep the raw page HTML for the post-processing pool instead of extracting content in the browser
+    """
+    # Each page gets its own slice of the caller's time budget
+    with deadline_scope(current_deadline().child(PAGE_TIME_BUDGET)):
+        return visit_and_extract(url, defer_parsing)
+
+def extract_document(url: str, kind: str) -> dict:
+    """Extracts a PDF or plain text document without the browser."""
+    print(f"📄 Extracting {kind} document: {url}")
+    deadline = current_deadline()
+    timeout = max(1, deadline.cap(PAGE_LOAD_TIMEOUT))
+    if kind == PDF:
+        content = extract_pdf(url, timeout=timeout, should_stop=deadline.expired)
+    else:
+        content = extract_text_document(url, timeout=timeout)
+    
+    if "error" in content:
+        return {
+            "url": url,
+            "status": "failed",
+            "error": content["error"]
+        }
+    return {
+        "url": url,
+        "title": content["title"],
+        "status": "success",
+        "source": kind,
+        "content": content,
+        "screenshots": [],
+        "static_hash": content["document"].get("sha256")
+    }
+
+def static_fingerprint(static_check, url: str) -> Optional[str]:
+    """Fingerprints the static copy fetched alongside a browser visit, if it arrived in time."""
+    if static_check is None:
+        return None
+    try:
+        response = static_check.result(timeout=max(0, current_deadline().cap(STATIC_FINGERPRINT_TIMEOUT)))
+    except Exception:
+        return None
+    if response.get("error") or "html" not in response["headers"].get("content-type", ""):
+        return None
+    return html_fingerprint(decode_body(response), url)
+
+def record_result(url: str, data: dict) -> dict:
+    """Adds a visit that never reached the browser to the recording, so replays can serve it."""
+    if recorder is not None:
+        recorder.record_result(url, data)
+    return data
+
+def visit_and_extract(url: str, defer_parsing: bool = False) -> dict:
+    """Navigates to a website and extracts its data within the current deadline."""
     print(f"🌐 Extracting data from: {url}")
     
-    # Navigate to the website
-    result = go_to_url(url)
+    # Find out what the URL serves before spending browser time on it
+    if recording is not None:
+        # Replays stay offline: visits that skipped the browser come back as recorded,
+        # everything else is served by the replay driver
+        recorded = recording.find_result(url)
+        if recorded is not None:
+            print(f"📼 Replaying recorded result: {url}")
+            return recorded
+        kind = classify_url(url)
+        if kind in (PDF, TEXT):
+            return {"url": url, "status": "failed", "error": f"No recording for {url}"}
+        target = {"kind": kind if kind in (MEDIA, OFFICE) else HTML, "method": "url"}
+    else:
+        target = preflight(url, timeout=max(1, current_deadline().cap(PREFLIGHT_TIMEOUT)))
+    if target["kind"] == MEDIA:
+        print(f"⏭️ Skipping media or download: {url}")
+        return record_result(url, {
+            "url": url,
+            "status": "skipped",
+            "reason": f"Not a web page ({target.get('content_type') or 'media URL'})"
+        })
+    if target["kind"] == OFFICE:
+        print(f"⏭️ Skipping unsupported document: {url}")
+        return record_result(url, {
+            "url": url,
+            "status": "skipped",
+            "reason": f"Unsupported document ({target.get('content_type') or 'Office file'})"
+        })
+    if target["kind"] in (PDF, TEXT):
+        return record_result(url, extract_document(url, target["kind"]))
+    
+    # Rendered DOMs differ from what the server sends, so a refresh compares against the static parse
+    static_check = None
+    if recording is None:
+        static_check = fingerprint_executor.submit(
+            fetch_url, url, timeout=max(1, current_deadline().cap(STATIC_FINGERPRINT_TIMEOUT))
+        )
+    
+    # Navigate to the website; only this caller consumes static copies, so only it hedges
+    result = navigate(url, hedge=HEDGED_NAVIGATION)
     if "Error" in result or "Timeout" in result:
         return {
             "url": url,
@@ -776,24 +1457,51 @@ def extract_website_data(url: str) -> dict:
             "error": result
         }
     
+    # A hedged navigation may have been won by the static fetch; parse that copy instead
+    static_page = current_session().state.pop("static_page", None)
+    if static_page:
+        if static_check:
+            static_check.cancel()
+        content = parse_page_html(static_page["html"], url)
+        data = {
+            "url": url,
+            "title": content["title"],
+            "status": "success",
+            "source": "static",
+            "content": {} if defer_parsing else content,
+            "screenshots": [],
+            "http_validators": target.get("http_validators") or {},
+            "static_hash": content_fingerprint(content)
+        }
+        if defer_parsing:
+            data["html"] = static_page["html"]
+        return record_result(url, data)
+    
     # Basic data collection
     data = {
         "url": url,
         "title": get_page_title(),
         "status": "success",
         "content": {},
-        "screenshots": []
+        "screenshots": [],
+        # Validators from the preflight HEAD let a later refresh use conditional requests
+        "http_validators": target.get("http_validators") or {}
     }
     
     try:
-        # Take screenshot
-        screenshot_result = take_screenshot(ToolContext())
+        # Capture the whole page in one call instead of scrolling and taking several screenshots
+        screenshot_result = take_screenshot(full_page=True, scale=FULL_PAGE_SCALE)
         if screenshot_result.get("status") == "success":
             data["screenshots"].append(screenshot_result.get("filename"))
         
         # Extract page content
-        content = extract_page_content()
-        if "error" not in content:
+        if defer_parsing:
+            data["html"] = driver.page_source
+            content = {}
+        else:
+            content = extract_page_content()
+        
+        if defer_parsing or "error" not in content:
             data["content"] = content
         else:
             data["content"] = {
@@ -802,73 +1510,282 @@ def extract_website_data(url: str) -> dict:
                 "raw_text": get_page_source()[:1000]  # Limited raw text as fallback
             }
         
-        # Scroll to see more content
-        for _ in range(3):
-            scroll_down(700)
-            time.sleep(1)
-        
-        # Take another screenshot after scrolling
-        screenshot_result = take_screenshot(ToolContext())
-        if screenshot_result.get("status") == "success":
-            data["screenshots"].append(screenshot_result.get("filename"))
-        
+        data["static_hash"] = static_fingerprint(static_check, url)
         return data
     except Exception as e:
         data["status"] = "partial"
         data["error"] = str(e)
         return data
 
-def research_business_niche(niche: str, tool_context: ToolContext) -> str:
-    """Orchestrates the entire business niche research process."""
+def crawl_website(url: str, defer_parsing: bool = False, collect_links: bool = True) -> tuple:
+    """Extracts data from a page and returns it together with its internal links.
+
+    collect_links=False skips the link index for pages whose links the crawler could not queue.
+    """
+    data = extract_website_data(url, defer_parsing=defer_parsing)
+    links = []
+    # Static copies and documents never reached the browser, so its link index is of another page
+    if collect_links and data.get("status") not in ("failed", "skipped") and "source" not in data:
+        try:
+            links = filter_links(get_link_index(), scope="internal")
+        except Exception as e:
+            print(f"⚠️ Could not index links on {url}: {str(e)}")
+    return data, links
+
+def research_business_niche(niche: str, tool_context: ToolContext, crawl: bool = False,
+                            saturation_threshold: float = SATURATION_THRESHOLD,
+                            parallel_parsing: bool = False, profile_memory: bool = False,
+                            time_budget: Optional[float] = None) -> str:
+    """Orchestrates the entire business niche research process.
+    
+    Args:
+        niche: The business niche to research
+        crawl: Also follow relevant internal links of visited sites (focused crawler)
+        saturation_threshold: Stop once recent pages add less new information than this (0 visits every result)
+        parallel_parsing: Parse page HTML in a multi-core process pool while browsing continues
+        profile_memory: Sample Python and Chrome memory per page and write a memory timeline report
+        time_budget: Total seconds the run may take; it then returns what it has, noting what was skipped
+    """
     print(f"🔍 Researching business niche: {niche}")
+    current_session_id.set(session_id_from_context(tool_context))
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    profiler = MemoryProfiler(enabled=profile_memory or PROFILE_MEMORY)
     
-    try:
-        # Initialize browser if not already done
-        initialize_driver()
-        
-        # Step 1: Search Google for the business niche
-        search_google(f"{niche} business opportunity analysis profitable")
-        
-        # Step 2: Extract search results
-        search_results_json = extract_google_search_results()
-        search_results = json.loads(search_results_json)
-        
-        if not search_results:
-            return "No search results found. Please try a different search query."
-        
-        # Step 3: Visit each website and collect data
-        collected_data = []
-        
-        for idx, result in enumerate(search_results[:SEARCH_RESULTS_TO_VISIT]):
-            print(f"Visiting result {idx+1}/{len(search_results[:SEARCH_RESULTS_TO_VISIT])}: {result['title']}")
+    # Browsing works against a deadline that leaves time to save and analyze what was collected
+    run_deadline = Deadline(time_budget)
+    collect_deadline = run_deadline.child(reserve=DEADLINE_RESERVE if time_budget else 0)
+    run_start = time.time()
+    deadline_reached = False
+    
+    def out_of_time():
+        return collect_deadline.remaining() < MIN_PAGE_SECONDS
+    
+    with deadline_scope(collect_deadline):
+        try:
+            # Initialize browser if not already done
+            profiler.start_stage("browser_setup")
+            initialize_driver()
+            
+            # Step 1-2: Search Google for the business niche across as many result pages as needed
+            profiler.start_stage("search")
+            # Result pages may only use part of a time-boxed run, the rest is for visiting sites
+            search_deadline = collect_deadline.child(time_budget * SEARCH_TIME_SHARE if time_budget else None)
+            with deadline_scope(search_deadline):
+                search = collect_search_results(f"{niche} business opportunity analysis profitable")
+            search_results = search["results"]
+            
+            if not search_results:
+                profiler.write_report(f"memory_report_{timestamp}.json")
+                return "No search results found. Please try a different search query."
+            
+            # Step 3: Visit each website and collect data
+            profiler.start_stage("site_visits")
+            collected_data = []
+            skipped_targets = []
+            crawler = None
+            if crawl:
+                crawler = FocusedCrawler(
+                    niche,
+                    max_depth=CRAWL_MAX_DEPTH,
+                    max_pages=CRAWL_MAX_PAGES,
+                    time_budget=CRAWL_TIME_BUDGET
+                )
+                for result in search_results:
+                    if result.get("url"):
+                        crawler.mark_visited(result["url"])
+            
+            # Stop early once new pages stop adding information, visiting the most promising first
+            monitor = SaturationMonitor(window=SATURATION_WINDOW, threshold=saturation_threshold)
+            remaining = search_results[:SEARCH_RESULTS_TO_VISIT]
+            total_results = len(remaining)
+            start_time = time.time()
+            
+            # Parse pages on other cores while the browser moves on to the next site
+            postprocessor = None
+            if parallel_parsing:
+                postprocessor = PostProcessor(workers=POSTPROCESS_WORKERS, batch_size=POSTPROCESS_BATCH_SIZE)
+            
+            def merge_processed(records):
+                for record in records:
+                    page = collected_data[record.pop("visit_index")]
+                    page.update(record)
+                    monitor.observe(page)
             
-            # Extract data from the website
-            website_data = extract_website_data(result['url'])
-            collected_data.append(website_data)
+            def record_page(website_data):
+                if website_data.get("status") == "skipped":
+                    # Media and downloads carry no research content
+                    skipped_targets.append({"url": website_data["url"], "reason": website_data["reason"]})
+                    return
+                collected_data.append(website_data)
+                profiler.sample("page_visited", website_data.get("url"))
+                if postprocessor and "html" in website_data:
+                    snapshot = dict(website_data, visit_index=len(collected_data) - 1)
+                    del website_data["html"]
+                    postprocessor.submit(snapshot)
+                else:
+                    monitor.observe(website_data)
+                if postprocessor:
+                    merge_processed(postprocessor.completed())
             
-            # Take a short break between websites
-            time.sleep(random.uniform(1.5, 3.0))
+            try:
+                while remaining:
+                    if out_of_time():
+                        deadline_reached = True
+                        print(f"⏱️ Time budget reached after {len(collected_data)} sites, skipping {len(remaining)} remaining")
+                        break
+                    result = remaining.pop(0)
+                    print(f"Visiting result {len(collected_data)+1}/{total_results}: {result['title']}")
+                    
+                    # Extract data from the website
+                    if crawler:
+                        website_data, links = crawl_website(result['url'], defer_parsing=parallel_parsing,
+                                                            collect_links=crawler.wants_links(0))
+                        crawler.add_links(links, depth=1, source_url=result['url'])
+                    else:
+                        website_data = extract_website_data(result['url'], defer_parsing=parallel_parsing)
+                    record_page(website_data)
+                    
+                    if monitor.saturated():
+                        print(f"🛑 Research saturated after {len(collected_data)} sites, skipping {len(remaining)} remaining")
+                        break
+                    remaining = monitor.rank(remaining)
+                    
+                    # Take a short break between websites
+                    pause(random.uniform(1.5, 3.0))
+                
+                # Estimate the time saved against visiting every search result
+                saturation = monitor.summary()
+                saturation["sites_skipped"] = len(remaining)
+                if collected_data:
+                    seconds_per_site = (time.time() - start_time) / len(collected_data)
+                    saturation["estimated_seconds_saved"] = round(seconds_per_site * len(remaining), 1)
+                
+                # Step 3b: Follow the most relevant links one click beyond the search results
+                crawl_stats = None
+                if crawler:
+                    profiler.start_stage("focused_crawl")
+                    def crawl_and_record(url, collect_links):
+                        page_data, links = crawl_website(url, defer_parsing=parallel_parsing,
+                                                         collect_links=collect_links)
+                        record_page(page_data)
+                        return page_data, links
+                    
+                    crawl_result = crawler.run(crawl_and_record, should_stop=lambda: monitor.saturated() or out_of_time())
+                    crawl_stats = crawl_result["stats"]
+                    if crawl_stats["stop_reason"] == "stopped by caller" and out_of_time():
+                        deadline_reached = True
+                    print(f"🕸️ Focused crawl finished: {crawl_stats}")
+                
+                if postprocessor:
+                    profiler.start_stage("postprocess_drain")
+                    merge_processed(postprocessor.drain())
+            finally:
+                if postprocessor:
+                    postprocessor.close()
+            
+            # Step 4: Save the collected data, fingerprinted so a later refresh can skip unchanged pages
+            profiler.start_stage("save_dataset")
+            for page in collected_data:
+                if page.get("content") and "content_hash" not in page:
+                    page["content_hash"] = content_fingerprint(page["content"])
+            data_filename = dataset_filename(f"business_niche_data_{timestamp}", DATASET_FORMAT)
+            write_dataset(collected_data, data_filename, DATASET_FORMAT)
+            
+            # Step 5: Reconcile the market figures quoted across all sites
+            profiler.start_stage("figure_aggregation")
+            figure_summary = None
+            try:
+                figure_summary = summarize_figures(collected_data)
+                print(f"📐 Aggregated {figure_summary['figures']} figures in {figure_summary['elapsed_seconds']}s")
+            except RuntimeError as e:
+                print(f"⚠️ Skipping figure aggregation: {str(e)}")
+            
+            # Step 6: Analyze the collected data
+            profiler.start_stage("analysis_prompt")
+            # Pages are only swapped for compact records when there are statistics to replace them
+            figure_table = figure_summary["table"] if figure_summary and figure_summary["metrics"] else ""
+            analysis_prompt = analyze_business_data(collected_data, figure_table)
+            memory_report = profiler.write_report(f"memory_report_{timestamp}.json")
+            
+            time_limit = None
+            if time_budget:
+                time_limit = {
+                    "time_budget": time_budget,
+                    "elapsed_seconds": round(time.time() - run_start, 1),
+                    "deadline_reached": deadline_reached,
+                }
+                if deadline_reached:
+                    time_limit["skipped_results"] = [r["url"] for r in remaining if "url" in r]
+                    time_limit["note"] = (
+                        f"Stopped at the {time_budget}s time budget: {len(remaining)} search results were not visited"
+                        + (f" and {crawl_stats['pages_queued']} crawl links were left queued" if crawl_stats else "")
+                        + ". Pages cut short by the deadline are marked failed or truncated."
+                    )
+            
+            # Return summary of the research process
+            return {
+                "status": "partial" if deadline_reached else "completed",
+                "niche": niche,
+                "websites_analyzed": len(collected_data),
+                "data_filename": data_filename,
+                "search_stats": search["stats"],
+                "site_health": {
+                    "quick_fails": health_tracker.quick_fails,
+                    "open_domains": health_tracker.stats()["open_domains"]
+                },
+                "crawl_stats": crawl_stats,
+                "skipped_targets": skipped_targets,
+                "saturation": saturation,
+                "memory_report": memory_report,
+                "time_limit": time_limit,
+                "figure_summary": figure_summary["metrics"] if figure_summary else None,
+                "analysis_prompt": analysis_prompt
+            }
+        except Exception as e:
+            profiler.write_report(f"memory_report_{timestamp}.json")
+            return f"Error researching business niche: {str(e)}"
+
+def refresh_business_niche(data_filename: str, tool_context: ToolContext, niche: str = "",
+                           include_new_results: bool = True) -> dict:
+    """Refreshes a previous research run, re-fetching only pages that changed.
+    
+    Args:
+        data_filename: Dataset file written by an earlier research_business_niche run
+        niche: The researched niche, used to look for newly ranking search results
+        include_new_results: Also visit search results the previous run didn't have
+    """
+    print(f"♻️ Refreshing research data from: {data_filename}")
+    current_session_id.set(session_id_from_context(tool_context))
+    
+    try:
+        previous_records = load_dataset(data_filename)
         
-        # Step 4: Save the collected data
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        data_filename = f"business_niche_data_{timestamp}.json"
+        # Pick up pages that started ranking since the last run
+        new_results = []
+        if include_new_results and niche:
+            new_results = collect_search_results(f"{niche} business opportunity analysis profitable")["results"]
         
-        with open(data_filename, 'w') as f:
-            json.dump(collected_data, f, indent=2)
+        refreshed = refresh_records(previous_records, extract_website_data, new_results)
         
-        # Step 5: Analyze the collected data
-        analysis_prompt = analyze_business_data(collected_data)
+        # Save the refreshed dataset and the diff next to each other
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        refreshed_filename = dataset_filename(f"business_niche_data_{timestamp}", DATASET_FORMAT)
+        write_dataset(refreshed["records"], refreshed_filename, DATASET_FORMAT)
+        diff_filename = f"business_niche_diff_{timestamp}.json"
+        with open(diff_filename, 'w') as f:
+            json.dump(refreshed["diff"], f, indent=2)
         
-        # Return summary of the research process
+        print(f"✅ Refresh finished: {refreshed['stats']}")
         return {
             "status": "completed",
-            "niche": niche,
-            "websites_analyzed": len(collected_data),
-            "data_filename": data_filename,
-            "analysis_prompt": analysis_prompt
+            "previous_data_filename": data_filename,
+            "data_filename": refreshed_filename,
+            "diff_filename": diff_filename,
+            "stats": refreshed["stats"],
+            "diff": refreshed["diff"]
         }
     except Exception as e:
-        return f"Error researching business niche: {str(e)}"
+        return {"status": "error", "message": f"Error refreshing research data: {str(e)}"}
 
 def generate_business_ideas(interest: str, industry: str, budget: str, skill_level: str) -> str:
     """Generates business ideas based on user inputs."""
@@ -907,19 +1824,26 @@ agent = Agent(
     name="business_research_agent",
     description="Research business niches and provide detailed analysis",
     instruction=SEARCH_RESULT_AGENT_PROMPT,
+    before_tool_callback=bind_tool_session,
+    after_tool_callback=fit_tool_output,
+    before_model_callback=serve_cached_model_response,
+    after_model_callback=store_model_response,
     tools=[
         # Browser navigation
         initialize_driver,
         go_to_url,
+        close_browser_session,
         
         # Search functions
         search_google,
         extract_google_search_results,
+        collect_search_results,
         perform_human_scrolling,
         
         # Page interaction
         click_element_with_text,
         click_link_by_url_pattern,
+        list_page_links,
         enter_text_into_element,
         press_enter,
         find_element_with_text,
@@ -936,12 +1860,17 @@ agent = Agent(
         
         # Business analysis
         research_business_niche,
+        refresh_business_niche,
         generate_business_ideas,
         analyze_business_data,
         extract_website_data,
         
         # Utilities
         take_screenshot,
+        fetch_payload,
+        get_context_budget,
+        set_model_cache,
+        get_model_cache_stats,
         load_artifacts_tool,
     ],
 )
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+CHARS_PER_TOKEN = 4
+HANDLE_PATTERN = re.compile(r"payload-[0-9a-f]{12}")
+MB = 1024 * 1024
+
+
+def session_file_token(session_id: str) -> str:
+    """Returns a form of a session ID that is safe to use in file and directory names."""
+    session_id = session_id or "default"
+    token = re.sub(r"[^A-Za-z0-9_-]+", "_", session_id)[:64]
+    if token != session_id:
+        # IDs that only differ in replaced characters must not share files
+        token = f"{token}-{hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:8]}"
+    return token
+
+
+def estimate_tokens(value: Any) -> int:
+    """Cheap token estimate of a tool output (about four characters per token)."""
+    if value is None:
+        return 0
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class SessionBudget:
+    """Token accounting of one ADK session."""
+
+    def __init__(self, total_tokens: int):
+        self.total_tokens = total_tokens
+        self.consumed = 0
+        self.offloaded = 0
+        self.per_tool: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total_tokens - self.consumed)
+
+    def record(self, tool_name: str, returned_tokens: int, original_tokens: int):
+        self.consumed += returned_tokens
+        self.offloaded += original_tokens - returned_tokens
+        usage = self.per_tool.setdefault(tool_name, {"calls": 0, "tokens": 0, "offloaded_tokens": 0})
+        usage["calls"] += 1
+        usage["tokens"] += returned_tokens
+        usage["offloaded_tokens"] += original_tokens - returned_tokens
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_tokens": self.total_tokens,
+            "consumed_tokens": self.consumed,
+            "remaining_tokens": self.remaining,
+            "offloaded_tokens": self.offloaded,
+            "per_tool": self.per_tool,
+        }
+
+
+class BudgetManager:
+    """Session-wide context budget for tool outputs.
+
+    Every tool output is measured against the calling session's budget. An
+    output larger than the tool's current allowance is cut down: the full
+    payload is stored on disk behind a handle, and the model gets a preview
+    plus the handle to fetch more on demand. Allowances shrink as the
+    session's remaining budget shrinks. Payloads are filed per session and a
+    handle only resolves for the session that stored it. Each session keeps
+    at most max_session_bytes of payloads (oldest evicted first), payloads
+    older than payload_max_age are swept, and discard_payloads removes a
+    session's payloads once it ends.
+    """
+
+    def __init__(self, session_tokens: int = 400000, max_output_tokens: int = 12000,
+                 min_output_tokens: int = 500, remaining_fraction: float = 0.125,
+                 payload_directory: str = "tool_payloads", max_session_bytes: int = 50 * MB,
+                 payload_max_age: float = 24 * 3600, sweep_interval: float = 600):
+        self.session_tokens = session_tokens
+        self.max_output_tokens = max_output_tokens
+        self.min_output_tokens = min_output_tokens
+        self.remaining_fraction = remaining_fraction
+        self.payload_directory = payload_directory
+        self.max_session_bytes = max_session_bytes
+        self.payload_max_age = payload_max_age
+        self.sweep_interval = sweep_interval
+        self.sessions: Dict[str, SessionBudget] = {}
+        self.lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def session(self, session_id: str) -> SessionBudget:
+        with self.lock:
+            if session_id not in self.sessions:
+                self.sessions[session_id] = SessionBudget(self.session_tokens)
+            return self.sessions[session_id]
+
+    def allowance(self, session_id: str) -> int:
+        """Tokens the next tool output of a session may use."""
+        remaining = self.session(session_id).remaining
+        return max(self.min_output_tokens, min(self.max_output_tokens, int(remaining * self.remaining_fraction)))
+
+    def char_limit(self, session_id: str) -> int:
+        """Character limit matching the session's current allowance."""
+        return self.allowance(session_id) * CHARS_PER_TOKEN
+
+    def _session_directory(self, session_id: str) -> str:
+        return os.path.join(self.payload_directory, session_file_token(session_id))
+
+    def _payload_path(self, session_id: str, handle: str) -> str:
+        return os.path.join(self._session_directory(session_id), f"{handle}.txt")
+
+    def store_payload(self, session_id: str, payload: str) -> str:
+        """Saves a payload to disk and returns the handle it can be fetched with."""
+        handle = f"payload-{uuid.uuid4().hex[:12]}"
+        path = self._payload_path(session_id, handle)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        self._evict(session_id, keep=path)
+        self.sweep_expired()
+        return handle
+
+    def _evict(self, session_id: str, keep: str):
+        """Deletes a session's oldest payloads until it fits max_session_bytes again."""
+        directory = self._session_directory(session_id)
+        with self.lock:
+            try:
+                entries = [entry for entry in os.scandir(directory) if entry.is_file()]
+            except FileNotFoundError:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            total = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if total <= self.max_session_bytes:
+                    break
+                if entry.path == keep:
+                    continue
+                total -= entry.stat().st_size
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def sweep_expired(self, force: bool = False) -> int:
+        """Deletes payloads older than payload_max_age, at most once per sweep_interval."""
+        now = time.time()
+        with self.lock:
+            if not force and now - self._last_sweep < self.sweep_interval:
+                return 0
+            self._last_sweep = now
+        removed = 0
+        if not os.path.isdir(self.payload_directory):
+            return removed
+        for session_directory in os.scandir(self.payload_directory):
+            if not session_directory.is_dir():
+                continue
+            for entry in os.scandir(session_directory.path):
+                if entry.is_file() and now - entry.stat().st_mtime > self.payload_max_age:
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+            # Directories emptied by this sweep are removed by the next one, after they sat idle
+            if now - session_directory.stat().st_mtime > self.payload_max_age and not os.listdir(session_directory.path):
+                os.rmdir(session_directory.path)
+        return removed
+
+    def discard_payloads(self, session_id: str):
+        """Deletes every payload of a session that has ended."""
+        shutil.rmtree(self._session_directory(session_id), ignore_errors=True)
+
+    def load_payload(self, session_id: str, handle: str) -> Optional[str]:
+        """Reads a payload stored by the same session; None for unknown or foreign handles."""
+        if not HANDLE_PATTERN.fullmatch(handle or ""):
+            return None
+        path = self._payload_path(session_id, handle)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def _offload(self, session_id: str, value: Any, preview_chars: int) -> Dict[str, Any]:
+        text = value if isinstance(value, str) else json.dumps(value, indent=2, default=str)
+        return {
+            "preview": text[:preview_chars],
+            "payload_handle": self.store_payload(session_id, text),
+            "total_chars": len(text),
+            "note": "Output trimmed to fit the context budget. Use fetch_payload with this handle to read more.",
+        }
+
+    def fit(self, session_id: str, tool_name: str, response: Any) -> Any:
+        """Accounts for a tool output and trims it to the session's allowance.
+
+        Returns the response to hand to the model (the original object when it fits).
+        """
+        original_tokens = estimate_tokens(response)
+        allowance = self.allowance(session_id)
+        fitted = response
+
+        if original_tokens > allowance:
+            if isinstance(response, dict):
+                # Offload the biggest fields first and keep the small status fields readable
+                fitted = dict(response)
+                fields = sorted(fitted, key=lambda key: -estimate_tokens(fitted[key]))
+                for key in fields:
+                    if estimate_tokens(fitted) <= allowance:
+                        break
+                    field_tokens = estimate_tokens(fitted[key])
+                    if field_tokens < self.min_output_tokens // 2:
+                        continue
+                    others = estimate_tokens(fitted) - field_tokens
+                    preview_chars = max(200, (allowance - others) * CHARS_PER_TOKEN // 2)
+                    fitted[key] = self._offload(session_id, fitted[key], preview_chars)
+            else:
+                fitted = self._offload(session_id, response, allowance * CHARS_PER_TOKEN - 400)
+            print(f"📦 Trimmed {tool_name} output from {original_tokens} to {estimate_tokens(fitted)} tokens")
+
+        self.session(session_id).record(tool_name, estimate_tokens(fitted), original_tokens)
+        return fitted
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the accounting of every session for monitoring."""
+        with self.lock:
+            sessions = dict(self.sessions)
+        return {session_id: budget.summary() for session_id, budget in sessions.items()}
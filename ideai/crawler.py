@@ -0,0 +1,184 @@
+import heapq
+import re
+import time
+import urllib.parse
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+from .links import canonicalize_url, site_key
+
+# Terms that point at the fields the final research report asks for
+REPORT_FIELD_TERMS = [
+    "pricing", "price", "prices", "plans", "cost", "costs", "market", "size", "growth",
+    "revenue", "profit", "margin", "margins", "report", "reports", "statistics", "stats",
+    "forecast", "trends", "industry", "competitors", "customers", "case", "study",
+    "investment", "funding", "regulation", "compliance", "analysis", "research", "data",
+]
+
+# Links that almost never carry research value
+LOW_VALUE_TERMS = [
+    "login", "signin", "sign-in", "signup", "register", "cart", "checkout", "account",
+    "privacy", "terms", "cookie", "cookies", "careers", "jobs", "contact", "help",
+    "support", "facebook", "twitter", "instagram", "linkedin", "youtube",
+]
+
+SKIPPED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".mp4", ".mp3", ".exe")
+
+STOP_WORDS = {"the", "and", "for", "with", "a", "an", "of", "in", "to", "on", "business", "opportunity"}
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text or a URL into lowercase word tokens."""
+    return [token for token in re.split(r"[^a-z0-9]+", (text or "").lower()) if len(token) > 1]
+
+
+def niche_terms(niche: str) -> List[str]:
+    """Returns the meaningful search terms of a niche description."""
+    return [token for token in tokenize(niche) if token not in STOP_WORDS]
+
+
+def score_link(link: Dict[str, Any], niche_tokens: List[str]) -> float:
+    """Cheap relevance score of a link from its anchor text and URL tokens."""
+    href = link.get("href", "")
+    if href.lower().endswith(SKIPPED_EXTENSIONS):
+        return 0.0
+
+    anchor_tokens = set(tokenize(link.get("text", "")))
+    url_tokens = set(tokenize(urllib.parse.urlsplit(href).path))
+
+    score = 0.0
+    for term in niche_tokens:
+        if term in anchor_tokens:
+            score += 3.0
+        if term in url_tokens:
+            score += 2.0
+    for term in REPORT_FIELD_TERMS:
+        if term in anchor_tokens:
+            score += 1.5
+        if term in url_tokens:
+            score += 1.0
+    if any(term in url_tokens or term in anchor_tokens for term in LOW_VALUE_TERMS):
+        score -= 5.0
+    if not link.get("visible", True):
+        score -= 1.0
+    return score
+
+
+class FocusedCrawler:
+    """Budgeted best-first BFS over internal links of already visited pages.
+
+    Pages are expanded one depth level at a time; inside a level the links
+    with the highest relevance score are visited first. The crawl stops at
+    whichever of max_depth, max_pages or time_budget is hit first.
+    """
+
+    def __init__(self, niche: str, max_depth: int = 1, max_pages: int = 30,
+                 time_budget: float = 300, max_pages_per_site: int = 5, min_score: float = 1.0):
+        self.niche_tokens = niche_terms(niche)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.time_budget = time_budget
+        self.max_pages_per_site = max_pages_per_site
+        self.min_score = min_score
+        self.frontier: List[Tuple[int, float, int, str, Dict[str, Any]]] = []
+        self.seen = set()
+        self.pages_per_site: Dict[str, int] = {}
+        self._counter = 0
+
+    def mark_visited(self, url: str):
+        """Records a page that was visited outside the crawler (e.g. a search result)."""
+        self.seen.add(canonicalize_url(url))
+
+    def add_links(self, links: List[Dict[str, Any]], depth: int, source_url: str = "") -> int:
+        """Queues the relevant internal links found on a page at the given depth."""
+        if depth > self.max_depth:
+            return 0
+        added = 0
+        for link in links:
+            if not link.get("internal"):
+                continue
+            href = link["href"]
+            if href in self.seen:
+                continue
+            score = score_link(link, self.niche_tokens)
+            if score < self.min_score:
+                continue
+            self.seen.add(href)
+            self._counter += 1
+            heapq.heappush(self.frontier, (depth, -score, self._counter, href, {
+                "url": href,
+                "title": link.get("text") or href,
+                "depth": depth,
+                "score": score,
+                "source_url": source_url,
+            }))
+            added += 1
+        return added
+
+    def wants_links(self, depth: int) -> bool:
+        """Checks whether links found on a page at this depth could still be queued."""
+        return depth < self.max_depth
+
+    def run(self, visit_page: Callable[[str, bool], Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+            should_stop: Optional[Callable[[], bool]] = None,
+            is_useful: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """Visits queued pages until the frontier or a budget runs out.
+
+        Args:
+            visit_page: Callable taking a URL and whether to harvest its links, returning
+                (page data, internal link records); pages at max_depth are visited
+                without harvesting since their links could never be queued
+            should_stop: Optional callable checked before every visit
+            is_useful: Optional callable deciding whether a visited page added research
+                value; defaults to every page that loaded
+        """
+        if is_useful is None:
+            is_useful = lambda page: page.get("status") not in ("failed", "skipped")
+        start = time.time()
+        collected = []
+        useful = 0
+        stop_reason = "frontier exhausted"
+
+        while self.frontier:
+            if len(collected) >= self.max_pages:
+                stop_reason = "page limit reached"
+                break
+            if time.time() - start >= self.time_budget:
+                stop_reason = "time budget exhausted"
+                break
+            if should_stop and should_stop():
+                stop_reason = "stopped by caller"
+                break
+
+            depth, _, _, href, entry = heapq.heappop(self.frontier)
+            site = site_key(href)
+            if self.pages_per_site.get(site, 0) >= self.max_pages_per_site:
+                continue
+            self.pages_per_site[site] = self.pages_per_site.get(site, 0) + 1
+
+            print(f"🕸️ Crawling (depth {depth}, score {entry['score']:.1f}): {href}")
+            page_data, links = visit_page(href, self.wants_links(depth))
+            page_data["crawl"] = {
+                "depth": depth,
+                "score": entry["score"],
+                "source_url": entry["source_url"],
+            }
+            collected.append(page_data)
+            if is_useful(page_data):
+                useful += 1
+
+            if page_data.get("status") != "failed" and self.wants_links(depth):
+                self.add_links(links, depth + 1, source_url=href)
+
+        elapsed = time.time() - start
+        return {
+            "pages": collected,
+            "stats": {
+                "pages_visited": len(collected),
+                "pages_queued": len(self.frontier),
+                "elapsed_seconds": round(elapsed, 2),
+                "pages_per_second": round(len(collected) / elapsed, 3) if elapsed > 0 else 0.0,
+                "useful_pages": useful,
+                "useful_pages_per_second": round(useful / elapsed, 3) if elapsed > 0 else 0.0,
+                "stop_reason": stop_reason,
+            },
+        }
@@ -0,0 +1,67 @@
+import contextlib
+import contextvars
+import math
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a step of a research run runs out of its time budget."""
+
+
+class Deadline:
+    """A point in time a piece of work has to finish by.
+
+    Work splits its deadline into sub-deadlines with child(): a child never
+    outlives its parent, so a per-page budget automatically shrinks as the
+    run's total budget runs out. A deadline without a budget never expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, expires_at: Optional[float] = None):
+        if expires_at is None and seconds is not None:
+            expires_at = time.monotonic() + max(0.0, seconds)
+        self.expires_at = expires_at
+
+    def remaining(self) -> float:
+        """Seconds left, or infinity for an unbounded deadline."""
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def child(self, seconds: Optional[float] = None, reserve: float = 0.0) -> "Deadline":
+        """Derives a sub-deadline of at most `seconds`, leaving `reserve` seconds of this one unused."""
+        candidates = []
+        if self.expires_at is not None:
+            candidates.append(self.expires_at - reserve)
+        if seconds is not None:
+            candidates.append(time.monotonic() + seconds)
+        return Deadline(expires_at=min(candidates) if candidates else None)
+
+    def cap(self, seconds: float) -> float:
+        """Limits a timeout or wait to the time left."""
+        return min(seconds, self.remaining())
+
+    def check(self, what: str = "operation"):
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline reached during {what}")
+
+
+# Deadline of the work the current tool call belongs to; unbounded unless a caller sets one
+_current_deadline = contextvars.ContextVar("ideai_deadline", default=Deadline())
+
+
+def current_deadline() -> Deadline:
+    return _current_deadline.get()
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline: Deadline):
+    """Makes `deadline` the current deadline for the enclosed block."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
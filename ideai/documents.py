@@ -0,0 +1,230 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import urllib.parse
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional
+
+from .fetch import fetch_url, download, decode_body, validators_from, HashingWriter
+from .postprocess import clean_text, MAX_TEXT_LENGTH
+
+# pypdf is only needed to read PDF reports; without it PDFs are skipped
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+HTML = "html"
+PDF = "pdf"
+TEXT = "text"
+MEDIA = "media"
+OFFICE = "office"  # Word, Excel and PowerPoint files, which no extractor reads yet
+
+PDF_MAX_PAGES = 30                 # Pages of a PDF report that are read
+PDF_MAX_BYTES = 25 * 1024 * 1024   # Bytes of a report downloaded from the start of the file
+PDF_TAIL_BYTES = 1024 * 1024       # End of a larger report fetched for its cross-reference table and trailer
+SNIFF_BYTES = 1024
+
+EXTENSION_KINDS = {
+    ".pdf": PDF,
+    ".txt": TEXT, ".csv": TEXT, ".md": TEXT,
+}
+# Media and downloads that the research never reads
+MEDIA_EXTENSIONS = {
+    ".mp4", ".m4v", ".mov", ".avi", ".mkv", ".webm", ".mp3", ".wav", ".m4a", ".ogg",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg",
+    ".zip", ".rar", ".7z", ".gz", ".tar", ".exe", ".dmg", ".msi", ".apk", ".iso",
+}
+OFFICE_EXTENSIONS = {".doc", ".docx", ".ppt", ".pptx", ".xls", ".xlsx", ".odt", ".ods", ".odp"}
+# Video pages render as HTML but hold nothing worth extracting
+MEDIA_URL_PATTERN = re.compile(
+    r"^https?://(?:www\.|m\.)?(?:youtube\.com/(?:watch|shorts|embed)|youtu\.be/|vimeo\.com/\d|tiktok\.com/@[^/]+/video)",
+    re.IGNORECASE
+)
+TEXT_CONTENT_TYPES = ("text/plain", "text/csv", "text/markdown")
+MEDIA_CONTENT_TYPES = ("video/", "audio/", "image/", "application/zip", "application/x-", "application/vnd.")
+OFFICE_CONTENT_TYPES = ("application/msword", "application/vnd.ms-", "application/vnd.openxmlformats-officedocument.",
+                        "application/vnd.oasis.opendocument.")
+# Servers label PDFs and downloads alike with these, so the body decides
+GENERIC_CONTENT_TYPES = ("application/octet-stream", "binary/octet-stream", "application/download")
+
+
+def classify_url(url: str) -> Optional[str]:
+    """Classifies a target from its URL alone; None when the URL doesn't tell."""
+    if MEDIA_URL_PATTERN.match(url):
+        return MEDIA
+    path = urllib.parse.urlsplit(url).path.lower()
+    extension = os.path.splitext(path)[1]
+    if extension in MEDIA_EXTENSIONS:
+        return MEDIA
+    if extension in OFFICE_EXTENSIONS:
+        return OFFICE
+    return EXTENSION_KINDS.get(extension)
+
+
+def classify_content_type(content_type: str) -> Optional[str]:
+    """Maps a Content-Type header to a target kind; None for missing or unrecognized types."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if not content_type:
+        return None
+    if content_type in ("text/html", "application/xhtml+xml"):
+        return HTML
+    if content_type == "application/pdf":
+        return PDF
+    if content_type in TEXT_CONTENT_TYPES:
+        return TEXT
+    if content_type.startswith(OFFICE_CONTENT_TYPES):
+        return OFFICE
+    if content_type.startswith(MEDIA_CONTENT_TYPES):
+        return MEDIA
+    return None
+
+
+def sniff_kind(head: bytes) -> Optional[str]:
+    """Recognizes a target from its first bytes."""
+    start = head.lstrip()[:SNIFF_BYTES].lower()
+    if start.startswith(b"%pdf-"):
+        return PDF
+    if start.startswith((b"<!doctype html", b"<html", b"<?xml")) or b"<head" in start or b"<body" in start:
+        return HTML
+    return None
+
+
+def preflight(url: str, timeout: float = 5) -> Dict[str, Any]:
+    """Decides how a target should be extracted before the browser spends time on it.
+
+    Tries, cheapest first: URL patterns, a HEAD request, then the first
+    kilobyte of the body. Anything still unclear is treated as HTML so the
+    browser handles it as before.
+    """
+    kind = classify_url(url)
+    if kind:
+        return {"kind": kind, "method": "url"}
+
+    response = fetch_url(url, method="HEAD", timeout=timeout)
+    content_type = response["headers"].get("content-type", "")
+    kind = classify_content_type(content_type) if not response.get("error") else None
+    if kind:
+        return {"kind": kind, "method": "head", "content_type": content_type,
+                "content_length": response["headers"].get("content-length"),
+                "http_validators": validators_from(response)}
+
+    # Some servers reject HEAD or send no or a generic Content-Type; look at the first bytes instead
+    response = fetch_url(url, headers={"Range": f"bytes=0-{SNIFF_BYTES - 1}"}, timeout=timeout, max_bytes=SNIFF_BYTES)
+    content_type = response["headers"].get("content-type", "")
+    kind = None
+    if not response.get("error"):
+        kind = sniff_kind(response["body"]) or classify_content_type(content_type)
+        if kind is None and content_type.split(";")[0].strip().lower() in GENERIC_CONTENT_TYPES:
+            kind = MEDIA
+    return {"kind": kind or HTML, "method": "sniff" if kind else "default", "content_type": content_type,
+            "http_validators": validators_from(response) if not response.get("error") else {}}
+
+
+def text_content(text: str, url: str, title: str = "") -> Dict[str, Any]:
+    """Builds the extract_page_content structure from plain document text."""
+    blocks = [clean_text(block) for block in re.split(r"\n\s*\n", text)]
+    paragraphs = [{"index": i + 1, "text": block} for i, block in enumerate(b for b in blocks if b)]
+    return {
+        "title": title,
+        "url": url,
+        "extracted_at": datetime.now().isoformat(),
+        "main_content": "\n\n".join(p["text"] for p in paragraphs)[:MAX_TEXT_LENGTH],
+        "meta_description": "",
+        "headings": [],
+        "paragraphs": paragraphs,
+        "lists": [],
+        "sections": [],
+    }
+
+
+def fetch_pdf_tail(url: str, destination, timeout: float = 20, tail_bytes: int = PDF_TAIL_BYTES) -> int:
+    """Writes the last tail_bytes of a file at their offset in destination with a Range request.
+
+    Returns the number of bytes written; 0 when the server ignored the range.
+    """
+    tail = io.BytesIO()
+    response = download(url, tail, headers={"Range": f"bytes=-{tail_bytes}"}, timeout=timeout, max_bytes=tail_bytes)
+    match = re.match(r"bytes (\d+)-\d+/\d+", response["headers"].get("content-range", ""))
+    if response.get("error") or response["status"] != 206 or not match:
+        return 0
+    destination.seek(int(match.group(1)))
+    destination.write(tail.getvalue())
+    return response["bytes"]
+
+
+def extract_pdf(url: str, max_pages: int = PDF_MAX_PAGES, max_bytes: int = PDF_MAX_BYTES,
+                tail_bytes: int = PDF_TAIL_BYTES, timeout: float = 20, should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+    """Downloads a PDF in chunks and extracts the text of its first max_pages pages.
+
+    The download is spooled to disk past a few MB, and pages are parsed one
+    at a time, so memory stays flat for large reports. Only the first
+    max_bytes are downloaded. PDFs keep their cross-reference table at the
+    end, so for a larger file the last tail_bytes are fetched with a
+    Range request and placed at their offset, leaving a hole in between;
+    pages stored within the downloaded start are read and extraction stops
+    at the first page that falls into the hole. Servers that ignore Range
+    requests leave large files unreadable.
+    """
+    if pypdf is None:
+        return {"error": "PDF extraction needs the 'pypdf' package"}
+
+    with tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024) as spool:
+        # The body hash lets a refresh tell whether the file changed without parsing it again
+        body = HashingWriter(spool)
+        response = download(url, body, timeout=timeout, max_bytes=max_bytes, should_stop=should_stop)
+        if response.get("error"):
+            return {"error": f"Error downloading PDF: {response['error']}"}
+        tail_downloaded = 0
+        if response["truncated"] and not (should_stop and should_stop()):
+            # On disk the skipped middle stays a sparse hole instead of zeros in memory
+            spool.rollover()
+            tail_downloaded = fetch_pdf_tail(url, spool, timeout=timeout, tail_bytes=tail_bytes)
+        spool.seek(0)
+        try:
+            reader = pypdf.PdfReader(spool)
+            page_count = len(reader.pages)
+        except Exception as e:
+            if response["truncated"]:
+                return {"error": f"PDF larger than {max_bytes // (1024 * 1024)} MB could not be read: {str(e)}"}
+            return {"error": f"Error reading PDF: {str(e)}"}
+        texts = []
+        for index in range(min(page_count, max_pages)):
+            if should_stop and should_stop():
+                break
+            try:
+                texts.append(reader.pages[index].extract_text() or "")
+            except Exception as e:
+                if not response["truncated"]:
+                    return {"error": f"Error reading PDF: {str(e)}"}
+                # The rest of the pages lie beyond the downloaded part
+                break
+        try:
+            metadata_title = reader.metadata.title if reader.metadata else None
+        except Exception:
+            metadata_title = None
+
+    title = str(metadata_title or os.path.basename(urllib.parse.urlsplit(url).path))
+    content = text_content("\n\n".join(texts), url, title)
+    content["document"] = {
+        "type": PDF,
+        "page_count": page_count,
+        "pages_extracted": len(texts),
+        "bytes_downloaded": response["bytes"] + tail_downloaded,
+        "truncated": response["truncated"],
+        "sha256": body.hexdigest(),
+    }
+    return content
+
+
+def extract_text_document(url: str, timeout: float = 10) -> Dict[str, Any]:
+    """Fetches a plain text or CSV document."""
+    response = fetch_url(url, timeout=timeout)
+    if response.get("error"):
+        return {"error": f"Error downloading document: {response['error']}"}
+    content = text_content(decode_body(response), url, os.path.basename(urllib.parse.urlsplit(url).path))
+    content["document"] = {"type": TEXT, "bytes_downloaded": len(response["body"]),
+                           "sha256": hashlib.sha256(response["body"]).hexdigest()}
+    return content
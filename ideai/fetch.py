@@ -0,0 +1,117 @@
+import hashlib
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, Any, Optional
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+MAX_FETCH_BYTES = 5 * 1024 * 1024
+
+
+def fetch_url(url: str, headers: Optional[Dict[str, str]] = None, method: str = "GET",
+              timeout: float = 10, max_bytes: int = MAX_FETCH_BYTES) -> Dict[str, Any]:
+    """Fetches a URL without the browser.
+
+    Returns a dict with status, final url, lowercased headers and body bytes
+    (at most max_bytes). Network failures are reported in an "error" key
+    instead of raising, like the browser tools do.
+    """
+    request_headers = {"User-Agent": USER_AGENT, "Accept-Language": "en"}
+    request_headers.update(headers or {})
+    request = urllib.request.Request(url, headers=request_headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read(max_bytes) if method != "HEAD" else b""
+            return {
+                "status": response.status,
+                "url": response.geturl(),
+                "headers": {key.lower(): value for key, value in response.headers.items()},
+                "body": body,
+            }
+    except urllib.error.HTTPError as e:
+        # 304 Not Modified and error pages still carry useful status and headers
+        return {
+            "status": e.code,
+            "url": url,
+            "headers": {key.lower(): value for key, value in (e.headers or {}).items()},
+            "body": b"",
+            "error": None if e.code == 304 else f"HTTP {e.code}",
+        }
+    except Exception as e:
+        return {"status": None, "url": url, "headers": {}, "body": b"", "error": str(e)}
+
+
+def download(url: str, destination, headers: Optional[Dict[str, str]] = None, timeout: float = 10,
+             max_bytes: int = MAX_FETCH_BYTES, chunk_size: int = 64 * 1024,
+             should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+    """Streams a URL into a writable file object in chunks.
+
+    Stops after max_bytes or once should_stop returns True, and reports
+    whether the body was cut short. Errors are reported like fetch_url does.
+    """
+    request_headers = {"User-Agent": USER_AGENT, "Accept-Language": "en"}
+    request_headers.update(headers or {})
+    request = urllib.request.Request(url, headers=request_headers)
+    written = 0
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result = {
+                "status": response.status,
+                "url": response.geturl(),
+                "headers": {key.lower(): value for key, value in response.headers.items()},
+                "bytes": 0,
+                "truncated": False,
+            }
+            while True:
+                if written >= max_bytes or (should_stop and should_stop()):
+                    result["truncated"] = True
+                    break
+                chunk = response.read(min(chunk_size, max_bytes - written))
+                if not chunk:
+                    break
+                destination.write(chunk)
+                written += len(chunk)
+            result["bytes"] = written
+            return result
+    except urllib.error.HTTPError as e:
+        return {"status": e.code, "url": url, "headers": {}, "bytes": written, "truncated": False, "error": f"HTTP {e.code}"}
+    except Exception as e:
+        return {"status": None, "url": url, "headers": {}, "bytes": written, "truncated": False, "error": str(e)}
+
+
+class HashingWriter:
+    """Writable that hashes everything written through it, optionally passing it on to a file."""
+
+    def __init__(self, destination=None):
+        self.destination = destination
+        self.digest = hashlib.sha256()
+
+    def write(self, chunk: bytes):
+        self.digest.update(chunk)
+        if self.destination is not None:
+            self.destination.write(chunk)
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+def validators_from(response: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Picks the cache validators out of a response, keeping old ones a 304 didn't repeat."""
+    validators = dict(previous or {})
+    headers = response.get("headers", {})
+    if headers.get("etag"):
+        validators["etag"] = headers["etag"]
+    if headers.get("last-modified"):
+        validators["last_modified"] = headers["last-modified"]
+    return validators
+
+
+def decode_body(response: Dict[str, Any]) -> str:
+    """Decodes a fetched body using the charset from its Content-Type header."""
+    content_type = response.get("headers", {}).get("content-type", "")
+    charset = "utf-8"
+    if "charset=" in content_type:
+        charset = content_type.split("charset=")[-1].split(";")[0].strip() or charset
+    try:
+        return response.get("body", b"").decode(charset, errors="replace")
+    except LookupError:
+        return response.get("body", b"").decode("utf-8", errors="replace")
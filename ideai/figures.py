@@ -0,0 +1,233 @@
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from .links import site_key
+from .saturation import FIGURE_PATTERN, page_text
+
+# NumPy is optional; without it runs simply skip the figure aggregation stage
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+VALUE_PATTERN = re.compile(
+    r"(?P<currency>[$€£₹]|inr|usd|rs\.?)?\s?(?P<number>\d[\d,]*(?:\.\d+)?)\s?"
+    r"(?P<scale>k|mn|m|bn|million|billion|crore|cr|lakh|%|percent)?",
+    re.IGNORECASE
+)
+YEAR_PATTERN = re.compile(r"\b(?:19[89]\d|20\d\d)\b")
+
+# Approximate conversion to USD; figures are only compared within an order of magnitude
+USD_RATES = {"$": 1.0, "usd": 1.0, "€": 1.08, "£": 1.27, "₹": 0.012, "inr": 0.012, "rs": 0.012, "rs.": 0.012}
+SCALES = {
+    "k": 1e3, "m": 1e6, "mn": 1e6, "million": 1e6, "bn": 1e9, "billion": 1e9,
+    "lakh": 1e5, "crore": 1e7, "cr": 1e7,
+}
+
+# Metrics the report asks for, with the words that announce them and the units they come in
+METRIC_TERMS = {
+    "market_size": (("market size", "market", "industry", "valued", "worth"), ("USD",)),
+    "growth_rate": (("growth", "grow", "cagr", "increase", "annually", "year-over-year"), ("%",)),
+    "pricing": (("price", "pricing", "cost", "fee", "per month", "/month", "subscription", "plan", "charge", "rent"), ("USD",)),
+    "revenue": (("revenue", "sales", "turnover", "earn", "income"), ("USD",)),
+    "margin": (("margin", "markup", "profitability", "profit"), ("%", "USD")),
+    "break_even": (("break-even", "break even", "payback", "roi", "return on investment"), ("%", "USD")),
+}
+METRIC_PATTERNS = {
+    metric: (re.compile("|".join(re.escape(term) for term in terms)), units)
+    for metric, (terms, units) in METRIC_TERMS.items()
+}
+CONTEXT_BEFORE = 80
+CONTEXT_AFTER = 30
+RECENCY_HALF_LIFE = 2.0  # Years after which a figure counts half as much
+UNDATED_AGE = 3.0        # Age assumed for figures with no year nearby
+
+
+def parse_figure(raw: str) -> Optional[Dict[str, Any]]:
+    """Parses a matched figure into a USD amount or a percentage."""
+    match = VALUE_PATTERN.search(raw)
+    if not match:
+        return None
+    value = float(match.group("number").replace(",", ""))
+    scale = (match.group("scale") or "").lower()
+    currency = (match.group("currency") or "").lower()
+    if scale in ("%", "percent"):
+        return {"unit": "%", "value": value}
+    value *= SCALES.get(scale, 1.0)
+    if currency:
+        return {"unit": "USD", "value": value * USD_RATES[currency]}
+    # Bare "5 million" could be users, units or money; without a currency it isn't comparable
+    return None
+
+
+def classify_metric(context: str, offset: int, unit: str) -> Optional[str]:
+    """Picks the metric whose keyword appears closest to a figure in its context."""
+    best_metric, best_distance = None, None
+    for metric, (pattern, units) in METRIC_PATTERNS.items():
+        if unit not in units:
+            continue
+        for match in pattern.finditer(context):
+            distance = offset - match.end() if match.end() <= offset else match.start() - offset
+            if best_distance is None or distance < best_distance:
+                best_metric, best_distance = metric, distance
+    return best_metric
+
+
+def extract_figures(page: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Extracts the market figures of a page with their metric, normalized value and year."""
+    text = page_text(page)
+    domain = site_key(page.get("url") or "")
+    lowered = text.lower()
+    this_year = datetime.now().year
+    figures = []
+    seen = set()
+    for match in FIGURE_PATTERN.finditer(text):
+        parsed = parse_figure(match.group(0))
+        if parsed is None:
+            continue
+        start = max(0, match.start() - CONTEXT_BEFORE)
+        context = lowered[start:match.end() + CONTEXT_AFTER]
+        metric = classify_metric(context, match.start() - start, parsed["unit"])
+        if metric is None:
+            continue
+        # A site repeating the same number shouldn't outvote the others
+        key = (metric, parsed["unit"], round(parsed["value"], 6))
+        if key in seen:
+            continue
+        seen.add(key)
+        # Forecast years ("by 2030") say nothing about when the figure was published
+        years = [int(year) for year in YEAR_PATTERN.findall(context) if int(year) <= this_year]
+        figures.append({
+            "metric": metric,
+            "unit": parsed["unit"],
+            "value": parsed["value"],
+            "year": max(years) if years else None,
+            "domain": domain,
+            "raw": " ".join(match.group(0).split()),
+        })
+    return figures
+
+
+def _round(value: float) -> float:
+    return float(f"{value:.4g}")
+
+
+def aggregate_figures(figures: List[Dict[str, Any]], current_year: Optional[int] = None,
+                      half_life: float = RECENCY_HALF_LIFE) -> List[Dict[str, Any]]:
+    """Computes per-metric statistics over figures from all pages of a run.
+
+    All figures are sorted once by (metric, value) into flat arrays; each
+    metric is then a contiguous slice, so quartiles, IQR outlier flags and
+    the recency-weighted median are plain vectorized operations on it.
+    """
+    if np is None:
+        raise RuntimeError("Figure aggregation needs the 'numpy' package")
+    if not figures:
+        return []
+    current_year = current_year or datetime.now().year
+
+    keys = sorted({(figure["metric"], figure["unit"]) for figure in figures})
+    key_ids = {key: i for i, key in enumerate(keys)}
+    domains = sorted({figure["domain"] for figure in figures})
+    domain_ids = {domain: i for i, domain in enumerate(domains)}
+
+    groups = np.array([key_ids[(figure["metric"], figure["unit"])] for figure in figures])
+    values = np.array([figure["value"] for figure in figures], dtype=float)
+    years = np.array([figure["year"] or np.nan for figure in figures], dtype=float)
+    sources = np.array([domain_ids[figure["domain"]] for figure in figures])
+
+    ages = np.where(np.isnan(years), UNDATED_AGE, np.clip(current_year - years, 0, None))
+    weights = 0.5 ** (ages / half_life)
+
+    order = np.lexsort((values, groups))
+    groups, values, weights, sources = groups[order], values[order], weights[order], sources[order]
+    bounds = np.flatnonzero(np.diff(groups)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(values)]))
+
+    summaries = []
+    for start, end in zip(starts, ends):
+        metric, unit = keys[groups[start]]
+        group_values = values[start:end]
+        group_weights = weights[start:end]
+        q1, median, q3 = np.percentile(group_values, [25, 50, 75])
+        iqr = q3 - q1
+        outliers = (group_values < q1 - 1.5 * iqr) | (group_values > q3 + 1.5 * iqr)
+        inliers = group_values[~outliers]
+        inlier_weights = group_weights[~outliers]
+        # Values are sorted, so the weighted median is where half the weight is reached
+        cumulative = np.cumsum(inlier_weights)
+        weighted_median = inliers[np.searchsorted(cumulative, cumulative[-1] / 2)]
+        summaries.append({
+            "metric": metric,
+            "unit": unit,
+            "count": int(end - start),
+            "sources": int(len(np.unique(sources[start:end]))),
+            "median": _round(median),
+            "weighted_median": _round(weighted_median),
+            "q1": _round(q1),
+            "q3": _round(q3),
+            "iqr": _round(iqr),
+            "min": _round(inliers.min()),
+            "max": _round(inliers.max()),
+            "outliers": int(outliers.sum()),
+            "outlier_values": [_round(value) for value in group_values[outliers][:3]],
+        })
+    return summaries
+
+
+def human_number(value: float, unit: str) -> str:
+    """Formats a statistic compactly, e.g. $1.2M or 14.5%."""
+    if unit == "%":
+        return f"{value:g}%"
+    for threshold, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= threshold:
+            return f"${value / threshold:.3g}{suffix}"
+    return f"${value:.3g}"
+
+
+def format_figure_table(summaries: List[Dict[str, Any]]) -> str:
+    """Renders metric statistics as a compact text table for the analysis prompt; empty without statistics."""
+    if not summaries:
+        return ""
+    lines = ["metric | n (sites) | median | IQR | recency-weighted median | outliers"]
+    for row in summaries:
+        fmt = lambda value: human_number(value, row["unit"])
+        lines.append(
+            f"{row['metric']} | {row['count']} ({row['sources']}) | {fmt(row['median'])} | "
+            f"{fmt(row['q1'])}-{fmt(row['q3'])} | {fmt(row['weighted_median'])} | {row['outliers']}"
+        )
+    return "\n".join(lines)
+
+
+def summarize_figures(pages: List[Dict[str, Any]], current_year: Optional[int] = None) -> Dict[str, Any]:
+    """Extracts and aggregates the market figures of a research run.
+
+    Returns the per-metric statistics, a compact text table and timing.
+    """
+    start = time.time()
+    figures = []
+    for page in pages:
+        if page.get("status") == "failed":
+            continue
+        figures.extend(extract_figures(page))
+    metrics = aggregate_figures(figures, current_year=current_year)
+    return {
+        "figures": len(figures),
+        "metrics": metrics,
+        "table": format_figure_table(metrics),
+        "elapsed_seconds": round(time.time() - start, 3),
+    }
+
+
+if __name__ == "__main__":
+    from .storage import load_dataset
+
+    # Usage: python -m ideai.figures business_niche_data_<timestamp>.json
+    summary = summarize_figures(load_dataset(sys.argv[1]))
+    print(summary["table"])
+    print(json.dumps(summary["metrics"], indent=2))
@@ -0,0 +1,228 @@
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Dict, Any, Optional
+
+from .links import site_key
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Page titles/text of bot walls and access errors; such sites won't serve us on a retry either
+BLOCKED_MARKERS = (
+    "access denied", "403 forbidden", "attention required", "just a moment", "verify you are human",
+    "unusual traffic", "are you a robot", "request blocked", "too many requests",
+    "complete the captcha", "solve the captcha", "checking your browser", "complete the security check",
+)
+BLOCKED_STATUSES = (401, 403, 407, 429)
+# Interstitials are short; longer pages merely mentioning a marker in their text are real content
+BLOCK_PAGE_MAX_CHARS = 3000
+
+# Reads the visible text and HTTP status of the loaded page in one browser round trip
+PAGE_STATUS_SCRIPT = """
+var entry = performance.getEntriesByType("navigation")[0];
+return {
+    text: document.body ? document.body.innerText.slice(0, 4000) : "",
+    status: entry && entry.responseStatus ? entry.responseStatus : null
+};
+"""
+
+
+def is_blocked_page(title: str, text: str = "", status: Optional[int] = None) -> Optional[str]:
+    """Returns the marker (or HTTP status) that identifies a page as a block or bot wall, if any."""
+    if status in BLOCKED_STATUSES:
+        return f"HTTP {status}"
+    if len(text) > BLOCK_PAGE_MAX_CHARS:
+        text = ""
+    haystack = f"{title}\n{text}".lower()
+    for marker in BLOCKED_MARKERS:
+        if marker in haystack:
+            return marker
+    return None
+
+
+class DomainHealth:
+    """Load times and circuit state of one domain."""
+
+    def __init__(self, window: int):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.opened = 0
+        self.successes = 0
+        self.failures: Dict[str, int] = {}
+        self.load_times = deque(maxlen=window)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": dict(self.failures),
+            "times_opened": self.opened,
+            "median_load_seconds": round(sorted(self.load_times)[len(self.load_times) // 2], 2) if self.load_times else None,
+        }
+
+
+class HealthTracker:
+    """Per-domain circuit breaker for page navigation.
+
+    A domain's circuit opens after failure_threshold consecutive failures
+    (immediately when the site blocks us) and navigation to it fails fast
+    until open_seconds have passed. Then a single trial request is let
+    through (half-open): success closes the circuit, failure re-opens it for
+    twice as long. Load times feed the p90 used to decide when to hedge.
+    """
+
+    def __init__(self, failure_threshold: int = 3, open_seconds: float = 300, base_backoff: float = 1.0,
+                 max_backoff: float = 30, window: int = 50, min_samples: int = 5):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.window = window
+        self.min_samples = min_samples
+        self.domains: Dict[str, DomainHealth] = {}
+        self.load_times = deque(maxlen=window * 4)
+        self.quick_fails = 0
+        self.lock = threading.Lock()
+
+    def _domain(self, url: str) -> DomainHealth:
+        domain = site_key(url)
+        if domain not in self.domains:
+            self.domains[domain] = DomainHealth(self.window)
+        return self.domains[domain]
+
+    def allow(self, url: str) -> bool:
+        """Checks whether a navigation to url may go ahead; counts a quick-fail when not."""
+        with self.lock:
+            health = self._domain(url)
+            if health.state == OPEN:
+                if time.time() < health.open_until:
+                    self.quick_fails += 1
+                    return False
+                health.state = HALF_OPEN
+            return True
+
+    def record_success(self, url: str, seconds: float):
+        with self.lock:
+            health = self._domain(url)
+            health.state = CLOSED
+            health.consecutive_failures = 0
+            health.successes += 1
+            health.load_times.append(seconds)
+            self.load_times.append(seconds)
+
+    def record_failure(self, url: str, kind: str = "error"):
+        """Records a failed navigation; kind is "timeout", "error" or "blocked"."""
+        with self.lock:
+            health = self._domain(url)
+            health.consecutive_failures += 1
+            health.failures[kind] = health.failures.get(kind, 0) + 1
+            if health.state == HALF_OPEN:
+                self._open(health, self.open_seconds * 2)
+            elif kind == "blocked" or health.consecutive_failures >= self.failure_threshold:
+                self._open(health, self.open_seconds)
+
+    def _open(self, health: DomainHealth, seconds: float):
+        health.state = OPEN
+        health.open_until = time.time() + seconds
+        health.opened += 1
+
+    def state(self, url: str) -> str:
+        with self.lock:
+            return self._domain(url).state
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    def p90(self, url: str) -> Optional[float]:
+        """90th percentile load time of the domain, or of all domains while it has few samples."""
+        with self.lock:
+            samples = list(self._domain(url).load_times)
+            if len(samples) < self.min_samples:
+                samples = list(self.load_times)
+        if len(samples) < self.min_samples:
+            return None
+        samples.sort()
+        return samples[min(len(samples) - 1, int(0.9 * len(samples)))]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns circuit states and failure counts per domain for monitoring."""
+        with self.lock:
+            return {
+                "quick_fails": self.quick_fails,
+                "open_domains": sorted(domain for domain, health in self.domains.items() if health.state == OPEN),
+                "domains": {domain: health.summary() for domain, health in self.domains.items()},
+            }
+
+
+def benchmark_tail_latency(urls: List[str], load: Callable[[str, float], Dict[str, Any]],
+                           timeout: float = 2.0, max_retries: int = 3) -> Dict[str, Any]:
+    """Compares immediate retries against the circuit breaker over the same URL list.
+
+    load(url, timeout) returns a fetch_url-style response. Returns per-URL
+    latency percentiles and the total time of both strategies.
+    """
+    def naive(url):
+        for attempt in range(max_retries):
+            response = load(url, timeout)
+            if not response.get("error"):
+                return True
+        return False
+
+    tracker = HealthTracker(base_backoff=0.1, max_backoff=1.0)
+
+    def with_breaker(url):
+        for attempt in range(max_retries):
+            if not tracker.allow(url):
+                return False
+            start = time.time()
+            response = load(url, timeout)
+            if not response.get("error"):
+                tracker.record_success(url, time.time() - start)
+                return True
+            kind = "blocked" if response.get("status") in (403, 429) else "timeout" if response.get("status") is None else "error"
+            tracker.record_failure(url, kind)
+            if kind == "blocked":
+                return False
+            time.sleep(tracker.backoff(attempt))
+        return False
+
+    results = {}
+    for name, navigate in (("immediate_retries", naive), ("circuit_breaker", with_breaker)):
+        latencies = []
+        start = time.time()
+        for url in urls:
+            url_start = time.time()
+            navigate(url)
+            latencies.append(time.time() - url_start)
+        latencies.sort()
+        results[name] = {
+            "total_seconds": round(time.time() - start, 2),
+            "p50": round(latencies[len(latencies) // 2], 2),
+            "p95": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2),
+            "max": round(latencies[-1], 2),
+        }
+    results["breaker_stats"] = tracker.stats()
+    return results
+
+
+if __name__ == "__main__":
+    from .fetch import fetch_url
+
+    # Usage: python -m ideai.health <base_url> [<base_url> ...] [--pages N]
+    # Point it at healthy, slow and blocking hosts, e.g. the ones served by tests/fixtures.py
+    args = sys.argv[1:]
+    pages = 10
+    if "--pages" in args:
+        index = args.index("--pages")
+        pages = int(args[index + 1])
+        del args[index:index + 2]
+    urls = [f"{base_url.rstrip('/')}/site/{i}" for i in range(pages) for base_url in args]
+    report = benchmark_tail_latency(urls, lambda url, timeout: fetch_url(url, timeout=timeout))
+    print(json.dumps(report, indent=2))
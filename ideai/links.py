@@ -0,0 +1,145 @@
+import urllib.parse
+from typing import List, Dict, Any, Optional
+
+# Query parameters that never change the page a link points to
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref_src")
+
+# Harvests every link on the page in a single round trip.
+# The index is tagged with a token stored on `window`; a navigation wipes the
+# token and a MutationObserver marks it dirty when the DOM changes, so the
+# script only re-harvests when the previous result can no longer be trusted.
+LINK_INDEX_SCRIPT = """
+var known = arguments[0];
+if (known && window.__ideaiLinkToken === known && !window.__ideaiLinkDirty) {
+    return {token: known, links: null};
+}
+var anchors = document.querySelectorAll('a[href]');
+var links = [];
+for (var i = 0; i < anchors.length; i++) {
+    var a = anchors[i];
+    a.setAttribute('data-ideai-link', i);
+    var rect = a.getBoundingClientRect();
+    var style = window.getComputedStyle(a);
+    var heading = a.querySelector('h3');
+    if (!heading && a.parentNode && a.parentNode.querySelector) {
+        heading = a.parentNode.querySelector('h3');
+    }
+    links.push({
+        index: i,
+        href: a.href,
+        text: (a.innerText || a.textContent || '').trim().slice(0, 300),
+        rel: a.getAttribute('rel') || '',
+        heading: heading ? (heading.innerText || '').trim() : '',
+        visible: rect.width > 0 && rect.height > 0 &&
+                 style.visibility !== 'hidden' && style.display !== 'none'
+    });
+}
+window.__ideaiLinkToken = String(Date.now()) + '-' + Math.random();
+window.__ideaiLinkDirty = false;
+if (!window.__ideaiLinkObserver) {
+    window.__ideaiLinkObserver = new MutationObserver(function() {
+        window.__ideaiLinkDirty = true;
+    });
+    window.__ideaiLinkObserver.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true, attributeFilter: ['href']
+    });
+}
+return {token: window.__ideaiLinkToken, links: links};
+"""
+
+
+def canonicalize_url(url: str, base_url: Optional[str] = None) -> str:
+    """Normalizes a URL so that equivalent links compare equal.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, sorts the query string and strips trailing slashes.
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if base_url:
+        url = urllib.parse.urljoin(base_url, url)
+
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    netloc = host
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        netloc = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    query_pairs = [
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ]
+    query = urllib.parse.urlencode(sorted(query_pairs))
+
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, ""))
+
+
+def site_key(url: str) -> str:
+    """Returns the host of a URL without a leading 'www.'."""
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_internal_link(href: str, page_url: str) -> bool:
+    """Checks whether a link stays on the same site as the page it was found on."""
+    link_host = site_key(href)
+    page_host = site_key(page_url)
+    if not link_host or not page_host:
+        return False
+    return (
+        link_host == page_host
+        or link_host.endswith("." + page_host)
+        or page_host.endswith("." + link_host)
+    )
+
+
+def build_link_records(raw_links: List[Dict[str, Any]], page_url: str) -> List[Dict[str, Any]]:
+    """Turns the raw links returned by LINK_INDEX_SCRIPT into index records."""
+    records = []
+    for link in raw_links or []:
+        raw_href = link.get("href") or ""
+        if not raw_href.startswith(("http://", "https://")):
+            continue
+        href = canonicalize_url(raw_href, page_url)
+        records.append({
+            "index": link.get("index"),
+            "href": href,
+            "raw_href": raw_href,
+            "text": link.get("text", ""),
+            "heading": link.get("heading", ""),
+            "rel": link.get("rel", ""),
+            "internal": is_internal_link(href, page_url),
+            "visible": bool(link.get("visible")),
+        })
+    return records
+
+
+def filter_links(links: List[Dict[str, Any]], scope: str = "all", visible_only: bool = False,
+                 pattern: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Filters index records by scope (all/internal/external), visibility and URL pattern."""
+    scope = scope.lower()
+    pattern = pattern.lower() if pattern else None
+    matches = []
+    for link in links:
+        if scope == "internal" and not link["internal"]:
+            continue
+        if scope == "external" and link["internal"]:
+            continue
+        if visible_only and not link["visible"]:
+            continue
+        if pattern and pattern not in link["raw_href"].lower() and pattern not in link["href"]:
+            continue
+        matches.append(link)
+    return matches
@@ -0,0 +1,188 @@
+import argparse
+import contextvars
+import importlib
+import json
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from .memprofile import python_rss, chrome_processes, psutil, MB
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return round(ordered[rank], 3)
+
+
+def is_error(result: Any) -> bool:
+    """Checks whether a tool result reports a failure."""
+    if isinstance(result, dict):
+        return result.get("status") in ("error", "failed")
+    text = str(result)
+    return text.startswith(("Error", "Failed", "Timeout", "Too many")) or '"error"' in text[:200]
+
+
+class LoadTest:
+    """Drives K simulated users through the agent's research tool sequence.
+
+    Every user gets its own session ID, so the run exercises the same
+    per-session browser isolation and admission control as real ADK traffic.
+    """
+
+    def __init__(self, sites_per_user: int = 3, model_latency: float = 0.5):
+        self.tools = importlib.import_module(".agent", __package__)
+        self.sites_per_user = sites_per_user
+        self.model_latency = model_latency
+        self.lock = threading.Lock()
+        self.calls: List[Dict[str, Any]] = []
+
+    def timed_call(self, tool_name: str, *args) -> Any:
+        start = time.perf_counter()
+        try:
+            result = getattr(self.tools, tool_name)(*args)
+            failed = is_error(result)
+        except Exception as e:
+            result, failed = str(e), True
+        with self.lock:
+            self.calls.append({
+                "tool": tool_name,
+                "seconds": time.perf_counter() - start,
+                "error": failed,
+            })
+        return result
+
+    def simulate_user(self, user_id: int) -> bool:
+        """Runs one user's research session end to end and returns whether it completed."""
+        self.tools.current_session_id.set(f"loadtest-{user_id}")
+        try:
+            if is_error(self.timed_call("search_google", f"fixture niche {user_id}")):
+                return False
+            results = json.loads(self.timed_call("extract_google_search_results"))
+            urls = [result["url"] for result in results if "url" in result]
+            if not urls:
+                return False
+            collected = []
+            for i in range(self.sites_per_user):
+                collected.append(self.timed_call("extract_website_data", urls[(user_id + i) % len(urls)]))
+            prompt = self.timed_call("analyze_business_data", collected)
+
+            # The model call itself is simulated so the run measures the tools, not the LLM
+            start = time.perf_counter()
+            time.sleep(self.model_latency)
+            with self.lock:
+                self.calls.append({"tool": "model", "seconds": time.perf_counter() - start, "error": False})
+            return True
+        finally:
+            self.tools.session_manager.close(f"loadtest-{user_id}")
+
+    def run_level(self, users: int) -> Dict[str, Any]:
+        """Runs `users` concurrent sessions and summarizes latency, errors and host usage."""
+        self.calls = []
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            # Each thread needs a fresh context so session IDs don't leak between users
+            futures = [executor.submit(contextvars.Context().run, self.simulate_user, i) for i in range(users)]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception:
+                    outcomes.append(False)
+        elapsed = time.perf_counter() - start
+
+        per_tool = {}
+        for tool in sorted({call["tool"] for call in self.calls}):
+            latencies = [call["seconds"] for call in self.calls if call["tool"] == tool]
+            errors = sum(1 for call in self.calls if call["tool"] == tool and call["error"])
+            per_tool[tool] = {
+                "calls": len(latencies),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "error_rate": round(errors / len(latencies), 3),
+            }
+        all_latencies = [call["seconds"] for call in self.calls if call["tool"] != "model"]
+        chrome = chrome_processes()
+        return {
+            "users": users,
+            "elapsed_seconds": round(elapsed, 2),
+            "sessions_completed": sum(1 for outcome in outcomes if outcome),
+            "sessions_per_minute": round(sum(1 for outcome in outcomes if outcome) / elapsed * 60, 2),
+            "tool_calls_per_second": round(len(all_latencies) / elapsed, 2),
+            "error_rate": round(sum(1 for call in self.calls if call["error"]) / len(self.calls), 3) if self.calls else 1.0,
+            "p50": percentile(all_latencies, 50),
+            "p95": percentile(all_latencies, 95),
+            "p99": percentile(all_latencies, 99),
+            "tools": per_tool,
+            "host": {
+                "cpu_percent": psutil.cpu_percent(interval=None) if psutil is not None else None,
+                "python_rss_mb": round(python_rss() / MB, 1),
+                "chrome_rss_mb": round(sum(process["rss"] for process in chrome) / MB, 1),
+                "chrome_processes": len(chrome),
+            },
+        }
+
+    def ramp(self, levels: List[int]) -> List[Dict[str, Any]]:
+        """Runs each concurrency level in turn."""
+        results = []
+        for users in levels:
+            print(f"🏋️ Load test with {users} concurrent users")
+            results.append(self.run_level(users))
+        return results
+
+
+def check_gates(results: List[Dict[str, Any]], max_p95: Optional[float] = None,
+                max_error_rate: Optional[float] = None) -> List[str]:
+    """Returns a description of every level that breaks a capacity gate."""
+    failures = []
+    for level in results:
+        if max_p95 is not None and level["p95"] is not None and level["p95"] > max_p95:
+            failures.append(f"{level['users']} users: p95 {level['p95']}s > {max_p95}s")
+        if max_error_rate is not None and level["error_rate"] > max_error_rate:
+            failures.append(f"{level['users']} users: error rate {level['error_rate']} > {max_error_rate}")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent research session load test against a search fixture site")
+    parser.add_argument("--search-url", required=True,
+                        help="Search URL template with a {query} placeholder, e.g. the one printed by tests/fixtures.py")
+    parser.add_argument("--ramp", default="1,2,4", help="Comma separated concurrent user counts")
+    parser.add_argument("--sites", type=int, default=3, help="Websites each user extracts")
+    parser.add_argument("--model-latency", type=float, default=0.5, help="Seconds each simulated model call takes")
+    parser.add_argument("--max-sessions", type=int, help="Override the concurrent session cap")
+    parser.add_argument("--output", default="loadtest_results.json")
+    parser.add_argument("--max-p95", type=float, help="Fail if any level's p95 tool latency exceeds this")
+    parser.add_argument("--max-error-rate", type=float, help="Fail if any level's error rate exceeds this")
+    args = parser.parse_args(argv)
+
+    load_test = LoadTest(sites_per_user=args.sites, model_latency=args.model_latency)
+    load_test.tools.SEARCH_URL = args.search_url
+    if args.max_sessions:
+        load_test.tools.session_manager.max_sessions = args.max_sessions
+
+    try:
+        results = load_test.ramp([int(level) for level in args.ramp.split(",")])
+    finally:
+        load_test.tools.session_manager.shutdown()
+
+    failures = check_gates(results, args.max_p95, args.max_error_rate)
+    with open(args.output, "w") as f:
+        json.dump({"levels": results, "gate_failures": failures}, f, indent=2)
+    print(f"📊 Load test results saved to {args.output}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import List, Dict, Any, Optional
+
+# psutil is optional; without it only the Python process can be sampled
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+CHROME_PROCESS_NAMES = ("chrome", "chromium", "chromedriver", "google chrome")
+MB = 1024 * 1024
+
+
+def python_rss() -> int:
+    """Returns the resident set size of this Python process in bytes."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def chrome_processes() -> List[Dict[str, Any]]:
+    """Lists the Chrome and chromedriver processes started by this process with their RSS."""
+    if psutil is None:
+        return []
+    processes = []
+    for child in psutil.Process().children(recursive=True):
+        try:
+            name = child.name()
+            if any(chrome_name in name.lower() for chrome_name in CHROME_PROCESS_NAMES):
+                processes.append({"pid": child.pid, "name": name, "rss": child.memory_info().rss})
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return processes
+
+
+# tracemalloc is process-wide; profilers of concurrent runs share it and the last one stops it
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def acquire_tracing():
+    """Starts tracemalloc unless it is already running and registers one more user."""
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def release_tracing():
+    """Unregisters a user and stops tracemalloc once the last user is done, if we started it."""
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users = max(0, _tracing_users - 1)
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+def take_snapshot() -> Optional[tracemalloc.Snapshot]:
+    """Takes a tracemalloc snapshot, or returns None when tracing was stopped elsewhere."""
+    try:
+        return tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+    except RuntimeError:
+        return None
+
+
+class MemoryProfiler:
+    """Opt-in memory timeline for a research run.
+
+    sample() records the RSS of Python and every Chrome child process, while
+    start_stage()/end_stage() take tracemalloc snapshots at stage boundaries
+    so growth can be attributed to the code that allocated it. A disabled
+    profiler does nothing, so call sites never need to check.
+    """
+
+    def __init__(self, enabled: bool = False, top_allocations: int = 10):
+        self.enabled = enabled
+        self.top_allocations = top_allocations
+        self.samples: List[Dict[str, Any]] = []
+        self.stages: List[Dict[str, Any]] = []
+        self.current_stage = None
+        self._stage_start_sample = None
+        self._stage_snapshot = None
+        self.started_at = time.time()
+        self._holds_tracing = False
+        if enabled:
+            acquire_tracing()
+            self._holds_tracing = True
+
+    def sample(self, label: str, url: Optional[str] = None):
+        """Records the memory of Python and Chrome at this point of the run."""
+        if not self.enabled:
+            return
+        chrome = chrome_processes()
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        self.samples.append({
+            "elapsed_seconds": round(time.time() - self.started_at, 2),
+            "stage": self.current_stage,
+            "label": label,
+            "url": url,
+            "python_rss_mb": round(python_rss() / MB, 1),
+            "python_traced_mb": round(traced_current / MB, 1),
+            "python_traced_peak_mb": round(traced_peak / MB, 1),
+            "chrome_rss_mb": round(sum(process["rss"] for process in chrome) / MB, 1),
+            "chrome_processes": len(chrome),
+        })
+
+    def start_stage(self, name: str):
+        """Closes the current stage, if any, and starts a new one at this boundary."""
+        if not self.enabled:
+            return
+        self.end_stage()
+        self.current_stage = name
+        self.sample("stage_start")
+        self._stage_start_sample = self.samples[-1]
+        self._stage_snapshot = take_snapshot()
+
+    def end_stage(self):
+        """Closes the current stage, attributing its memory growth and top allocations."""
+        if not self.enabled or self.current_stage is None:
+            return
+        after = take_snapshot()
+        self.sample("stage_end")
+        start_sample, end_sample = self._stage_start_sample, self.samples[-1]
+        self.stages.append({
+            "stage": self.current_stage,
+            "seconds": round(end_sample["elapsed_seconds"] - start_sample["elapsed_seconds"], 2),
+            "python_rss_growth_mb": round(end_sample["python_rss_mb"] - start_sample["python_rss_mb"], 1),
+            "chrome_rss_growth_mb": round(end_sample["chrome_rss_mb"] - start_sample["chrome_rss_mb"], 1),
+            "top_allocations": [
+                {"location": str(stat.traceback[0]), "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+                for stat in after.compare_to(self._stage_snapshot, "lineno")[:self.top_allocations]
+            ] if after is not None and self._stage_snapshot is not None else [],
+        })
+        self.current_stage = None
+        self._stage_snapshot = None
+
+    def url_growth(self) -> List[Dict[str, Any]]:
+        """Attributes RSS growth between consecutive samples to the URL visited in between."""
+        growth = []
+        for previous, sample in zip(self.samples, self.samples[1:]):
+            if sample["url"]:
+                growth.append({
+                    "url": sample["url"],
+                    "python_rss_growth_mb": round(sample["python_rss_mb"] - previous["python_rss_mb"], 1),
+                    "chrome_rss_growth_mb": round(sample["chrome_rss_mb"] - previous["chrome_rss_mb"], 1),
+                })
+        return sorted(growth, key=lambda item: -(item["python_rss_growth_mb"] + item["chrome_rss_growth_mb"]))
+
+    def report(self) -> Dict[str, Any]:
+        """Builds the memory timeline report of the run."""
+        peak = max(self.samples, key=lambda s: s["python_rss_mb"] + s["chrome_rss_mb"], default=None)
+        return {
+            "psutil_available": psutil is not None,
+            "peak": peak,
+            "stages": self.stages,
+            "top_urls": self.url_growth()[:self.top_allocations],
+            "timeline": self.samples,
+        }
+
+    def write_report(self, path: str) -> Optional[str]:
+        """Writes the report to a JSON file and releases this profiler's hold on tracing."""
+        if not self.enabled:
+            return None
+        try:
+            self.end_stage()
+            with open(path, "w") as f:
+                json.dump(self.report(), f, indent=2)
+        finally:
+            if self._holds_tracing:
+                release_tracing()
+                self._holds_tracing = False
+        print(f"🧠 Memory report saved to {path}")
+        return path
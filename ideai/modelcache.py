@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+MB = 1024 * 1024
+
+# Tool result fields that differ on every run without changing what the model should answer
+VOLATILE_KEYS = {"extracted_at", "checked_at", "elapsed_seconds", "estimated_seconds_saved",
+                 "median_load_seconds", "seconds"}
+# The same values as they appear inside prompts and tool results that embed JSON as text
+VOLATILE_JSON_FIELD = re.compile(r'"(%s)":\s*(?:"[^"]*"|-?[\d.]+)' % "|".join(sorted(VOLATILE_KEYS)))
+# Offloaded output handles, ISO timestamps and timestamped file names
+VOLATILE_PATTERNS = (
+    (re.compile(r"\bpayload-[0-9a-f]{12}\b"), "payload-*"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<datetime>"),
+    (re.compile(r"(?<!\d)\d{8}[-_]\d{6}(?!\d)"), "<timestamp>"),
+)
+
+
+def normalize_prompt(text: str) -> str:
+    """Collapses whitespace so prompts differing only in indentation or line breaks match."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def normalize_value(text: str) -> str:
+    """Masks per-run values (timestamps, payload handles, timings) inside a string."""
+    text = VOLATILE_JSON_FIELD.sub(lambda match: f'"{match.group(1)}": null', text)
+    for pattern, replacement in VOLATILE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def normalize_contents(value: Any) -> Any:
+    """Normalizes a JSON-like conversation structure for hashing.
+
+    Whitespace in "text" fields is collapsed, volatile keys are dropped, and
+    per-run values inside strings are masked, so a turn whose tool results
+    only differ in timestamps or handles hashes the same. Responses that
+    repeat one of those values are not cached (see repeats_volatile_values).
+    """
+    if isinstance(value, dict):
+        return {
+            key: normalize_contents(normalize_prompt(item) if key == "text" and isinstance(item, str) else item)
+            for key, item in value.items() if key not in VOLATILE_KEYS
+        }
+    if isinstance(value, list):
+        return [normalize_contents(item) for item in value]
+    if isinstance(value, str):
+        return normalize_value(value)
+    return value
+
+
+def volatile_values(value: Any) -> Set[str]:
+    """Collects the per-run values that normalize_contents masks, as they appear in the request."""
+    found = set()
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in VOLATILE_KEYS and isinstance(item, (str, int, float)) and not isinstance(item, bool):
+                found.add(str(item))
+            else:
+                found |= volatile_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            found |= volatile_values(item)
+    elif isinstance(value, str):
+        for match in VOLATILE_JSON_FIELD.finditer(value):
+            found.add(match.group(0).split(":", 1)[1].strip().strip('"'))
+        for pattern, _ in VOLATILE_PATTERNS:
+            found.update(pattern.findall(value))
+    return {item for item in found if item}
+
+
+def repeats_volatile_values(response: str, values: Iterable[str]) -> bool:
+    """Checks whether a response quotes any masked request value.
+
+    Such a response only fits the run it was produced in (a payload handle
+    or file name that no longer exists, a stale timestamp or timing), so it
+    must not be served for a request that merely hashes the same.
+    """
+    return any(
+        re.search(r"(?<![\w.])%s(?![\w])" % re.escape(value), response)
+        for value in values
+    )
+
+
+def request_key(model: str, system_instruction: str, contents: List[Any], tools: Iterable[str] = ()) -> str:
+    """Hashes everything that determines a model response.
+
+    contents is the conversation as JSON-like data, including function calls
+    and tool results, so a turn only matches when the tools returned the same.
+    """
+    material = {
+        "model": model,
+        "system_instruction": normalize_value(normalize_prompt(system_instruction)),
+        "tools": sorted(tools),
+        "contents": normalize_contents(contents),
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ModelCache:
+    """Persistent prompt/response cache for model calls.
+
+    Responses are kept in SQLite keyed by request_key. Entries older than
+    max_age are ignored, and the least recently used entries are evicted
+    once the stored responses exceed max_bytes.
+    """
+
+    def __init__(self, path: str = "model_cache.sqlite", max_bytes: int = 200 * MB,
+                 max_age: float = 7 * 24 * 3600, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+        self._db = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the agent doesn't create the file
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for a key, counting a hit or a miss."""
+        with self.lock:
+            db = self._connection()
+            row = db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or now - row[1] > self.max_age:
+                self.counters["misses"] += 1
+                return None
+            db.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            db.commit()
+            self.counters["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        """Stores a response and evicts least recently used entries past max_bytes."""
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            db = self._connection()
+            now = time.time()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, last_used, hits) VALUES (?, ?, ?, ?, ?, 0)",
+                (key, response, size, now, now)
+            )
+            self.counters["stores"] += 1
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = db.execute("SELECT key, size FROM responses ORDER BY last_used LIMIT 1").fetchone()
+                db.execute("DELETE FROM responses WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                self.counters["evictions"] += 1
+            db.commit()
+
+    def record_bypass(self):
+        with self.lock:
+            self.counters["bypassed"] += 1
+
+    def clear(self):
+        with self.lock:
+            self._connection().execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit-rate metrics and the size of the store."""
+        with self.lock:
+            counters = dict(self.counters)
+            entries, size = 0, 0
+            if self._db is not None or os.path.exists(self.path):
+                entries, size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+        lookups = counters["hits"] + counters["misses"]
+        counters.update({
+            "enabled": self.enabled,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "stored_mb": round(size / MB, 2),
+            "max_mb": round(self.max_bytes / MB, 2),
+        })
+        return counters
+
+
+def cached_generate(cache: ModelCache, generate: Callable[[str], str], model: str, system_instruction: str,
+                    prompt: str, use_cache: bool = True) -> str:
+    """Calls a plain prompt-in/text-out model through the cache."""
+    if not (cache.enabled and use_cache):
+        cache.record_bypass()
+        return generate(prompt)
+    key = request_key(model, system_instruction, [{"role": "user", "parts": [{"text": prompt}]}])
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    response = generate(prompt)
+    if not repeats_volatile_values(response, volatile_values([system_instruction, prompt])):
+        cache.put(key, response)
+    return response
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Usage: python -m ideai.modelcache [latency]
+    # Replays repeated prompts against a simulated model, cold and then warm
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+
+    def simulated_model(prompt: str) -> str:
+        time.sleep(latency)
+        return f"Analysis of a {len(prompt)} character prompt"
+
+    prompts = [f"Analyze the collected data for niche {i % 5}.\n    Focus on margins." for i in range(20)]
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ModelCache(os.path.join(directory, "model_cache.sqlite"), max_bytes=MB)
+        start = time.time()
+        for prompt in prompts:
+            # Whitespace differences still hit the cache
+            cached_generate(cache, simulated_model, "stub", "system", "  " + prompt)
+        elapsed = time.time() - start
+        uncached = len(prompts) * latency
+        print(json.dumps({
+            "calls": len(prompts),
+            "seconds": round(elapsed, 2),
+            "seconds_without_cache": round(uncached, 2),
+            "stats": cache.stats(),
+        }, indent=2))
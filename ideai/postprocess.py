@@ -0,0 +1,294 @@
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import List, Dict, Any, Optional
+
+from .crawler import tokenize, STOP_WORDS
+from .saturation import FIGURE_PATTERN
+
+MAX_TEXT_LENGTH = 50000
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+CAPTURE_TAGS = HEADING_TAGS | {"p", "li", "title"}
+SKIP_TAGS = {"script", "style", "noscript", "svg", "template", "iframe"}
+MAIN_CONTAINER_IDS = {"content", "main", "main-content"}
+
+
+def clean_text(text: str) -> str:
+    """Collapses whitespace in extracted text."""
+    return " ".join(text.split())
+
+
+class _PageParser(HTMLParser):
+    """Single pass over raw HTML collecting the same structure as extract_page_content."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.meta_description = ""
+        self.headings = []
+        self.paragraphs = []
+        self.lists = []
+        self.blocks = []
+        self.main_parts = []
+        self._captures = []
+        self._open_lists = []
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._stack = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta":
+            if (attrs.get("name") or "").lower() == "description":
+                self.meta_description = attrs.get("content") or ""
+            return
+        if tag in ("br", "img", "input", "hr", "link", "source", "wbr"):
+            return
+
+        is_main = tag in ("article", "main") or (
+            (attrs.get("id") or "") in MAIN_CONTAINER_IDS
+            or bool(set((attrs.get("class") or "").split()) & MAIN_CONTAINER_IDS)
+        )
+        self._stack.append((tag, is_main))
+        if is_main:
+            self._main_depth += 1
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in CAPTURE_TAGS:
+            self._captures.append([tag, []])
+        elif tag in ("ul", "ol"):
+            self._open_lists.append({"type": tag, "items": []})
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+        # Close everything left open inside this element (HTML is often sloppy)
+        while self._stack:
+            open_tag, is_main = self._stack.pop()
+            self._close(open_tag, is_main)
+            if open_tag == tag:
+                break
+
+    def _close(self, tag, is_main):
+        if is_main:
+            self._main_depth -= 1
+        if tag in SKIP_TAGS:
+            self._skip_depth -= 1
+        elif tag in CAPTURE_TAGS:
+            while self._captures:
+                capture_tag, parts = self._captures.pop()
+                if capture_tag == tag:
+                    self._finish_capture(tag, clean_text(" ".join(parts)))
+                    break
+        elif tag in ("ul", "ol") and self._open_lists:
+            list_element = self._open_lists.pop()
+            if list_element["items"]:
+                self.lists.append({
+                    "index": len(self.lists) + 1,
+                    "type": list_element["type"],
+                    "items": list_element["items"]
+                })
+                self.blocks.append(("block", "\n".join(list_element["items"])))
+
+    def _finish_capture(self, tag, text):
+        if not text:
+            return
+        if tag == "title":
+            self.title = text
+        elif tag in HEADING_TAGS:
+            level = int(tag[1])
+            self.headings.append({"level": level, "text": text})
+            self.blocks.append(("heading", level, text))
+        elif tag == "p":
+            self.paragraphs.append({"index": len(self.paragraphs) + 1, "text": text})
+            self.blocks.append(("block", text))
+        elif tag == "li" and self._open_lists:
+            self._open_lists[-1]["items"].append(text)
+
+    def handle_data(self, data):
+        if self._skip_depth > 0 or not data.strip():
+            return
+        for capture in self._captures:
+            capture[1].append(data)
+        if self._main_depth > 0:
+            self.main_parts.append(data)
+
+
+def parse_page_html(html: str, url: str = "") -> Dict[str, Any]:
+    """Parses raw page HTML into the structure returned by extract_page_content."""
+    parser = _PageParser()
+    parser.feed(html or "")
+    parser.close()
+
+    main_content = clean_text(" ".join(parser.main_parts))
+    if len(main_content) <= 100 and parser.paragraphs:
+        main_content = "\n\n".join(p["text"] for p in parser.paragraphs)
+
+    # Group paragraphs and lists under the heading that precedes them
+    sections = []
+    current_section = None
+    for block in parser.blocks:
+        if block[0] == "heading":
+            if current_section and current_section["content"].strip():
+                sections.append(current_section)
+            current_section = {"heading": block[2], "level": block[1], "content": ""}
+        elif current_section:
+            current_section["content"] += block[1] + "\n\n"
+    if current_section and current_section["content"].strip():
+        sections.append(current_section)
+
+    return {
+        "title": parser.title,
+        "url": url,
+        "extracted_at": datetime.now().isoformat(),
+        "main_content": main_content[:MAX_TEXT_LENGTH],
+        "meta_description": parser.meta_description,
+        "headings": parser.headings,
+        "paragraphs": parser.paragraphs,
+        "lists": parser.lists,
+        "sections": sections
+    }
+
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """Computes cheap text analytics used downstream (figures, word counts, key terms)."""
+    tokens = tokenize(text)
+    terms = Counter(token for token in tokens if token not in STOP_WORDS and not token.isdigit())
+    return {
+        "word_count": len(tokens),
+        "figures": sorted({clean_text(match.group(0)) for match in FIGURE_PATTERN.finditer(text)}),
+        "top_terms": [term for term, _ in terms.most_common(20)],
+    }
+
+
+def process_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Turns one raw page snapshot into a parsed, cleaned and analyzed record."""
+    record = {key: value for key, value in snapshot.items() if key != "html"}
+    try:
+        content = parse_page_html(snapshot.get("html") or "", snapshot.get("url", ""))
+        if not record.get("title"):
+            record["title"] = content["title"]
+        record["content"] = content
+        record["analysis"] = analyze_text(content["main_content"] or content["title"])
+    except Exception as e:
+        record["content"] = {"error": f"Error parsing page HTML: {str(e)}"}
+    return record
+
+
+def process_batch(batch: List[Dict[str, Any]]) -> bytes:
+    """Worker entry point: processes a batch and returns it JSON-encoded to keep IPC cheap."""
+    return json.dumps([process_snapshot(snapshot) for snapshot in batch]).encode("utf-8")
+
+
+class PostProcessor:
+    """Process pool that parses page snapshots while the browser keeps fetching.
+
+    Snapshots are grouped into batches of batch_size before they are sent to
+    a worker. Once max_pending batches are in flight, submit() blocks until
+    one finishes, which slows the fetch side down instead of piling up HTML.
+    """
+
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 4, max_pending: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_pending = max_pending or self.workers * 2
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.batch: List[Dict[str, Any]] = []
+        self.pending = deque()
+        self.finished: List[Dict[str, Any]] = []
+
+    def submit(self, snapshot: Dict[str, Any]):
+        """Queues a snapshot, blocking when too many batches are already in flight."""
+        self.batch.append(snapshot)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Sends the current partial batch to a worker."""
+        if not self.batch:
+            return
+        while len(self.pending) >= self.max_pending:
+            wait(list(self.pending), return_when=FIRST_COMPLETED)
+            self._collect_done()
+        self.pending.append(self.executor.submit(process_batch, self.batch))
+        self.batch = []
+
+    def _collect_done(self):
+        for future in [future for future in self.pending if future.done()]:
+            self.pending.remove(future)
+            self.finished.extend(json.loads(future.result()))
+
+    def completed(self) -> List[Dict[str, Any]]:
+        """Returns the records finished since the last call without blocking."""
+        self._collect_done()
+        records, self.finished = self.finished, []
+        return records
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Processes everything still queued and returns the remaining records."""
+        self.flush()
+        for future in list(self.pending):
+            future.result()
+        return self.completed()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def synthetic_snapshots(count: int, paragraphs: int = 200) -> List[Dict[str, Any]]:
+    """Builds synthetic market research pages for benchmarking."""
+    snapshots = []
+    for i in range(count):
+        body = "".join(
+            f"<h2>Section {j}</h2><p>The market for product {j} grew {j % 40}% to $ {j * 3}.5 million "
+            f"in 2024 according to Industry Report {i}.</p><ul><li>Price tier {j}: ₹{j * 100}</li></ul>"
+            for j in range(paragraphs)
+        )
+        html = (f"<html><head><title>Page {i}</title><meta name='description' content='Report {i}'>"
+                f"<script>var x = {i};</script></head><body><article>{body}</article></body></html>")
+        snapshots.append({"url": f"https://example{i}.com/report", "status": "success", "html": html})
+    return snapshots
+
+
+def benchmark_scaling(snapshots: List[Dict[str, Any]], worker_counts: Optional[List[int]] = None,
+                      batch_size: int = 4) -> List[Dict[str, Any]]:
+    """Measures post-processing throughput for increasing worker counts."""
+    cpu_count = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, cpu_count} & set(range(1, cpu_count + 1)))
+    results = []
+    baseline = None
+    for workers in worker_counts:
+        with PostProcessor(workers=workers, batch_size=batch_size) as processor:
+            start = time.perf_counter()
+            for snapshot in snapshots:
+                processor.submit(snapshot)
+            records = processor.drain()
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        results.append({
+            "workers": workers,
+            "pages": len(records),
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(len(records) / elapsed, 1),
+            "speedup": round(baseline / elapsed, 2),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    # Usage: python -m ideai.postprocess [page_count]
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(json.dumps(benchmark_scaling(synthetic_snapshots(page_count)), indent=2))
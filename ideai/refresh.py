@@ -0,0 +1,189 @@
+import hashlib
+import re
+import time
+from datetime import datetime
+from typing import Callable, List, Dict, Any, Optional
+
+from .documents import PDF, TEXT, PDF_MAX_BYTES
+from .fetch import fetch_url, download, decode_body, validators_from, HashingWriter, MAX_FETCH_BYTES
+from .links import canonicalize_url
+from .postprocess import parse_page_html
+from .storage import page_figures
+
+
+def content_fingerprint(content: Dict[str, Any]) -> Optional[str]:
+    """Hashes the main text of extracted page content.
+
+    Only headings and paragraphs are used and the text is reduced to
+    lowercase alphanumerics, so content extracted by the browser and by the
+    HTML parser fingerprints the same way and layout tweaks are ignored.
+    Headings are ordered by level (stable), which matches both document-order
+    lists and those of datasets that grouped headings by level.
+    """
+    if not content or "error" in content:
+        return None
+    headings = sorted(content.get("headings", []), key=lambda heading: heading.get("level") or 0)
+    parts = [heading.get("text", "") for heading in headings]
+    parts.extend(paragraph.get("text", "") for paragraph in content.get("paragraphs", []))
+    if not any(parts):
+        parts = [content.get("main_content") or ""]
+    normalized = re.sub(r"[^a-z0-9]+", " ", " ".join(parts).lower()).strip()
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def html_fingerprint(html: str, url: str = "") -> Optional[str]:
+    """Fingerprints a page as served, through the same static parser a refresh uses.
+
+    Stored at collection time as a record's static_hash, so a refresh compares
+    like with like even when the record's content came from the browser.
+    """
+    return content_fingerprint(parse_page_html(html, url))
+
+
+def check_document(url: str, previous: Dict[str, Any]) -> Dict[str, Any]:
+    """Conditionally re-downloads a PDF or text document, hashing it as it streams."""
+    body = HashingWriter()
+    max_bytes = PDF_MAX_BYTES if previous.get("source") == PDF else MAX_FETCH_BYTES
+    response = download(url, body, headers=conditional_headers(previous), max_bytes=max_bytes)
+    response["fingerprint"] = body.hexdigest() if response["status"] == 200 else None
+    return response
+
+
+def check_page(url: str, previous: Dict[str, Any]) -> Dict[str, Any]:
+    """Conditionally re-fetches an HTML page and fingerprints its static parse."""
+    response = fetch_url(url, headers=conditional_headers(previous))
+    response["fingerprint"] = None
+    if response["status"] == 200 and "html" in response["headers"].get("content-type", "html"):
+        response["fingerprint"] = html_fingerprint(decode_body(response), url)
+    return response
+
+
+def conditional_headers(record: Dict[str, Any]) -> Dict[str, str]:
+    """Builds If-None-Match / If-Modified-Since headers from a record's stored validators."""
+    validators = record.get("http_validators") or {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def diff_pages(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarizes what changed on a page between two runs."""
+    old_figures = set(page_figures(previous))
+    new_figures = set(page_figures(current))
+    old_headings = {h.get("text") for h in (previous.get("content") or {}).get("headings", [])}
+    new_headings = {h.get("text") for h in (current.get("content") or {}).get("headings", [])}
+    return {
+        "url": current.get("url"),
+        "title": current.get("title"),
+        "added_figures": sorted(new_figures - old_figures),
+        "removed_figures": sorted(old_figures - new_figures),
+        "added_headings": sorted(h for h in new_headings - old_headings if h),
+    }
+
+
+def refresh_records(previous_records: List[Dict[str, Any]], extract_page: Callable[[str], Dict[str, Any]],
+                    new_results: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Refreshes a prior research run, re-extracting only pages that changed.
+
+    Every prior page is checked with a conditional GET. A 304, or a 200 whose
+    body fingerprints the same as the record's static_hash, carries the old
+    record forward; only changed or unreachable pages go through extract_page
+    (the browser). Pages are fingerprinted through the static parser and
+    documents by their bytes, on both sides. Records from before static_hash
+    existed fall back to their content fingerprint. URLs in new_results that
+    the prior run never visited are extracted too.
+
+    Args:
+        previous_records: Page records of the prior run
+        extract_page: Callable doing a full browser extraction of a URL
+        new_results: Current search results, to pick up newly ranking pages
+    """
+    start = time.time()
+    refreshed_at = datetime.now().isoformat()
+    records = []
+    diff = {"new": [], "changed": [], "unchanged": 0, "failed": []}
+    browser_visits = 0
+
+    for previous in previous_records:
+        url = previous.get("url")
+        if not url:
+            continue
+        previous_hash = previous.get("content_hash") or content_fingerprint(previous.get("content"))
+        if previous.get("source") in (PDF, TEXT):
+            response = check_document(url, previous)
+            document = (previous.get("content") or {}).get("document") or {}
+            previous_static = previous.get("static_hash") or document.get("sha256")
+        else:
+            response = check_page(url, previous)
+            previous_static = previous.get("static_hash") or previous_hash
+        fetched_static = response["fingerprint"]
+
+        unchanged = response["status"] == 304 or (fetched_static is not None and fetched_static == previous_static)
+
+        if unchanged:
+            record = dict(previous)
+            record["http_validators"] = validators_from(response, previous.get("http_validators"))
+            record["content_hash"] = previous_hash
+            record["static_hash"] = previous_static
+            record["refresh"] = {"change": "unchanged", "checked_at": refreshed_at}
+            records.append(record)
+            diff["unchanged"] += 1
+            continue
+
+        print(f"♻️ Page changed, re-extracting: {url}")
+        record = extract_page(url)
+        browser_visits += 1
+        record["http_validators"] = validators_from(response)
+        record["content_hash"] = content_fingerprint(record.get("content"))
+        # The response just checked is what the next refresh compares against
+        record["static_hash"] = fetched_static or record.get("static_hash")
+        if record.get("status") == "failed":
+            # Keep the old data rather than losing the page from the dataset
+            record = dict(previous, refresh={"change": "failed", "checked_at": refreshed_at, "error": record.get("error")})
+            diff["failed"].append(url)
+        elif record["content_hash"] is not None and record["content_hash"] == previous_hash:
+            record["refresh"] = {"change": "unchanged", "checked_at": refreshed_at}
+            diff["unchanged"] += 1
+        else:
+            record["refresh"] = {"change": "changed", "checked_at": refreshed_at}
+            diff["changed"].append(diff_pages(previous, record))
+        records.append(record)
+
+    known_urls = {canonicalize_url(record.get("url", "")) for record in previous_records}
+    for result in new_results or []:
+        url = result.get("url")
+        if not url or canonicalize_url(url) in known_urls:
+            continue
+        known_urls.add(canonicalize_url(url))
+        print(f"🆕 New search result: {url}")
+        record = extract_page(url)
+        if record.get("status") == "skipped":
+            # Media and downloads never make it into the dataset
+            continue
+        browser_visits += 1
+        record["content_hash"] = content_fingerprint(record.get("content"))
+        record["refresh"] = {"change": "new", "checked_at": refreshed_at}
+        records.append(record)
+        if record.get("status") != "failed":
+            diff["new"].append({
+                "url": url,
+                "title": record.get("title"),
+                "figures": page_figures(record)[:20],
+            })
+
+    return {
+        "records": records,
+        "diff": diff,
+        "stats": {
+            "pages_checked": len(previous_records),
+            "browser_visits": browser_visits,
+            "carried_forward": diff["unchanged"],
+            "browser_visit_fraction": round(browser_visits / len(records), 3) if records else 0.0,
+            "elapsed_seconds": round(time.time() - start, 1),
+        },
+    }
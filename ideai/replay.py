@@ -0,0 +1,350 @@
+import base64
+import json
+import os
+import re
+import threading
+import urllib.parse
+from typing import List, Dict, Any, Optional
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+from .links import LINK_INDEX_SCRIPT, canonicalize_url
+
+# lxml (with cssselect) is only needed to replay recordings
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# 1x1 transparent PNG served when a page was recorded without a screenshot
+BLANK_PNG = ("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII=")
+VIEWPORT_WIDTH = 1920
+VIEWPORT_HEIGHT = 1080
+
+
+def parse_html(html: str):
+    """Parses a DOM snapshot, tolerating documents that declare their own encoding."""
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+class Recorder:
+    """Records every page a live run navigates to so it can be replayed offline.
+
+    Each page is stored as its rendered DOM, final URL, title and a full-page
+    screenshot, with an index.json mapping URLs to the files. Visits that
+    never reach the browser (skipped targets, PDF/text documents and static
+    copies that won a hedged load) are stored as their extraction result.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "pages"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "screenshots"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "results"), exist_ok=True)
+        self.index_path = os.path.join(directory, "index.json")
+        self.pages: List[Dict[str, Any]] = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.pages = json.load(f)
+
+    def _append(self, entry: Dict[str, Any]):
+        self.pages.append(entry)
+        # Rewrite the index after every entry so an interrupted run is still replayable
+        with open(self.index_path, "w") as f:
+            json.dump(self.pages, f, indent=2)
+
+    def record(self, driver, requested_url: str):
+        """Stores the page the driver is currently showing."""
+        html = driver.page_source
+        try:
+            screenshot = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                "format": "png", "captureBeyondViewport": True
+            })["data"]
+        except Exception:
+            screenshot = driver.get_screenshot_as_base64()
+
+        with self.lock:
+            number = len(self.pages) + 1
+            html_file = os.path.join("pages", f"{number:05d}.html")
+            screenshot_file = os.path.join("screenshots", f"{number:05d}.png")
+            with open(os.path.join(self.directory, html_file), "w", encoding="utf-8") as f:
+                f.write(html)
+            with open(os.path.join(self.directory, screenshot_file), "wb") as f:
+                f.write(base64.b64decode(screenshot))
+            self._append({
+                "url": requested_url,
+                "final_url": driver.current_url,
+                "title": driver.title,
+                "html_file": html_file,
+                "screenshot_file": screenshot_file,
+            })
+
+    def record_result(self, requested_url: str, result: Dict[str, Any]):
+        """Stores the extraction result of a visit that never reached the browser."""
+        with self.lock:
+            number = len(self.pages) + 1
+            result_file = os.path.join("results", f"{number:05d}.json")
+            with open(os.path.join(self.directory, result_file), "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, default=str)
+            self._append({
+                "url": requested_url,
+                "final_url": requested_url,
+                "title": result.get("title", ""),
+                "result_file": result_file,
+            })
+
+
+class Recording:
+    """Recorded pages and extraction results of a live run, looked up by canonical URL."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json")) as f:
+            self.pages = json.load(f)
+        self.by_url = {}
+        self.results = {}
+        for page in self.pages:
+            if "result_file" in page:
+                self.results[canonicalize_url(page["url"])] = page
+                continue
+            # Later recordings of the same URL win, like a re-visit would
+            self.by_url[canonicalize_url(page["url"])] = page
+            self.by_url.setdefault(canonicalize_url(page["final_url"]), page)
+
+    def find(self, url: str) -> Optional[Dict[str, Any]]:
+        return self.by_url.get(canonicalize_url(url))
+
+    def find_result(self, url: str) -> Optional[Dict[str, Any]]:
+        """Returns a fresh copy of the recorded result of a visit that skipped the browser."""
+        entry = self.results.get(canonicalize_url(url))
+        if entry is None:
+            return None
+        return json.loads(self.read(entry, "result_file"))
+
+    def read(self, page: Dict[str, Any], key: str, mode: str = "r"):
+        with open(os.path.join(self.directory, page[key]), mode, encoding=None if "b" in mode else "utf-8") as f:
+            return f.read()
+
+
+class ReplayElement:
+    """WebElement look-alike backed by an lxml element."""
+
+    def __init__(self, driver, element):
+        self._driver = driver
+        self._element = element
+
+    @property
+    def tag_name(self) -> str:
+        return self._element.tag
+
+    @property
+    def text(self) -> str:
+        return " ".join(self._element.text_content().split())
+
+    @property
+    def id(self) -> str:
+        return str(id(self._element))
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        value = self._element.get(name)
+        if value is not None and name in ("href", "src"):
+            # Like the browser's href property, resolve relative links
+            return urllib.parse.urljoin(self._driver.current_url, value)
+        return value
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def click(self):
+        if self._element.tag == "a" and self._element.get("href"):
+            self._driver.get(self.get_attribute("href"))
+
+    def clear(self):
+        pass
+
+    def send_keys(self, *keys):
+        pass
+
+    def find_element(self, by: str = By.ID, value: Optional[str] = None) -> "ReplayElement":
+        return self._driver._find_one(self._element, by, value)
+
+    def find_elements(self, by: str = By.ID, value: Optional[str] = None) -> List["ReplayElement"]:
+        return self._driver._find_all(self._element, by, value)
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    @property
+    def active_element(self) -> ReplayElement:
+        return ReplayElement(self._driver, self._driver._body())
+
+    def window(self, handle):
+        pass
+
+    def new_window(self, type_hint=None):
+        pass
+
+
+class _Timeouts:
+    page_load = 0
+
+
+class ReplayDriver:
+    """Serves a recording through the subset of the WebDriver API the tools use.
+
+    Navigation loads recorded DOM snapshots, scrolling only moves a virtual
+    scroll position and screenshots come from the recording, so whole
+    research sessions run without Chrome or network access.
+    """
+
+    # Every session gets its own replay driver instead of attaching to a shared browser
+    shares_browser = False
+
+    def __init__(self, recording: Recording):
+        if lxml is None:
+            raise WebDriverException("Replaying recordings needs the 'lxml' and 'cssselect' packages")
+        self.recording = recording
+        self.capabilities = {"browserVersion": "replay"}
+        self.current_window_handle = "replay"
+        self.window_handles = ["replay"]
+        self.switch_to = _SwitchTo(self)
+        self.timeouts = _Timeouts()
+        self.page = None
+        self.tree = None
+        self.current_url = "about:blank"
+        self.title = ""
+        self.page_source = "<html><head></head><body></body></html>"
+        self.scroll_y = 0
+        self.page_token = 0
+
+    def get(self, url: str):
+        page = self.recording.find(url)
+        if page is None:
+            raise WebDriverException(f"No recording for {url}")
+        self.page = page
+        self.page_source = self.recording.read(page, "html_file")
+        self.tree = parse_html(self.page_source)
+        self.current_url = page["final_url"]
+        self.title = page["title"]
+        self.scroll_y = 0
+        self.page_token += 1
+
+    def set_page_load_timeout(self, seconds):
+        self.timeouts.page_load = seconds
+
+    def _body(self):
+        if self.tree is None:
+            self.tree = parse_html(self.page_source)
+        body = self.tree.find(".//body")
+        return body if body is not None else self.tree
+
+    @property
+    def page_height(self) -> int:
+        # Rough layout estimate so scroll loops terminate at a realistic depth
+        text_length = len(self._body().text_content())
+        return max(VIEWPORT_HEIGHT, min(50000, text_length // 4))
+
+    def _find_all(self, root, by: str, value: str) -> List[ReplayElement]:
+        if root is None:
+            root = self._body().getroottree().getroot()
+        if by == By.CSS_SELECTOR:
+            elements = root.cssselect(value)
+        elif by == By.XPATH:
+            elements = [element for element in root.xpath(value) if hasattr(element, "tag")]
+        elif by == By.TAG_NAME:
+            elements = list(root.iter(value))
+        elif by == By.ID:
+            elements = root.xpath(".//*[@id=$value]", value=value)
+        elif by == By.NAME:
+            elements = root.xpath(".//*[@name=$value]", value=value)
+        elif by == By.CLASS_NAME:
+            elements = root.find_class(value)
+        else:
+            raise WebDriverException(f"Unsupported locator in replay: {by}")
+        return [ReplayElement(self, element) for element in elements]
+
+    def _find_one(self, root, by: str, value: str) -> ReplayElement:
+        elements = self._find_all(root, by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element matching {by}={value}")
+        return elements[0]
+
+    def find_elements(self, by: str = By.ID, value: Optional[str] = None) -> List[ReplayElement]:
+        return self._find_all(None, by, value)
+
+    def find_element(self, by: str = By.ID, value: Optional[str] = None) -> ReplayElement:
+        return self._find_one(None, by, value)
+
+    def _link_index(self, known_token):
+        if known_token and known_token == str(self.page_token):
+            return {"token": known_token, "links": None}
+        links = []
+        for i, anchor in enumerate(self._body().iter("a")):
+            if anchor.get("href") is None:
+                continue
+            anchor.set("data-ideai-link", str(i))
+            heading = anchor.find(".//h3")
+            if heading is None and anchor.getparent() is not None:
+                heading = anchor.getparent().find(".//h3")
+            links.append({
+                "index": i,
+                "href": urllib.parse.urljoin(self.current_url, anchor.get("href")),
+                "text": " ".join(anchor.text_content().split())[:300],
+                "rel": anchor.get("rel") or "",
+                "heading": " ".join(heading.text_content().split()) if heading is not None else "",
+                "visible": True,
+            })
+        return {"token": str(self.page_token), "links": links}
+
+    def execute_script(self, script: str, *args):
+        if script == LINK_INDEX_SCRIPT:
+            return self._link_index(args[0] if args else None)
+        if "parentNode" in script and args:
+            parent = args[0]._element.getparent()
+            return ReplayElement(self, parent) if parent is not None else None
+        if script.startswith("return document.body.scrollHeight"):
+            return self.page_height
+        if script.startswith("return window.pageYOffset"):
+            return self.scroll_y
+        if script.startswith("return window.innerHeight"):
+            return VIEWPORT_HEIGHT
+
+        scroll_by = re.search(r"window\.scrollBy\(0,\s*(-?\d+)\)", script)
+        if scroll_by:
+            self.scroll_y = max(0, min(self.page_height - VIEWPORT_HEIGHT, self.scroll_y + int(scroll_by.group(1))))
+        elif "window.scrollTo" in script:
+            self.scroll_y = max(0, self.page_height - VIEWPORT_HEIGHT)
+        return None
+
+    def _screenshot_base64(self) -> str:
+        if self.page and self.page.get("screenshot_file"):
+            return base64.b64encode(self.recording.read(self.page, "screenshot_file", "rb")).decode("ascii")
+        return BLANK_PNG
+
+    def execute_cdp_cmd(self, cmd: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if cmd == "Page.getLayoutMetrics":
+            return {"cssContentSize": {"width": VIEWPORT_WIDTH, "height": self.page_height}}
+        if cmd == "Page.captureScreenshot":
+            return {"data": self._screenshot_base64()}
+        raise WebDriverException(f"Unsupported DevTools command in replay: {cmd}")
+
+    def get_screenshot_as_base64(self) -> str:
+        return self._screenshot_base64()
+
+    def save_screenshot(self, filename: str) -> bool:
+        with open(filename, "wb") as f:
+            f.write(base64.b64decode(self._screenshot_base64()))
+        return True
+
+    def close(self):
+        pass
+
+    def quit(self):
+        pass
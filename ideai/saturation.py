@@ -0,0 +1,168 @@
+import json
+import re
+import sys
+from collections import deque
+from typing import List, Dict, Any, Optional
+
+from .crawler import tokenize
+from .links import site_key
+
+FIGURE_PATTERN = re.compile(
+    r"(?:[$€£₹]|\b(?:inr|usd|rs\.?)\s?)\d[\d,]*(?:\.\d+)?\s?(?:k|m|bn|mn|million|billion|crore|lakh|cr)?\b"
+    r"|\b\d[\d,]*(?:\.\d+)?\s?(?:%|percent|million|billion|crore|lakh)",
+    re.IGNORECASE
+)
+ENTITY_PATTERN = re.compile(r"\b[A-Z][A-Za-z&]+(?:\s+[A-Z][A-Za-z&]+)+\b")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# How much each kind of novel item contributes to a page's information gain
+GAIN_WEIGHTS = {"facts": 1.0, "figures": 2.0, "entities": 0.5, "domains": 3.0}
+
+
+def page_text(page: Dict[str, Any]) -> str:
+    """Returns the readable text of a collected page record."""
+    content = page.get("content") or {}
+    parts = [page.get("title") or "", content.get("meta_description") or ""]
+    parts.extend(heading.get("text", "") for heading in content.get("headings", []))
+    parts.append(content.get("main_content") or "")
+    if not content.get("main_content"):
+        parts.extend(p.get("text", "") for p in content.get("paragraphs", []))
+    return "\n".join(part for part in parts if part)
+
+
+def extract_items(page: Dict[str, Any]) -> Dict[str, set]:
+    """Extracts the facts, figures, entities and domain contributed by a page."""
+    text = page_text(page)
+    figures = {re.sub(r"\s+", "", match.group(0).lower()) for match in FIGURE_PATTERN.finditer(text)}
+    entities = {match.group(0).lower() for match in ENTITY_PATTERN.finditer(text)}
+    facts = set()
+    for sentence in SENTENCE_SPLIT.split(text):
+        sentence = " ".join(sentence.split()).lower()
+        if 40 <= len(sentence) <= 400:
+            facts.add(sentence)
+    domain = site_key(page.get("url") or "")
+    return {
+        "facts": facts,
+        "figures": figures,
+        "entities": entities,
+        "domains": {domain} if domain else set(),
+    }
+
+
+class SaturationMonitor:
+    """Tracks how much new information each visited page adds to a research run.
+
+    The run counts as saturated once the mean information gain of the last
+    `window` pages drops below `threshold`, after at least `min_pages` visits.
+    A threshold of 0 disables early stopping.
+    """
+
+    def __init__(self, window: int = 10, threshold: float = 3.0, min_pages: int = 15):
+        self.window = window
+        self.threshold = threshold
+        self.min_pages = max(min_pages, window)
+        self.seen = {kind: set() for kind in GAIN_WEIGHTS}
+        self.vocabulary = set()
+        self.domain_visits: Dict[str, int] = {}
+        self.recent_gains = deque(maxlen=window)
+        self.history: List[Dict[str, Any]] = []
+        self.failed_pages = 0
+
+    def observe(self, page: Dict[str, Any]) -> float:
+        """Records a visited page and returns its information gain."""
+        # A page that failed to load says nothing about saturation; with the circuit
+        # breaker such failures are instant and would otherwise end runs early
+        if page.get("status") == "failed":
+            self.failed_pages += 1
+            return 0.0
+
+        novel = {kind: 0 for kind in GAIN_WEIGHTS}
+        for kind, items in extract_items(page).items():
+            new_items = items - self.seen[kind]
+            novel[kind] = len(new_items)
+            self.seen[kind].update(new_items)
+        self.vocabulary.update(tokenize(page_text(page)))
+
+        domain = site_key(page.get("url") or "")
+        self.domain_visits[domain] = self.domain_visits.get(domain, 0) + 1
+
+        gain = sum(GAIN_WEIGHTS[kind] * count for kind, count in novel.items())
+        self.recent_gains.append(gain)
+        self.history.append({"url": page.get("url"), "gain": gain, "novel": novel})
+        return gain
+
+    def saturated(self) -> bool:
+        """Checks whether recent pages stopped adding enough new information."""
+        if self.threshold <= 0 or len(self.history) < self.min_pages:
+            return False
+        return sum(self.recent_gains) / len(self.recent_gains) < self.threshold
+
+    def expected_gain(self, result: Dict[str, Any]) -> float:
+        """Estimates the gain of an unvisited result from its domain and title."""
+        domain = site_key(result.get("url") or "")
+        gain = GAIN_WEIGHTS["domains"] / (1 + self.domain_visits.get(domain, 0))
+        title_tokens = set(tokenize(result.get("title") or ""))
+        if title_tokens:
+            gain += len(title_tokens - self.vocabulary) / len(title_tokens)
+        return gain
+
+    def rank(self, remaining: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Orders unvisited results by expected gain, keeping the original order for ties."""
+        return sorted(remaining, key=lambda result: -self.expected_gain(result))
+
+    def coverage(self) -> int:
+        """Returns the number of unique items collected so far."""
+        return sum(len(items) for items in self.seen.values())
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarizes the gain history for the research result."""
+        return {
+            "pages_observed": len(self.history),
+            "pages_failed": self.failed_pages,
+            "saturated": self.saturated(),
+            "recent_mean_gain": round(sum(self.recent_gains) / len(self.recent_gains), 2) if self.recent_gains else 0.0,
+            "unique_items": {kind: len(items) for kind, items in self.seen.items()},
+        }
+
+
+def evaluate_on_corpus(pages: List[Dict[str, Any]], seconds_per_page: float = 15.0,
+                       **monitor_options) -> Dict[str, Any]:
+    """Replays a saved research run with early stopping and compares it to visiting every page.
+
+    Args:
+        pages: Collected page records of a previous run, in search result order
+        seconds_per_page: Average browsing time of one page, used to estimate time saved
+        monitor_options: Passed through to SaturationMonitor
+    """
+    baseline = SaturationMonitor(threshold=0)
+    for page in pages:
+        baseline.observe(page)
+
+    monitor = SaturationMonitor(**monitor_options)
+    remaining = list(pages)
+    visited = 0
+    while remaining and not monitor.saturated():
+        page = remaining.pop(0)
+        monitor.observe(page)
+        visited += 1
+        remaining = monitor.rank(remaining)
+
+    baseline_coverage = baseline.coverage()
+    return {
+        "baseline_sites": len(pages),
+        "sites_visited": visited,
+        "sites_skipped": len(pages) - visited,
+        "time_saved_seconds": round((len(pages) - visited) * seconds_per_page, 1),
+        "coverage_retained": round(monitor.coverage() / baseline_coverage, 3) if baseline_coverage else 1.0,
+        "unique_items": monitor.summary()["unique_items"],
+        "baseline_unique_items": baseline.summary()["unique_items"],
+    }
+
+
+if __name__ == "__main__":
+    from .storage import load_dataset
+
+    # Usage: python -m ideai.saturation business_niche_data_<timestamp>.json [threshold]
+    corpus = load_dataset(sys.argv[1])
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    print(json.dumps(evaluate_on_corpus(corpus, threshold=threshold), indent=2))
@@ -0,0 +1,199 @@
+import json
+import sys
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Callable, List, Dict, Any, Optional
+
+from .deadlines import current_deadline
+from .fetch import fetch_url, decode_body
+from .links import canonicalize_url, site_key
+
+RESULTS_PER_PAGE = 10
+MAX_SERP_PAGES = 10
+PREFETCH_TIMEOUT = 10  # Seconds a static prefetch of the next results page may take
+
+
+def serp_page_url(search_url: str, offset: int) -> str:
+    """Returns the results page starting at `offset`, using Google's start= parameter."""
+    parts = urllib.parse.urlsplit(search_url)
+    query = [(key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if key != "start"]
+    if offset:
+        query.append(("start", str(offset)))
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def unwrap_result_url(href: str, page_url: str) -> str:
+    """Resolves a result link, unwrapping Google's /url?q= redirect used in the no-JS layout."""
+    url = urllib.parse.urljoin(page_url, href)
+    parts = urllib.parse.urlsplit(url)
+    if parts.path == "/url" and site_key(url) == site_key(page_url):
+        target = urllib.parse.parse_qs(parts.query).get("q", [""])[0]
+        if target:
+            return target
+    return url
+
+
+def is_result_url(url: str, page_url: str) -> bool:
+    """Filters out navigation links that point back at the search engine."""
+    if not url.startswith(("http://", "https://")) or "google" in site_key(url):
+        return False
+    # Pagination and refinement links lead to another results page
+    return urllib.parse.urlsplit(url)[1:3] != urllib.parse.urlsplit(page_url)[1:3]
+
+
+class _SerpParser(HTMLParser):
+    """Collects (title, href) for every link wrapping an <h3>, the shape of an organic result.
+
+    Also notes whether the page has Google's "Next" link (#pnnext).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.results = []
+        self.has_next = False
+        self._anchors = []
+        self._heading = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            attributes = dict(attrs)
+            if attributes.get("id") == "pnnext":
+                self.has_next = True
+            self._anchors.append({"href": attributes.get("href"), "title": ""})
+        elif tag == "h3" and self._anchors:
+            self._heading = []
+
+    def handle_endtag(self, tag):
+        if tag == "h3" and self._heading is not None:
+            self._anchors[-1]["title"] = " ".join("".join(self._heading).split())
+            self._heading = None
+        elif tag == "a" and self._anchors:
+            anchor = self._anchors.pop()
+            if anchor["href"] and anchor["title"]:
+                self.results.append(anchor)
+
+    def handle_data(self, data):
+        if self._heading is not None:
+            self._heading.append(data)
+
+
+def parse_serp_page(html: str, page_url: str) -> Dict[str, Any]:
+    """Extracts organic results from raw results-page HTML, plus whether a next page exists."""
+    parser = _SerpParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    results = []
+    for anchor in parser.results:
+        url = unwrap_result_url(anchor["href"], page_url)
+        if is_result_url(url, page_url):
+            results.append({"title": anchor["title"], "url": url})
+    return {"results": results, "has_next": parser.has_next}
+
+
+def parse_serp_html(html: str, page_url: str) -> List[Dict[str, Any]]:
+    """Extracts organic results from raw results-page HTML (used for prefetched pages)."""
+    return parse_serp_page(html, page_url)["results"]
+
+
+def merge_results(results: List[Dict[str, Any]], page_results: List[Dict[str, Any]],
+                  seen: set, max_results: int) -> Dict[str, int]:
+    """Appends the results of one page that weren't seen on earlier pages.
+
+    Returns how many results were added and how many were duplicates.
+    """
+    added = duplicates = 0
+    for result in page_results:
+        if len(results) >= max_results:
+            break
+        key = canonicalize_url(result.get("url") or "")
+        if not key or key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        results.append({"position": len(results) + 1, "title": result["title"], "url": result["url"]})
+        added += 1
+    return {"added": added, "duplicates": duplicates}
+
+
+def paginate_results(search_url: str, load_page: Callable[[str], Any],
+                     max_results: int = 100, per_page: int = RESULTS_PER_PAGE,
+                     max_pages: int = MAX_SERP_PAGES, prefetch: bool = True) -> Dict[str, Any]:
+    """Collects results across result pages until max_results is reached or results run out.
+
+    While the browser (load_page) works on one page, the next page is fetched
+    statically in the background. When that prefetched HTML parses into
+    results it is used directly; otherwise (consent walls, JS-only layouts)
+    the browser loads the page as usual. load_page returns a list of results
+    or a parse_serp_page-style dict; a page without a "Next" link ends the
+    pagination. Prefetches and further pages respect the current deadline.
+    """
+    results = []
+    seen = set()
+    stats = {"pages": 0, "browser_pages": 0, "prefetched_pages": 0, "duplicates": 0, "stopped": "max_pages"}
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ideai-serp-prefetch") if prefetch else None
+    prefetched = None
+    # Read here, the prefetch thread doesn't see this context's deadline
+    deadline = current_deadline()
+
+    try:
+        for page in range(max_pages):
+            if deadline.expired():
+                stats["stopped"] = "deadline"
+                break
+            offset = page * per_page
+            url = serp_page_url(search_url, offset)
+
+            # Start on the next page before this one is extracted
+            next_prefetch = None
+            if executor and len(results) + per_page < max_results and page + 1 < max_pages:
+                next_prefetch = executor.submit(fetch_url, serp_page_url(search_url, offset + per_page),
+                                                timeout=max(1, deadline.cap(PREFETCH_TIMEOUT)))
+
+            page_data = None
+            if prefetched is not None:
+                response = prefetched.result()
+                if not response.get("error"):
+                    page_data = parse_serp_page(decode_body(response), response.get("url") or url)
+            if page_data and page_data["results"]:
+                stats["prefetched_pages"] += 1
+            else:
+                page_data = load_page(url)
+                stats["browser_pages"] += 1
+            stats["pages"] += 1
+            if isinstance(page_data, list):
+                page_data = {"results": page_data, "has_next": None}
+            page_results = page_data["results"]
+
+            merged = merge_results(results, page_results, seen, max_results)
+            added = merged["added"]
+            stats["duplicates"] += merged["duplicates"]
+            prefetched = next_prefetch
+            print(f"📄 Results page {page + 1}: {added} new, {len(results)} total")
+
+            if len(results) >= max_results:
+                stats["stopped"] = "max_results"
+                break
+            if added == 0:
+                stats["stopped"] = "dried_up"
+                break
+            if page_data.get("has_next") is False:
+                stats["stopped"] = "last_page"
+                break
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return {"results": results, "stats": stats}
+
+
+if __name__ == "__main__":
+    # Usage: python -m ideai.serp <search_url> [max_results]
+    # Paginates a results page (e.g. the fixture SERP from tests/fixtures.py) through the static parser only
+    search_url = sys.argv[1]
+    load_static = lambda url: parse_serp_page(decode_body(fetch_url(url)), url)
+    collected = paginate_results(search_url, load_static, max_results=int(sys.argv[2]) if len(sys.argv) > 2 else 100)
+    print(json.dumps(collected["stats"], indent=2))
@@ -0,0 +1,244 @@
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+DEFAULT_SESSION_ID = "default"
+
+# ADK session the current tool call belongs to; set before every tool call
+current_session_id = contextvars.ContextVar("ideai_session_id", default=DEFAULT_SESSION_ID)
+
+
+class SessionLimitError(Exception):
+    """Raised when a new research session would exceed the concurrent session cap."""
+
+
+def session_id_from_context(tool_context) -> str:
+    """Returns the ADK session ID a ToolContext belongs to."""
+    if tool_context is None:
+        return DEFAULT_SESSION_ID
+    session = getattr(tool_context, "session", None)
+    if session is None:
+        invocation_context = getattr(tool_context, "_invocation_context", None)
+        session = getattr(invocation_context, "session", None)
+    return getattr(session, "id", None) or DEFAULT_SESSION_ID
+
+
+class BrowserSession:
+    """Browser state owned by a single ADK session.
+
+    Each session drives its own tab, opened in a separate browser context of
+    the shared Chrome process when possible, so cookies and navigation never
+    leak between users.
+    """
+
+    def __init__(self, session_id: str, driver, window_handle: str, browser_context_id: Optional[str]):
+        self.session_id = session_id
+        self.driver = driver
+        self.window_handle = window_handle
+        self.browser_context_id = browser_context_id
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.link_index = {"token": None, "page_url": None, "links": []}
+        self.state: Dict[str, Any] = {}
+
+    def touch(self):
+        self.last_used = time.time()
+
+
+class SessionManager:
+    """Hands out isolated browser sessions from one shared Chrome process.
+
+    Admission is capped at max_sessions, and sessions idle for longer than
+    idle_timeout seconds are closed by a background reaper. on_close is
+    called with the ID of every session that is closed, explicitly or by
+    the reaper.
+    """
+
+    def __init__(self, launch_browser: Callable[[], Any], max_sessions: int = 4,
+                 idle_timeout: float = 900, reap_interval: float = 60,
+                 on_close: Optional[Callable[[str], None]] = None):
+        self.launch_browser = launch_browser
+        self.on_close = on_close
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self.host_driver = None
+        self.sessions: Dict[str, Optional[BrowserSession]] = {}
+        self.lock = threading.Lock()
+        self.session_locks: Dict[str, threading.Lock] = {}
+        self._reaper = None
+
+    def has_capacity_for(self, session_id: str) -> bool:
+        """Checks whether a session is already admitted or a slot is free for it."""
+        with self.lock:
+            return session_id in self.sessions or len(self.sessions) < self.max_sessions
+
+    def is_open(self, session_id: str) -> bool:
+        """Checks whether a session's browser has been opened (a reserved slot doesn't count)."""
+        with self.lock:
+            return self.sessions.get(session_id) is not None
+
+    def get(self, session_id: str) -> BrowserSession:
+        """Returns the browser session for an ADK session, creating it on first use."""
+        with self.lock:
+            if session_id not in self.sessions:
+                if len(self.sessions) >= self.max_sessions:
+                    raise SessionLimitError(
+                        f"Too many concurrent research sessions ({self.max_sessions}). Please try again later."
+                    )
+                # Reserve the slot before the slow browser work happens outside the lock
+                self.sessions[session_id] = None
+                self.session_locks[session_id] = threading.Lock()
+            session_lock = self.session_locks[session_id]
+
+        with session_lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                try:
+                    session = self._open_session(session_id)
+                except Exception:
+                    with self.lock:
+                        self.sessions.pop(session_id, None)
+                        self.session_locks.pop(session_id, None)
+                    raise
+                with self.lock:
+                    self.sessions[session_id] = session
+                self._start_reaper()
+            session.touch()
+            return session
+
+    def _ensure_host(self):
+        with self.lock:
+            if self.host_driver is None:
+                self.host_driver = self.launch_browser()
+            return self.host_driver
+
+    def _open_session(self, session_id: str) -> BrowserSession:
+        host = self._ensure_host()
+        if session_id == DEFAULT_SESSION_ID and not self._other_sessions(session_id):
+            # Single-user use keeps driving the shared browser directly
+            return BrowserSession(session_id, host, host.current_window_handle, None)
+        if not getattr(host, "shares_browser", True):
+            # Backends without a real browser (e.g. replay) give each session its own driver
+            session_driver = self.launch_browser()
+            return BrowserSession(session_id, session_driver, session_driver.current_window_handle, None)
+
+        debugger_address = host.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+        options = Options()
+        options.debugger_address = debugger_address
+        session_driver = webdriver.Chrome(options=options)
+        session_driver.set_page_load_timeout(host.timeouts.page_load)
+
+        browser_context_id = None
+        try:
+            # A separate browser context gives the session its own cookies and storage
+            browser_context_id = host.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+            target = host.execute_cdp_cmd("Target.createTarget", {
+                "url": "about:blank",
+                "browserContextId": browser_context_id,
+            })
+            session_driver.switch_to.window(target["targetId"])
+        except Exception as e:
+            print(f"⚠️ Isolated browser context unavailable, using a plain tab: {str(e)}")
+            session_driver.switch_to.new_window("tab")
+
+        print(f"🧭 Opened browser session for {session_id}")
+        return BrowserSession(session_id, session_driver, session_driver.current_window_handle, browser_context_id)
+
+    def _other_sessions(self, session_id: str) -> bool:
+        with self.lock:
+            return any(key != session_id for key in self.sessions)
+
+    def close(self, session_id: str):
+        """Closes the tab and browser context of a session and frees its slot."""
+        with self.lock:
+            admitted = session_id in self.sessions
+            session = self.sessions.pop(session_id, None)
+            self.session_locks.pop(session_id, None)
+        if admitted and self.on_close is not None:
+            try:
+                self.on_close(session_id)
+            except Exception as e:
+                print(f"⚠️ Error cleaning up session {session_id}: {str(e)}")
+        if session is None or session.driver is self.host_driver:
+            return
+        try:
+            session.driver.switch_to.window(session.window_handle)
+            session.driver.close()
+        except Exception:
+            pass
+        if session.browser_context_id:
+            try:
+                self.host_driver.execute_cdp_cmd("Target.disposeBrowserContext", {
+                    "browserContextId": session.browser_context_id
+                })
+            except Exception:
+                pass
+        try:
+            # Attached drivers only end their chromedriver session, the shared browser keeps running
+            session.driver.quit()
+        except Exception:
+            pass
+        print(f"🧹 Closed browser session for {session_id}")
+
+    def reap_idle_sessions(self) -> int:
+        """Closes sessions that have been idle for longer than idle_timeout."""
+        now = time.time()
+        with self.lock:
+            idle = [
+                session_id for session_id, session in self.sessions.items()
+                if session is not None and now - session.last_used > self.idle_timeout
+            ]
+        for session_id in idle:
+            self.close(session_id)
+        return len(idle)
+
+    def _start_reaper(self):
+        if self._reaper is not None:
+            return
+
+        def reap_forever():
+            while True:
+                time.sleep(self.reap_interval)
+                try:
+                    self.reap_idle_sessions()
+                except Exception as e:
+                    print(f"⚠️ Error reaping idle sessions: {str(e)}")
+
+        self._reaper = threading.Thread(target=reap_forever, name="ideai-session-reaper", daemon=True)
+        self._reaper.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns session counts for monitoring."""
+        with self.lock:
+            return {
+                "active_sessions": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "session_ids": list(self.sessions),
+            }
+
+    def shutdown(self):
+        """Closes every session and the shared browser."""
+        for session_id in list(self.sessions):
+            self.close(session_id)
+        if self.host_driver is not None:
+            try:
+                self.host_driver.quit()
+            except Exception:
+                pass
+            self.host_driver = None
+
+
+class SessionDriverProxy:
+    """Forwards WebDriver calls to the browser of the session making the tool call."""
+
+    def __init__(self, manager: SessionManager):
+        self._manager = manager
+
+    def __getattr__(self, name):
+        session = self._manager.get(current_session_id.get())
+        return getattr(session.driver, name)
@@ -0,0 +1,276 @@
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Iterator, List, Dict, Any, Optional
+
+from .saturation import FIGURE_PATTERN
+
+# Optional fast serializer and compression/columnar backends
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMAT_EXTENSIONS = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "jsonl.gz": ".jsonl.gz",
+    "jsonl.zst": ".jsonl.zst",
+    "parquet": ".parquet",
+}
+
+# Per-page columns of the Parquet table; the rest of the record is kept alongside as JSON
+PAGE_COLUMNS = [
+    "url", "title", "status", "error", "extracted_at", "meta_description",
+    "word_count", "figures", "screenshots", "main_content",
+]
+# JSONL datasets keep the same columns minus the page body in a small side file,
+# so projections like url/title/figures never decode full records
+ROW_COLUMNS = [name for name in PAGE_COLUMNS if name != "main_content"]
+JSONL_FORMATS = ("jsonl", "jsonl.gz", "jsonl.zst")
+
+
+def dumps(record: Any) -> bytes:
+    """Serializes a record to compact JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(record, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Parses JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def format_for_path(path: str) -> str:
+    """Infers the dataset format from a file name."""
+    for name, extension in sorted(FORMAT_EXTENSIONS.items(), key=lambda item: -len(item[1])):
+        if path.endswith(extension):
+            return name
+    raise ValueError(f"Unknown dataset format for {path}")
+
+
+def dataset_filename(prefix: str, dataset_format: str) -> str:
+    """Builds a dataset file name with the extension of the given format."""
+    return prefix + FORMAT_EXTENSIONS[dataset_format]
+
+
+def rows_path(path: str, dataset_format: str) -> str:
+    """Returns the side file holding the metadata rows of a JSONL dataset."""
+    return path[:-len(FORMAT_EXTENSIONS[dataset_format])] + ".rows" + FORMAT_EXTENSIONS[dataset_format]
+
+
+def page_figures(record: Dict[str, Any]) -> List[str]:
+    """Returns the figures extracted from a page record."""
+    analysis = record.get("analysis") or {}
+    if "figures" in analysis:
+        return list(analysis["figures"])
+    text = (record.get("content") or {}).get("main_content") or ""
+    return sorted({" ".join(match.group(0).split()) for match in FIGURE_PATTERN.finditer(text)})
+
+
+def page_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Flattens a page record into the per-page metadata columns."""
+    content = record.get("content") or {}
+    analysis = record.get("analysis") or {}
+    main_content = content.get("main_content") or ""
+    return {
+        "url": record.get("url"),
+        "title": record.get("title"),
+        "status": record.get("status"),
+        "error": record.get("error"),
+        "extracted_at": content.get("extracted_at"),
+        "meta_description": content.get("meta_description"),
+        "word_count": analysis.get("word_count", len(main_content.split())),
+        "figures": page_figures(record),
+        "screenshots": list(record.get("screenshots") or []),
+        "main_content": main_content,
+    }
+
+
+def _without_main_content(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Drops the page body, which the Parquet main_content column already holds."""
+    content = record.get("content")
+    if not isinstance(content, dict) or not content.get("main_content"):
+        return record
+    content = dict(content)
+    del content["main_content"]
+    return {**record, "content": content}
+
+
+def _with_main_content(record: Dict[str, Any], main_content: Optional[str]) -> Dict[str, Any]:
+    """Puts the main_content column back into a record read from Parquet."""
+    content = record.get("content")
+    if main_content and isinstance(content, dict) and "main_content" not in content:
+        content["main_content"] = main_content
+    return record
+
+
+def _open_binary(path: str, mode: str, dataset_format: str):
+    if dataset_format == "jsonl.gz":
+        return gzip.open(path, mode + "b", compresslevel=6)
+    if dataset_format == "jsonl.zst":
+        if zstandard is None:
+            raise ValueError("zstd datasets need the 'zstandard' package")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            return zstandard.ZstdCompressor(level=6).stream_writer(raw, closefd=True)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return open(path, mode + "b")
+
+
+def write_dataset(records: List[Dict[str, Any]], path: str, dataset_format: Optional[str] = None) -> str:
+    """Writes research records to a dataset file and returns its path.
+
+    Args:
+        records: Collected page records
+        path: Output file; the format is inferred from its extension when not given
+        dataset_format: One of json, jsonl, jsonl.gz, jsonl.zst, parquet
+    """
+    dataset_format = dataset_format or format_for_path(path)
+
+    if dataset_format == "json":
+        # Legacy format: one pretty-printed document
+        with open(path, "w") as f:
+            json.dump(records, f, indent=2)
+    elif dataset_format == "parquet":
+        if pyarrow is None:
+            raise ValueError("Parquet datasets need the 'pyarrow' package")
+        rows = [page_row(record) for record in records]
+        columns = {name: [row[name] for row in rows] for name in PAGE_COLUMNS}
+        columns["record_json"] = [dumps(_without_main_content(record)).decode("utf-8") for record in records]
+        pyarrow.parquet.write_table(pyarrow.table(columns), path, compression="zstd")
+    else:
+        with _open_binary(path, "w", dataset_format) as f, \
+                _open_binary(rows_path(path, dataset_format), "w", dataset_format) as rows:
+            for record in records:
+                f.write(dumps(record) + b"\n")
+                row = page_row(record)
+                rows.write(dumps({name: row[name] for name in ROW_COLUMNS}) + b"\n")
+    return path
+
+
+def _project(record: Dict[str, Any], columns: Optional[List[str]]) -> Dict[str, Any]:
+    if not columns:
+        return record
+    row = None
+    projected = {}
+    for name in columns:
+        if name in record:
+            projected[name] = record[name]
+        else:
+            # Derived columns such as figures or word_count
+            row = row or page_row(record)
+            projected[name] = row.get(name)
+    return projected
+
+
+def read_dataset(path: str, columns: Optional[List[str]] = None,
+                 dataset_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Streams records from a dataset file, optionally keeping only some columns.
+
+    Columns may be top-level record keys or any of PAGE_COLUMNS, e.g.
+    read_dataset(path, ["url", "title", "figures"]) never materializes page bodies
+    for Parquet files, and reads only the rows side file of JSONL files. Without
+    that file (datasets written before it existed) full records are decoded one
+    at a time.
+    """
+    dataset_format = dataset_format or format_for_path(path)
+
+    if dataset_format == "json":
+        with open(path) as f:
+            for record in json.load(f):
+                yield _project(record, columns)
+    elif dataset_format == "parquet":
+        if pyarrow is None:
+            raise ValueError("Parquet datasets need the 'pyarrow' package")
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        table_columns = set(parquet_file.schema_arrow.names)
+        if columns and all(name in table_columns for name in columns):
+            for batch in parquet_file.iter_batches(columns=columns):
+                yield from batch.to_pylist()
+        else:
+            for batch in parquet_file.iter_batches(columns=["record_json", "main_content"]):
+                for row in batch.to_pylist():
+                    record = _with_main_content(loads(row["record_json"]), row["main_content"])
+                    yield _project(record, columns)
+    else:
+        side_file = rows_path(path, dataset_format)
+        if columns and all(name in ROW_COLUMNS for name in columns) and os.path.exists(side_file):
+            path = side_file
+        with _open_binary(path, "r", dataset_format) as f:
+            for line in f:
+                if line.strip():
+                    yield _project(loads(line), columns)
+
+
+def load_dataset(path: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Reads a whole dataset into a list."""
+    return list(read_dataset(path, columns))
+
+
+def benchmark_formats(records: List[Dict[str, Any]], formats: Optional[List[str]] = None,
+                      columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Compares file size and load time of each available format against the legacy JSON file."""
+    formats = list(formats or ["json", "jsonl", "jsonl.gz"])
+    if zstandard is not None and "jsonl.zst" not in formats:
+        formats.append("jsonl.zst")
+    if pyarrow is not None and "parquet" not in formats:
+        formats.append("parquet")
+    columns = columns or ["url", "title", "figures"]
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for dataset_format in formats:
+            path = os.path.join(directory, dataset_filename("dataset", dataset_format))
+
+            start = time.perf_counter()
+            write_dataset(records, path, dataset_format)
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            load_dataset(path)
+            load_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            load_dataset(path, columns)
+            projected_seconds = time.perf_counter() - start
+
+            size = os.path.getsize(path)
+            if dataset_format in JSONL_FORMATS:
+                size += os.path.getsize(rows_path(path, dataset_format))
+            results.append({
+                "format": dataset_format,
+                "bytes": size,
+                "write_seconds": round(write_seconds, 4),
+                "load_seconds": round(load_seconds, 4),
+                "projected_load_seconds": round(projected_seconds, 4),
+            })
+
+    baseline = results[0]
+    for result in results:
+        result["size_ratio"] = round(result["bytes"] / baseline["bytes"], 3)
+        result["load_speedup"] = round(baseline["load_seconds"] / result["load_seconds"], 2) if result["load_seconds"] else None
+    return results
+
+
+if __name__ == "__main__":
+    # Usage: python -m ideai.storage business_niche_data_<timestamp>.json
+    print(json.dumps(benchmark_formats(load_dataset(sys.argv[1])), indent=2))
@@ -0,0 +1,269 @@
+import hashlib
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+FIXTURE_SITES = 20
+FIXTURE_SERP_RESULTS = 35  # Spread over result pages of 10 so pagination runs dry on page 4
+
+
+def fixture_serp_html(query: str, base_url: str, start: int = 0, per_page: int = 10,
+                      count: int = FIXTURE_SERP_RESULTS) -> str:
+    """Renders a Google-like results page whose results point at the fixture sites.
+
+    Like the real thing, each page after the first repeats the previous
+    page's last result, and a "Next" link is shown while results remain.
+    """
+    first = max(0, start - 1) if start else 0
+    results = "".join(
+        f'<div class="g"><div class="yuRUbf"><a href="{base_url}/site/{i}">'
+        f'<h3>{query} market report {i}</h3></a></div></div>'
+        for i in range(first, min(count, start + per_page))
+    )
+    next_link = ""
+    if start + per_page < count:
+        next_link = f'<a id="pnnext" href="/search?q={urllib.parse.quote_plus(query)}&start={start + per_page}">Next</a>'
+    return (f"<html><head><title>{query} - Search</title></head><body><div id='search'>{results}</div>"
+            f"{next_link}</body></html>")
+
+
+def fixture_site_html(site_id: int) -> str:
+    """Renders a small market research page with headings, figures and internal links."""
+    sections = "".join(
+        f"<h2>Segment {j}</h2><p>Segment {j} of provider {site_id} grew {5 + j}% in 2024 "
+        f"to ₹{(site_id + 1) * (j + 1) * 10} crore.</p><ul><li>Plan {j}: $ {j * 9 + 9} per month</li></ul>"
+        for j in range(8)
+    )
+    links = "".join(f'<a href="/site/{site_id}/pricing/{j}">Pricing plan {j}</a> ' for j in range(5))
+    links += f'<a href="/site/{site_id}/login">Login</a> <a href="/site/{site_id}/privacy">Privacy policy</a>'
+    return (f"<html><head><title>Provider {site_id}</title><meta name='description' content='Provider {site_id} report'>"
+            f"</head><body><nav>{links}</nav><article><h1>Provider {site_id}</h1>{sections}</article></body></html>")
+
+
+def fixture_subpage_html(site_id: int, path: str) -> str:
+    """Renders a page below a fixture site, linking one level deeper and to low-value pages."""
+    links = "".join(
+        f'<a href="/site/{site_id}/{path}/{name}">{text}</a> '
+        for name, text in (("details", "Pricing details"), ("login", "Login"), ("careers", "Careers"))
+    )
+    title = f"Provider {site_id} {path.replace('/', ' ')}"
+    return (f"<html><head><title>{title}</title></head><body><nav>{links}</nav><article><h1>{title}</h1>"
+            f"<p>{title} costs ${len(path) * 7 + site_id} per month.</p></article></body></html>")
+
+
+def fixture_text_report() -> str:
+    """Renders a plain text market report, like a CSV or TXT download linked from results."""
+    return "\n\n".join(f"Segment {j} grew {5 + j}% in 2024 to $ {(j + 1) * 12} million." for j in range(6))
+
+
+def fixture_pdf_report(pages: int = 3, padding: int = 0) -> bytes:
+    """Renders a PDF report with one line of text per page.
+
+    Page objects come first and `padding` bytes of an unreferenced stream
+    follow them, like the embedded images that make real reports large, so
+    the pages can be read from the start of a file cut short.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = f"BT /F1 12 Tf 72 720 Td (Page {page + 1}: revenue grew {page + 5}% in 2024) Tj ET".encode("ascii")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % (len(objects)))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+    objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (padding, b"0" * padding))
+    objects.append(b"<< /Title (Fixture market report) >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, len(objects), xref)
+    return bytes(output)
+
+
+def fixture_corpus(count: int = FIXTURE_SITES * 2, distinct: int = FIXTURE_SITES // 2) -> List[Dict[str, Any]]:
+    """Builds collected page records of a run where later results mostly repeat earlier ones.
+
+    The first `distinct` pages are original reports; the rest are copies of
+    them syndicated on a few aggregator domains, in interleaved result order.
+    """
+    from ideai.postprocess import parse_page_html
+
+    pages = []
+    for i in range(count):
+        if i < distinct:
+            url = f"http://provider{i}.example/report"
+        else:
+            url = f"http://aggregator{i % 3}.example/reports/{i}"
+        content = parse_page_html(fixture_site_html(i % distinct), url)
+        pages.append({"url": url, "title": content["title"], "status": "success", "content": content})
+    # Search results interleave originals and copies
+    return pages[::2] + pages[1::2]
+
+
+def fixture_infinite_scroll_html() -> str:
+    """Renders a page that appends more content whenever it is scrolled near the bottom, forever."""
+    return """<html><head><title>Endless feed</title></head><body><article><h1>Endless feed</h1><div id="feed"></div></article>
+<script>
+var count = 0;
+function more() {
+  var feed = document.getElementById("feed");
+  for (var i = 0; i < 20; i++) {
+    var p = document.createElement("p");
+    p.textContent = "Feed item " + (++count) + ": providers grew " + (count % 30) + "% this quarter.";
+    p.style.height = "120px";
+    feed.appendChild(p);
+  }
+}
+more();
+window.addEventListener("scroll", function () {
+  if (window.innerHeight + window.pageYOffset > document.body.scrollHeight - 1500) more();
+});
+</script></body></html>"""
+
+
+# Downloads served under /files/: (body, Content-Type); the Office file and the
+# generic download have no extension, so only their headers or bytes tell
+FIXTURE_FILES = {
+    "report.pdf": (lambda: fixture_pdf_report(), "application/pdf"),
+    "large-report.pdf": (lambda: fixture_pdf_report(padding=256 * 1024), "application/pdf"),
+    "paper": (lambda: fixture_pdf_report(), "application/octet-stream"),
+    "installer": (lambda: b"MZ" + bytes(4096), "application/octet-stream"),
+    "deck": (lambda: b"PK" + bytes(4096), "application/vnd.openxmlformats-officedocument.presentationml.presentation"),
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the fixture SERP, sites and downloads, honouring single byte ranges."""
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body: bool):
+        # Slow or failing hosts are simulated per server
+        if self.server.fixture_delay:
+            time.sleep(self.server.fixture_delay)
+        if self.server.fixture_status != 200:
+            self.send_error(self.server.fixture_status, "Access Denied")
+            return
+        parsed = urllib.parse.urlsplit(self.path)
+        base_url = f"http://{self.headers.get('Host')}"
+        content_type = "text/html; charset=utf-8"
+        if parsed.path == "/search":
+            params = urllib.parse.parse_qs(parsed.query)
+            start = int(params.get("start", ["0"])[0])
+            body = fixture_serp_html(params.get("q", [""])[0], base_url, start=start)
+        elif parsed.path == "/infinite":
+            body = fixture_infinite_scroll_html()
+        elif parsed.path == "/files/report.txt":
+            body, content_type = fixture_text_report(), "text/plain; charset=utf-8"
+        elif parsed.path.startswith("/files/") and parsed.path[len("/files/"):] in FIXTURE_FILES:
+            render, content_type = FIXTURE_FILES[parsed.path[len("/files/"):]]
+            body = render()
+        elif parsed.path.startswith("/site/"):
+            parts = parsed.path.strip("/").split("/")
+            try:
+                site_id = int(parts[1])
+            except ValueError:
+                self.send_error(404)
+                return
+            body = fixture_subpage_html(site_id, "/".join(parts[2:])) if len(parts) > 2 else fixture_site_html(site_id)
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode("utf-8") if isinstance(body, str) else body
+        # Validators like a static file server's, so refreshes can send conditional requests
+        etag = f'"{hashlib.sha1(payload).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        byte_range = self.byte_range(len(payload))
+        if byte_range:
+            first, last = byte_range
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(payload)}")
+            payload = payload[first:last + 1]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if not send_body:
+            return
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on a slow host
+            pass
+
+    def byte_range(self, size: int):
+        """Parses a "bytes=first-last" or "bytes=-suffix" Range header into inclusive offsets."""
+        header = self.headers.get("Range", "")
+        if not header.startswith("bytes=") or "," in header:
+            return None
+        first, _, last = header[len("bytes="):].partition("-")
+        try:
+            if not first:
+                return max(0, size - int(last)), size - 1
+            return int(first), min(size - 1, int(last)) if last else size - 1
+        except ValueError:
+            return None
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(host: str = "127.0.0.1", delay: float = 0.0, status: int = 200,
+                         port: int = 0) -> ThreadingHTTPServer:
+    """Starts the fixture site on a local port (a free one by default) in a background thread.
+
+    delay and status turn the server into a slow or failing host.
+    """
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    server.daemon_threads = True
+    server.fixture_delay = delay
+    server.fixture_status = status
+    threading.Thread(target=server.serve_forever, name="ideai-fixture-site", daemon=True).start()
+    return server
+
+
+def stub_model(prompt: str, latency: float = 0.5) -> str:
+    """Stands in for the LLM: waits like a model call and returns a canned report."""
+    time.sleep(latency)
+    return f"## MARKET ANALYSIS\n- Stub analysis of a {len(prompt)} character prompt"
+
+
+if __name__ == "__main__":
+    # Usage: python tests/fixtures.py [port]
+    # Serves a healthy, a slow and a blocking fixture host for the load test and benchmarks
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    servers = [
+        start_fixture_server("127.0.0.1", port=port),
+        start_fixture_server("127.0.0.2", delay=5.0, port=port),
+        start_fixture_server("127.0.0.3", status=403, port=port),
+    ]
+    print(f"Search: http://127.0.0.1:{port}/search?q={{query}}")
+    print(f"Hosts: http://127.0.0.1:{port} (healthy), http://127.0.0.2:{port} (slow), http://127.0.0.3:{port} (403)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
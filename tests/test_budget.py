@@ -0,0 +1,64 @@
+import os
+import time
+
+from ideai.budget import BudgetManager, estimate_tokens, session_file_token
+
+
+def manager(tmp_path, **options):
+    return BudgetManager(payload_directory=str(tmp_path / "payloads"), **options)
+
+
+def test_fits_large_outputs_behind_a_handle(tmp_path):
+    budget = manager(tmp_path, max_output_tokens=1000)
+    fitted = budget.fit("session-1", "get_page_source", "x" * 20000)
+    assert estimate_tokens(fitted) < 1000
+    assert budget.load_payload("session-1", fitted["payload_handle"]) == "x" * 20000
+
+
+def test_handles_only_resolve_for_their_session(tmp_path):
+    budget = manager(tmp_path)
+    handle = budget.store_payload("session-1", "secret")
+    assert budget.load_payload("session-2", handle) is None
+    assert budget.load_payload("session-1", "../session-1/" + handle) is None
+
+
+def test_session_ids_cannot_escape_the_payload_directory(tmp_path):
+    budget = manager(tmp_path)
+    handle = budget.store_payload("../../escaped", "data")
+    stored = [os.path.join(root, name) for root, _, names in os.walk(tmp_path) for name in names]
+    assert stored == [os.path.join(budget._session_directory("../../escaped"), f"{handle}.txt")]
+    assert stored[0].startswith(str(tmp_path / "payloads") + os.sep)
+    assert session_file_token("a/b") != session_file_token("a_b")
+    assert session_file_token("abc-123") == "abc-123"
+
+
+def test_evicts_oldest_payloads_past_the_session_cap(tmp_path):
+    budget = manager(tmp_path, max_session_bytes=2500)
+    handles = []
+    for i in range(4):
+        handles.append(budget.store_payload("session-1", str(i) * 1000))
+        # Distinct modification times keep the eviction order deterministic
+        path = budget._payload_path("session-1", handles[-1])
+        os.utime(path, (time.time() - 10 + i, time.time() - 10 + i))
+    assert [budget.load_payload("session-1", handle) is not None for handle in handles] == [False, False, True, True]
+
+
+def test_sweeps_expired_payloads(tmp_path):
+    budget = manager(tmp_path, payload_max_age=60)
+    old = budget.store_payload("session-1", "old")
+    fresh = budget.store_payload("session-2", "fresh")
+    stale = time.time() - 120
+    os.utime(budget._payload_path("session-1", old), (stale, stale))
+    assert budget.sweep_expired(force=True) == 1
+    assert budget.load_payload("session-1", old) is None
+    assert budget.load_payload("session-2", fresh) == "fresh"
+
+
+def test_discards_payloads_of_closed_sessions(tmp_path):
+    budget = manager(tmp_path)
+    handle = budget.store_payload("session-1", "data")
+    other = budget.store_payload("session-2", "data")
+    budget.discard_payloads("session-1")
+    assert not os.path.exists(budget._session_directory("session-1"))
+    assert budget.load_payload("session-1", handle) is None
+    assert budget.load_payload("session-2", other) == "data"
@@ -0,0 +1,109 @@
+import re
+import time
+import urllib.parse
+
+import pytest
+
+from fixtures import start_fixture_server
+from ideai.crawler import FocusedCrawler
+from ideai.fetch import decode_body, fetch_url
+from ideai.links import build_link_records, filter_links
+
+ANCHOR = re.compile(r'<a href="([^"]+)">([^<]*)</a>')
+
+
+@pytest.fixture
+def fixture_site():
+    server = start_fixture_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def page_links(html, page_url):
+    """Builds internal link records the way the browser's link index does."""
+    raw = [{"href": urllib.parse.urljoin(page_url, href), "text": text, "visible": True}
+           for href, text in ANCHOR.findall(html)]
+    return filter_links(build_link_records(raw, page_url), scope="internal")
+
+
+class Visitor:
+    """Fetches fixture pages statically and records how the crawler asked for them."""
+
+    def __init__(self):
+        self.visits = []
+
+    def __call__(self, url, collect_links):
+        self.visits.append((url, collect_links))
+        response = fetch_url(url)
+        if response.get("error"):
+            return {"url": url, "status": "failed"}, []
+        html = decode_body(response)
+        return {"url": url, "status": "success"}, page_links(html, url) if collect_links else []
+
+
+def seeded_crawler(base_url, **options):
+    crawler = FocusedCrawler("pricing plans", **options)
+    start_url = f"{base_url}/site/0"
+    crawler.mark_visited(start_url)
+    crawler.add_links(page_links(decode_body(fetch_url(start_url)), start_url), depth=1, source_url=start_url)
+    return crawler
+
+
+def test_visits_relevant_links_and_skips_low_value_ones(fixture_site):
+    visitor = Visitor()
+    result = seeded_crawler(fixture_site, max_depth=1).run(visitor)
+    urls = [url for url, _ in visitor.visits]
+    assert urls and all("/pricing/" in url for url in urls)
+    assert not any(url.endswith(("/login", "/privacy")) for url in urls)
+    assert result["stats"]["stop_reason"] == "frontier exhausted"
+
+
+def test_does_not_harvest_links_at_max_depth(fixture_site):
+    visitor = Visitor()
+    result = seeded_crawler(fixture_site, max_depth=1).run(visitor)
+    assert visitor.visits and not any(collect for _, collect in visitor.visits)
+    assert result["stats"]["pages_queued"] == 0
+
+
+def test_follows_links_one_level_deeper_after_the_first(fixture_site):
+    visitor = Visitor()
+    result = seeded_crawler(fixture_site, max_depth=2, max_pages_per_site=20).run(visitor)
+    depths = [page["crawl"]["depth"] for page in result["pages"]]
+    assert 2 in depths
+    # Best-first within a level, but a level is finished before the next one starts
+    assert depths == sorted(depths)
+    assert all(collect == (depth == 1) for (_, collect), depth in zip(visitor.visits, depths))
+    assert all(page["url"].endswith("/details") for page in result["pages"] if page["crawl"]["depth"] == 2)
+
+
+def test_stops_at_the_page_limit(fixture_site):
+    result = seeded_crawler(fixture_site, max_pages=2).run(Visitor())
+    assert result["stats"]["pages_visited"] == 2
+    assert result["stats"]["stop_reason"] == "page limit reached"
+    assert result["stats"]["pages_queued"] > 0
+
+
+def test_stops_at_the_time_budget():
+    slow = start_fixture_server(delay=0.2)
+    try:
+        base_url = f"http://127.0.0.1:{slow.server_address[1]}"
+        crawler = seeded_crawler(base_url, time_budget=0.3)
+        start = time.perf_counter()
+        result = crawler.run(Visitor())
+        elapsed = time.perf_counter() - start
+    finally:
+        slow.shutdown()
+    assert result["stats"]["stop_reason"] == "time budget exhausted"
+    assert result["stats"]["pages_visited"] < 5
+    assert elapsed < 1.5
+
+
+def test_reports_useful_pages_per_second(fixture_site):
+    visitor = Visitor()
+    crawler = seeded_crawler(fixture_site, max_pages_per_site=10)
+    # One queued link points at a page the fixture site cannot serve
+    crawler.add_links([{"href": f"{fixture_site}/missing/pricing", "text": "Pricing", "internal": True}], depth=1)
+    stats = crawler.run(visitor)["stats"]
+    assert stats["pages_visited"] == len(visitor.visits)
+    assert stats["useful_pages"] == stats["pages_visited"] - 1
+    assert 0 < stats["useful_pages_per_second"] <= stats["pages_per_second"]
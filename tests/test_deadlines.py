@@ -0,0 +1,77 @@
+import math
+import time
+
+import pytest
+
+from fixtures import start_fixture_server
+from ideai.deadlines import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+
+# Slack for browser round trips after a deadline expires
+SLACK_SECONDS = 3
+
+
+def test_unbounded_deadline_never_expires():
+    deadline = Deadline()
+    assert deadline.remaining() == math.inf
+    assert not deadline.expired()
+    assert deadline.cap(7) == 7
+
+
+def test_child_never_outlives_parent():
+    parent = Deadline(2)
+    assert parent.child(60).remaining() <= 2
+    assert parent.child(60, reserve=1).remaining() <= 1
+    assert Deadline().child(0.5).remaining() <= 0.5
+
+
+def test_check_raises_once_expired():
+    deadline = Deadline(0)
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("test")
+
+
+def test_deadline_scope_sets_and_restores():
+    outer = current_deadline()
+    with deadline_scope(Deadline(5)) as deadline:
+        assert current_deadline() is deadline
+    assert current_deadline() is outer
+
+
+@pytest.fixture(scope="module")
+def browser_agent():
+    agent = pytest.importorskip("ideai.agent")
+    result = agent.initialize_driver()
+    if "Failed" in result:
+        pytest.skip(result)
+    yield agent
+    agent.close_browser_session()
+
+
+@pytest.fixture(scope="module")
+def infinite_page():
+    server = start_fixture_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}/infinite"
+    server.shutdown()
+
+
+def test_scroll_to_bottom_stops_on_infinite_page(browser_agent, infinite_page):
+    assert browser_agent.go_to_url(infinite_page).startswith("Successfully")
+    start = time.monotonic()
+    with deadline_scope(Deadline(5)):
+        result = browser_agent.scroll_to_bottom()
+    assert result.startswith("Stopped scrolling")
+    assert time.monotonic() - start < 5 + SLACK_SECONDS
+
+
+def test_extract_page_content_returns_truncated_result(browser_agent, infinite_page):
+    browser_agent.go_to_url(infinite_page)
+    with deadline_scope(Deadline(3)):
+        browser_agent.scroll_to_bottom()
+    start = time.monotonic()
+    with deadline_scope(Deadline(0.05)):
+        content = browser_agent.extract_page_content()
+    assert "error" not in content
+    assert "truncated" in content
+    assert content["title"] == "Endless feed"
+    assert time.monotonic() - start < 0.05 + SLACK_SECONDS
@@ -0,0 +1,112 @@
+import pytest
+
+from fixtures import fixture_pdf_report, start_fixture_server
+from ideai.documents import (HTML, MEDIA, OFFICE, PDF, TEXT, classify_content_type, classify_url, extract_pdf,
+                             preflight, sniff_kind)
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = start_fixture_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_classify_url():
+    assert classify_url("https://www.youtube.com/watch?v=abc") == MEDIA
+    assert classify_url("https://youtu.be/abc") == MEDIA
+    assert classify_url("http://example.com/files/demo.MP4") == MEDIA
+    assert classify_url("http://example.com/deck.pptx?download=1") == OFFICE
+    assert classify_url("http://example.com/report.pdf") == PDF
+    assert classify_url("http://example.com/data.csv") == TEXT
+    assert classify_url("http://example.com/pricing") is None
+    assert classify_url("http://example.com/pdf/overview.html") is None
+
+
+def test_classify_content_type():
+    assert classify_content_type("text/html; charset=utf-8") == HTML
+    assert classify_content_type("application/pdf") == PDF
+    assert classify_content_type("text/csv") == TEXT
+    assert classify_content_type("application/vnd.ms-excel") == OFFICE
+    assert classify_content_type("application/vnd.openxmlformats-officedocument.wordprocessingml.document") == OFFICE
+    assert classify_content_type("video/mp4") == MEDIA
+    assert classify_content_type("application/octet-stream") is None
+    assert classify_content_type("") is None
+
+
+def test_sniff_kind():
+    assert sniff_kind(b"\n%PDF-1.7\n") == PDF
+    assert sniff_kind(b"<!DOCTYPE html><html>") == HTML
+    assert sniff_kind(b"  <div><head><title>x</title></head>") == HTML
+    assert sniff_kind(b"MZ\x90\x00") is None
+
+
+def test_preflight_decides_from_the_url_without_requests():
+    # Nothing listens on this port, so any request would fail
+    assert preflight("http://127.0.0.1:9/report.pdf") == {"kind": PDF, "method": "url"}
+    assert preflight("http://127.0.0.1:9/deck.docx") == {"kind": OFFICE, "method": "url"}
+
+
+def test_preflight_uses_head_then_sniffs(base_url):
+    page = preflight(f"{base_url}/site/1")
+    assert (page["kind"], page["method"]) == (HTML, "head")
+    assert page["http_validators"]["etag"]
+
+    deck = preflight(f"{base_url}/files/deck")
+    assert (deck["kind"], deck["method"]) == (OFFICE, "head")
+
+    # A generic Content-Type leaves it to the first bytes
+    paper = preflight(f"{base_url}/files/paper")
+    assert (paper["kind"], paper["method"]) == (PDF, "sniff")
+    installer = preflight(f"{base_url}/files/installer")
+    assert (installer["kind"], installer["method"]) == (MEDIA, "sniff")
+
+
+def test_preflight_falls_back_to_html_when_unreachable():
+    assert preflight("http://127.0.0.1:9/pricing", timeout=1)["kind"] == HTML
+
+
+def test_extracts_pdf_text(base_url):
+    pytest.importorskip("pypdf")
+    content = extract_pdf(f"{base_url}/files/report.pdf")
+    assert content["title"] == "Fixture market report"
+    assert "Page 2: revenue grew 6% in 2024" in content["main_content"]
+    assert content["document"]["pages_extracted"] == 3
+    assert not content["document"]["truncated"]
+
+
+def test_reads_the_start_of_a_pdf_larger_than_the_download_limit(base_url):
+    pytest.importorskip("pypdf")
+    size = len(fixture_pdf_report(padding=256 * 1024))
+    content = extract_pdf(f"{base_url}/files/large-report.pdf", max_bytes=16 * 1024, tail_bytes=8 * 1024)
+    document = content["document"]
+    assert document["truncated"]
+    assert document["pages_extracted"] == 3
+    assert "Page 3: revenue grew 7% in 2024" in content["main_content"]
+    # Only the start and the trailer were downloaded
+    assert document["bytes_downloaded"] < size / 2
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    agent = pytest.importorskip("ideai.agent")
+    monkeypatch.chdir(tmp_path)
+
+    def navigate(url, hedge=False):
+        raise AssertionError(f"{url} should not reach the browser")
+
+    monkeypatch.setattr(agent, "navigate", navigate)
+    return agent
+
+
+def test_media_and_office_targets_skip_the_browser(agent, base_url):
+    video = agent.visit_and_extract("https://www.youtube.com/watch?v=abc")
+    assert video["status"] == "skipped" and "Not a web page" in video["reason"]
+    installer = agent.visit_and_extract(f"{base_url}/files/installer")
+    assert installer["status"] == "skipped" and "Not a web page" in installer["reason"]
+
+    deck = agent.visit_and_extract(f"{base_url}/files/deck")
+    assert deck["status"] == "skipped"
+    assert "presentationml" in deck["reason"]
+    assert agent.visit_and_extract("http://127.0.0.1:9/budget.xlsx")["reason"] == "Unsupported document (Office file)"
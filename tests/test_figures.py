@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from fixtures import fixture_corpus
+from ideai.figures import aggregate_figures, format_figure_table, parse_figure, summarize_figures
+
+YEAR = 2026
+
+
+def figure(value, year=YEAR, metric="pricing", unit="USD", domain="a.example"):
+    return {"metric": metric, "unit": unit, "value": value, "year": year, "domain": domain, "raw": str(value)}
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("$ 9", 9.0),
+    ("USD 2.5 million", 2.5e6),
+    ("₹10 crore", 10 * 1e7 * 0.012),
+    ("Rs. 5 lakh", 5 * 1e5 * 0.012),
+    ("€2bn", 2e9 * 1.08),
+    ("£1,200", 1200 * 1.27),
+])
+def test_normalizes_currencies_to_usd(raw, expected):
+    parsed = parse_figure(raw)
+    assert parsed["unit"] == "USD"
+    assert parsed["value"] == pytest.approx(expected)
+
+
+def test_percentages_and_bare_numbers():
+    assert parse_figure("12.5%") == {"unit": "%", "value": 12.5}
+    assert parse_figure("7 percent") == {"unit": "%", "value": 7.0}
+    # Without a currency "5 million" could be users or units
+    assert parse_figure("5 million") is None
+
+
+def test_flags_iqr_outliers():
+    [summary] = aggregate_figures([figure(value) for value in (10, 11, 12, 13, 14, 1000)], current_year=YEAR)
+    assert summary["count"] == 6
+    assert summary["outliers"] == 1
+    assert summary["outlier_values"] == [1000]
+    assert summary["max"] == 14
+
+
+def test_weighted_median_prefers_recent_figures():
+    figures = [figure(100), figure(110)] + [figure(value, year=YEAR - 16) for value in (300, 310, 320)]
+    [summary] = aggregate_figures(figures, current_year=YEAR)
+    assert summary["median"] == 300
+    assert summary["weighted_median"] == 110
+
+
+def test_undated_figures_count_as_a_few_years_old():
+    figures = [figure(100, year=None), figure(200, year=YEAR)]
+    [summary] = aggregate_figures(figures, current_year=YEAR)
+    assert summary["weighted_median"] == 200
+
+
+def test_groups_by_metric_and_unit():
+    figures = [figure(5, metric="growth_rate", unit="%"), figure(9), figure(12, domain="b.example")]
+    summaries = {row["metric"]: row for row in aggregate_figures(figures, current_year=YEAR)}
+    assert summaries["pricing"]["sources"] == 2
+    assert summaries["growth_rate"]["unit"] == "%"
+
+
+def test_summarizes_the_fixture_corpus():
+    summary = summarize_figures(fixture_corpus(count=10, distinct=5), current_year=YEAR)
+    metrics = {row["metric"] for row in summary["metrics"]}
+    assert "pricing" in metrics
+    assert summary["table"].startswith("metric |")
+
+
+def test_no_figures_give_no_table():
+    pages = [{"url": "http://a.example", "status": "success",
+              "content": {"main_content": "A friendly bakery with great coffee."}}]
+    summary = summarize_figures(pages)
+    assert summary["figures"] == 0
+    assert summary["table"] == "" == format_figure_table([])
+
+
+def test_prompt_keeps_full_pages_without_figures():
+    agent = pytest.importorskip("ideai.agent")
+    pages = [{"url": "http://a.example", "title": "Bakery", "status": "success",
+              "content": {"main_content": "A friendly bakery with great coffee.", "paragraphs": []}}]
+    prompt = agent.analyze_business_data(pages)
+    assert "A friendly bakery with great coffee." in prompt
+    assert "metric |" not in prompt
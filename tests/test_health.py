@@ -0,0 +1,89 @@
+import time
+
+from ideai.health import CLOSED, HALF_OPEN, OPEN, HealthTracker, is_blocked_page
+
+URL = "http://slow.example/report"
+
+
+def expire(tracker, url=URL):
+    tracker._domain(url).open_until = time.time() - 1
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    tracker = HealthTracker(failure_threshold=3, open_seconds=60)
+    for _ in range(2):
+        tracker.record_failure(URL, "timeout")
+        assert tracker.allow(URL)
+    tracker.record_failure(URL, "timeout")
+    assert tracker.state(URL) == OPEN
+    assert not tracker.allow(URL)
+    assert not tracker.allow("http://slow.example/other")
+    assert tracker.stats()["quick_fails"] == 2
+    assert tracker.stats()["open_domains"] == ["slow.example"]
+    # Other domains are unaffected
+    assert tracker.allow("http://fast.example/")
+
+
+def test_blocked_opens_immediately():
+    tracker = HealthTracker(failure_threshold=3)
+    tracker.record_failure(URL, "blocked")
+    assert tracker.state(URL) == OPEN
+
+
+def test_success_resets_the_failure_count():
+    tracker = HealthTracker(failure_threshold=2)
+    tracker.record_failure(URL)
+    tracker.record_success(URL, 1.0)
+    tracker.record_failure(URL)
+    assert tracker.state(URL) == CLOSED
+
+
+def test_half_open_trial_closes_on_success():
+    tracker = HealthTracker(failure_threshold=1, open_seconds=60)
+    tracker.record_failure(URL)
+    expire(tracker)
+    assert tracker.allow(URL)
+    assert tracker.state(URL) == HALF_OPEN
+    tracker.record_success(URL, 0.5)
+    assert tracker.state(URL) == CLOSED
+    assert tracker.allow(URL)
+
+
+def test_failed_trial_reopens_for_twice_as_long():
+    tracker = HealthTracker(failure_threshold=1, open_seconds=60)
+    tracker.record_failure(URL)
+    expire(tracker)
+    assert tracker.allow(URL)
+    before = time.time()
+    tracker.record_failure(URL)
+    health = tracker._domain(URL)
+    assert tracker.state(URL) == OPEN
+    assert health.opened == 2
+    assert before + 120 <= health.open_until <= time.time() + 120
+    assert not tracker.allow(URL)
+
+
+def test_p90_falls_back_to_all_domains_until_enough_samples():
+    tracker = HealthTracker(min_samples=5)
+    assert tracker.p90(URL) is None
+    for i in range(10):
+        tracker.record_success(f"http://site{i}.example/", float(i + 1))
+    # slow.example has no samples of its own yet, so the global p90 applies
+    assert tracker.p90(URL) == 10.0
+    for _ in range(5):
+        tracker.record_success(URL, 2.0)
+    assert tracker.p90(URL) == 2.0
+
+
+def test_backoff_is_bounded():
+    tracker = HealthTracker(base_backoff=1.0, max_backoff=4.0)
+    assert all(0 <= tracker.backoff(attempt) <= min(4.0, 2 ** attempt) for attempt in range(8))
+
+
+def test_is_blocked_page():
+    assert is_blocked_page("Access Denied") == "access denied"
+    assert is_blocked_page("Example", "Please verify you are human to continue") == "verify you are human"
+    assert is_blocked_page("Example", status=429) == "HTTP 429"
+    assert is_blocked_page("Market report", "Revenue grew 12% in 2024.", status=200) is None
+    # Long pages that merely mention a marker are real content
+    assert is_blocked_page("Market report", "Too many requests slow the API. " + "x" * 4000) is None
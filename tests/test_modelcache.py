@@ -0,0 +1,164 @@
+import json
+import types as pytypes
+
+import pytest
+
+from fixtures import stub_model
+from ideai.modelcache import ModelCache, cached_generate, repeats_volatile_values, request_key, volatile_values
+
+
+def research_turn(extracted_at, handle, elapsed, call_id="adk-1"):
+    """A conversation whose tool result carries per-run values, like the agent's."""
+    pages = [{"url": "https://example.com", "content": {"extracted_at": extracted_at, "main_content": "Plumbing market"}}]
+    return [
+        {"role": "user", "parts": [{"text": "Research the   plumbing niche"}]},
+        {"role": "model", "parts": [{"function_call": {"name": "analyze_business_data", "args": {}}}]},
+        {"role": "user", "parts": [{"function_response": {
+            "name": "analyze_business_data",
+            "response": {
+                "result": f"Data: {json.dumps(pages, indent=2)} saved to business_niche_data_{extracted_at[:10].replace('-', '')}-101010.jsonl.gz",
+                "details": {"payload_handle": handle, "elapsed_seconds": elapsed},
+            },
+        }}]},
+    ]
+
+
+def test_key_ignores_per_run_values():
+    first = request_key("m", "system", research_turn("2026-10-19T10:00:00.123456", "payload-0123456789ab", 1.5))
+    second = request_key("m", "system", research_turn("2026-10-20T11:11:11.000001", "payload-ba9876543210", 7.0))
+    assert first == second
+
+
+def test_masked_values_are_collected_from_the_request():
+    values = volatile_values(research_turn("2026-10-19T10:00:00.123456", "payload-0123456789ab", 1.5))
+    assert {"2026-10-19T10:00:00.123456", "payload-0123456789ab", "1.5", "20261019-101010"} <= values
+    assert repeats_volatile_values('{"name": "fetch_payload", "args": {"handle": "payload-0123456789ab"}}', values)
+    assert repeats_volatile_values("Loading took 1.5 seconds", values)
+    assert not repeats_volatile_values("Margins rose 11.5% while 1.55 million homes were built", values)
+
+
+def test_key_changes_with_prompt_model_and_system_instruction():
+    contents = [{"role": "user", "parts": [{"text": "Research plumbing"}]}]
+    other = [{"role": "user", "parts": [{"text": "Research roofing"}]}]
+    key = request_key("m", "system", contents)
+    assert key == request_key("m", "system", [{"role": "user", "parts": [{"text": " Research\n plumbing "}]}])
+    assert key != request_key("m", "system", other)
+    assert key != request_key("other-model", "system", contents)
+    assert key != request_key("m", "other system", contents)
+
+
+def test_cache_persists_and_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ModelCache(path, max_bytes=1000)
+    for i in range(5):
+        cache.put(str(i), "x" * 300)
+    assert cache.stats()["evictions"] == 2
+    assert cache.get("0") is None
+    assert ModelCache(path).get("4") == "x" * 300
+
+
+def test_cached_generate_with_stub_model(tmp_path):
+    cache = ModelCache(str(tmp_path / "cache.sqlite"))
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        return stub_model(prompt, latency=0)
+
+    for _ in range(3):
+        cached_generate(cache, generate, "stub", "system", "Analyze plumbing")
+    cached_generate(cache, generate, "stub", "system", "Analyze plumbing", use_cache=False)
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (2, 1, 1)
+
+
+def test_responses_quoting_per_run_values_are_not_cached(tmp_path):
+    cache = ModelCache(str(tmp_path / "cache.sqlite"))
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        return f"Read the rest with fetch_payload('{prompt.split()[-1]}')"
+
+    first = cached_generate(cache, generate, "stub", "system", "Output stored as payload-0123456789ab")
+    second = cached_generate(cache, generate, "stub", "system", "Output stored as payload-ba9876543210")
+    assert len(calls) == 2
+    assert "payload-ba9876543210" in second and "payload-0123456789ab" in first
+    assert cache.stats()["stores"] == 0
+
+
+def test_agent_callbacks_serve_repeated_requests(tmp_path, monkeypatch):
+    agent = pytest.importorskip("ideai.agent")
+    from google.adk.models import LlmRequest, LlmResponse
+    from google.genai import types
+
+    monkeypatch.setattr(agent, "model_cache", ModelCache(str(tmp_path / "cache.sqlite")))
+    model_calls = []
+
+    def stub_llm(llm_request):
+        model_calls.append(llm_request)
+        text = stub_model(llm_request.contents[-1].parts[0].text or "", latency=0)
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+    def call_model(llm_request, state=None):
+        callback_context = pytypes.SimpleNamespace(state=state or {}, invocation_id=f"inv-{len(model_calls)}")
+        cached = agent.serve_cached_model_response(callback_context, llm_request)
+        if cached is not None:
+            return cached
+        response = stub_llm(llm_request)
+        agent.store_model_response(callback_context, response)
+        return response
+
+    def request(extracted_at):
+        return LlmRequest(
+            model="gemini-2.0-flash-001",
+            contents=[types.Content(role="user", parts=[types.Part(text=f"Analyze data extracted at {extracted_at}")])],
+            config=types.GenerateContentConfig(system_instruction="You are a business analyst"),
+        )
+
+    first = call_model(request("2026-10-19T10:00:00"))
+    second = call_model(request("2026-10-20T12:30:00"))
+    assert len(model_calls) == 1
+    assert second.content.parts[0].text == first.content.parts[0].text
+
+    call_model(request("2026-10-21T08:00:00"), state={"temp:skip_model_cache": True})
+    assert len(model_calls) == 2
+    stats = agent.model_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 1, 1)
+
+
+def test_agent_drops_pending_calls_of_failed_model_calls(tmp_path, monkeypatch):
+    agent = pytest.importorskip("ideai.agent")
+    from google.adk.models import LlmRequest
+    from google.genai import types
+
+    monkeypatch.setattr(agent, "model_cache", ModelCache(str(tmp_path / "cache.sqlite")))
+    monkeypatch.setattr(agent, "pending_model_calls", {})
+    request = LlmRequest(model="gemini-2.0-flash-001",
+                         contents=[types.Content(role="user", parts=[types.Part(text="Research plumbing")])])
+    # The model call raised, so store_model_response never ran for this invocation
+    agent.serve_cached_model_response(pytypes.SimpleNamespace(state={}, invocation_id="failed"), request)
+    agent.pending_model_calls["failed"]["started"] -= agent.PENDING_MODEL_CALL_MAX_AGE + 1
+    agent.serve_cached_model_response(pytypes.SimpleNamespace(state={}, invocation_id="next"), request)
+    assert list(agent.pending_model_calls) == ["next"]
+
+
+def test_agent_does_not_cache_calls_naming_payload_handles(tmp_path, monkeypatch):
+    agent = pytest.importorskip("ideai.agent")
+    from google.adk.models import LlmRequest, LlmResponse
+    from google.genai import types
+
+    monkeypatch.setattr(agent, "model_cache", ModelCache(str(tmp_path / "cache.sqlite")))
+
+    def request(handle):
+        return LlmRequest(model="gemini-2.0-flash-001", contents=[
+            types.Content(role="user", parts=[types.Part(text=f"The page was offloaded as {handle}")])
+        ])
+
+    for handle in ("payload-0123456789ab", "payload-ba9876543210"):
+        callback_context = pytypes.SimpleNamespace(state={}, invocation_id=handle)
+        assert agent.serve_cached_model_response(callback_context, request(handle)) is None
+        call = types.Part(function_call=types.FunctionCall(name="fetch_payload", args={"handle": handle}))
+        agent.store_model_response(callback_context, LlmResponse(content=types.Content(role="model", parts=[call])))
+    assert agent.model_cache.stats()["stores"] == 0
@@ -0,0 +1,104 @@
+import pytest
+
+from fixtures import fixture_site_html, start_fixture_server
+from ideai.documents import extract_text_document
+from ideai.fetch import fetch_url
+from ideai.postprocess import parse_page_html
+from ideai.refresh import html_fingerprint, refresh_records
+
+# What the browser extracted after scripts ran; it never matches the static parse
+RENDERED_CONTENT = {
+    "headings": [{"level": 1, "text": "Provider 3"}, {"level": 2, "text": "Live pricing widget"}],
+    "paragraphs": [{"index": 1, "text": "Prices rendered by JavaScript"}],
+}
+
+
+@pytest.fixture
+def fixture_site():
+    server = start_fixture_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+class Extractor:
+    """Stands in for the browser extraction and counts visits."""
+
+    def __init__(self):
+        self.urls = []
+
+    def __call__(self, url):
+        self.urls.append(url)
+        return {"url": url, "title": "Provider 3", "status": "success", "content": dict(RENDERED_CONTENT)}
+
+
+def test_unchanged_browser_page_is_carried_forward(fixture_site):
+    url = f"{fixture_site}/site/3"
+    previous = {"url": url, "status": "success", "content": RENDERED_CONTENT,
+                "static_hash": html_fingerprint(fixture_site_html(3), url)}
+    extract = Extractor()
+    refreshed = refresh_records([previous], extract)
+    assert extract.urls == []
+    assert refreshed["diff"]["unchanged"] == 1
+    assert refreshed["records"][0]["refresh"]["change"] == "unchanged"
+    assert refreshed["records"][0]["http_validators"]["etag"]
+
+
+def test_record_without_static_hash_gains_one_on_refresh(fixture_site):
+    url = f"{fixture_site}/site/3"
+    extract = Extractor()
+    first = refresh_records([{"url": url, "status": "success", "content": RENDERED_CONTENT}], extract)
+    assert extract.urls == [url]
+    record = first["records"][0]
+    assert record["static_hash"] == html_fingerprint(fixture_site_html(3), url)
+
+    # Without validators the second refresh has to compare fingerprints
+    record.pop("http_validators")
+    second = refresh_records([record], extract)
+    assert extract.urls == [url]
+    assert second["stats"]["browser_visits"] == 0
+
+
+def test_static_record_matches_its_content_fingerprint(fixture_site):
+    url = f"{fixture_site}/site/5"
+    previous = {"url": url, "status": "success", "source": "static",
+                "content": parse_page_html(fixture_site_html(5), url)}
+    extract = Extractor()
+    refresh_records([previous], extract)
+    assert extract.urls == []
+
+
+def test_not_modified_response_carries_the_record_forward(fixture_site):
+    url = f"{fixture_site}/site/4"
+    etag = fetch_url(url)["headers"]["etag"]
+    # Neither hash would match, so only the 304 can keep the record
+    previous = {"url": url, "status": "success", "content": RENDERED_CONTENT, "static_hash": "stale",
+                "http_validators": {"etag": etag}}
+    extract = Extractor()
+    refreshed = refresh_records([previous], extract)
+    assert extract.urls == []
+    assert refreshed["records"][0]["http_validators"] == {"etag": etag}
+
+
+def test_changed_page_is_reextracted(fixture_site):
+    url = f"{fixture_site}/site/6"
+    previous = {"url": url, "status": "success", "content": {"paragraphs": [{"text": "Old copy"}]},
+                "static_hash": "stale"}
+    extract = Extractor()
+    refreshed = refresh_records([previous], extract)
+    assert extract.urls == [url]
+    assert refreshed["diff"]["changed"][0]["url"] == url
+    assert refreshed["records"][0]["static_hash"] == html_fingerprint(fixture_site_html(6), url)
+
+
+@pytest.mark.parametrize("with_etag", [False, True])
+def test_unchanged_text_document_is_carried_forward(fixture_site, with_etag):
+    url = f"{fixture_site}/files/report.txt"
+    content = extract_text_document(url)
+    previous = {"url": url, "status": "success", "source": "text", "content": content,
+                "static_hash": content["document"]["sha256"]}
+    if with_etag:
+        previous["http_validators"] = {"etag": fetch_url(url)["headers"]["etag"]}
+    extract = Extractor()
+    refreshed = refresh_records([previous], extract)
+    assert extract.urls == []
+    assert refreshed["records"][0]["content"] == content
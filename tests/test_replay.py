@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from fixtures import start_fixture_server
+
+def comparable(record):
+    """What a replay has to reproduce; rendered text may differ in whitespace from a DOM snapshot."""
+    content = record.get("content") or {}
+    return {
+        "status": record.get("status"),
+        "title": record.get("title"),
+        "source": record.get("source"),
+        "headings": [heading["text"] for heading in content.get("headings", [])],
+        "document": content.get("main_content") if record.get("source") else None,
+    }
+
+
+def test_recorded_results_come_back_unchanged(tmp_path):
+    replay = pytest.importorskip("ideai.replay")
+    recorder = replay.Recorder(str(tmp_path))
+    result = {"url": "http://example.com/report.pdf", "title": "Report", "status": "success",
+              "source": "pdf", "content": {"main_content": "Revenue grew 12%"}}
+    recorder.record_result("http://example.com/report.pdf", result)
+    recording = replay.Recording(str(tmp_path))
+    assert recording.find_result("http://EXAMPLE.com/report.pdf#page=2") == result
+    # Results are not pages the replay driver could navigate to
+    assert recording.find("http://example.com/report.pdf") is None
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    agent = pytest.importorskip("ideai.agent")
+    pytest.importorskip("lxml.html")
+    monkeypatch.chdir(tmp_path)
+    yield agent
+    agent.use_browser_backend("chrome")
+
+
+def test_recorded_run_replays_offline(agent, tmp_path):
+    server = start_fixture_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base_url}/site/1", f"{base_url}/files/report.txt", f"{base_url}/site/2/pricing/1"]
+    try:
+        agent.use_browser_backend(f"record:{tmp_path / 'recording'}")
+        if "Failed" in agent.initialize_driver():
+            pytest.skip("Chrome is not available to record with")
+        live = [agent.extract_website_data(url) for url in urls]
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert [record["status"] for record in live] == ["success"] * len(urls)
+
+    # The fixture server is gone, so anything not served from the recording fails
+    agent.use_browser_backend(f"replay:{tmp_path / 'recording'}")
+    start = time.monotonic()
+    replayed = [agent.extract_website_data(url) for url in urls]
+    elapsed = time.monotonic() - start
+
+    assert [comparable(record) for record in replayed] == [comparable(record) for record in live]
+    assert replayed[1]["source"] == "text"
+    # Replays skip every wait between actions
+    assert elapsed < 5
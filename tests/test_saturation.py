@@ -0,0 +1,28 @@
+from fixtures import fixture_corpus
+from ideai.saturation import SaturationMonitor, evaluate_on_corpus
+
+
+def test_early_stopping_on_fixture_corpus():
+    corpus = fixture_corpus()
+    report = evaluate_on_corpus(corpus, window=5, min_pages=10)
+    assert report["baseline_sites"] == len(corpus)
+    assert report["sites_visited"] < len(corpus)
+    assert report["time_saved_seconds"] > 0
+    assert report["coverage_retained"] >= 0.95
+
+
+def test_threshold_zero_visits_every_page():
+    corpus = fixture_corpus()
+    report = evaluate_on_corpus(corpus, threshold=0)
+    assert report["sites_visited"] == len(corpus)
+    assert report["coverage_retained"] == 1.0
+
+
+def test_failed_pages_do_not_saturate():
+    monitor = SaturationMonitor(window=3, min_pages=3)
+    for i in range(10):
+        assert monitor.observe({"url": f"http://down.example/{i}", "status": "failed"}) == 0.0
+    assert not monitor.saturated()
+    summary = monitor.summary()
+    assert summary["pages_observed"] == 0
+    assert summary["pages_failed"] == 10
@@ -0,0 +1,126 @@
+import json
+import urllib.parse
+
+import pytest
+
+from fixtures import FIXTURE_SERP_RESULTS, fixture_serp_html, start_fixture_server
+from ideai.deadlines import Deadline, deadline_scope
+from ideai.fetch import decode_body, fetch_url
+from ideai.serp import paginate_results, parse_serp_html, parse_serp_page, serp_page_url
+
+BASE_URL = "http://127.0.0.1:8000"
+SEARCH_URL = f"{BASE_URL}/search?q=fixture+niche"
+
+
+def load_fixture_page(url):
+    """Serves fixture results pages without a server, like the browser's load_page."""
+    params = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+    start = int(params.get("start", ["0"])[0])
+    return parse_serp_page(fixture_serp_html("fixture niche", BASE_URL, start=start), url)
+
+
+def test_parses_organic_results():
+    results = parse_serp_html(fixture_serp_html("fixture niche", BASE_URL), SEARCH_URL)
+    assert len(results) == 10
+    assert results[0] == {"title": "fixture niche market report 0", "url": f"{BASE_URL}/site/0"}
+    assert all(result["url"].startswith(f"{BASE_URL}/site/") for result in results)
+
+
+def test_detects_next_link():
+    assert parse_serp_page(fixture_serp_html("q", BASE_URL, start=0), SEARCH_URL)["has_next"]
+    assert not parse_serp_page(fixture_serp_html("q", BASE_URL, start=30), SEARCH_URL)["has_next"]
+
+
+def test_deduplicates_page_boundaries_and_stops_at_last_page():
+    collected = paginate_results(SEARCH_URL, load_fixture_page, max_results=100, prefetch=False)
+    urls = [result["url"] for result in collected["results"]]
+    assert len(urls) == FIXTURE_SERP_RESULTS
+    assert len(set(urls)) == len(urls)
+    assert [result["position"] for result in collected["results"]] == list(range(1, len(urls) + 1))
+    stats = collected["stats"]
+    # Pages 2-4 each repeat the previous page's last result
+    assert stats["duplicates"] == 3
+    assert stats["pages"] == 4
+    assert stats["stopped"] == "last_page"
+
+
+def test_stops_at_visit_budget():
+    collected = paginate_results(SEARCH_URL, load_fixture_page, max_results=15, prefetch=False)
+    assert len(collected["results"]) == 15
+    assert collected["stats"]["pages"] == 2
+    assert collected["stats"]["stopped"] == "max_results"
+
+
+def test_expired_deadline_stops_pagination():
+    with deadline_scope(Deadline(0)):
+        collected = paginate_results(SEARCH_URL, load_fixture_page, prefetch=False)
+    assert collected["results"] == []
+    assert collected["stats"]["stopped"] == "deadline"
+
+
+def test_prefetched_pages_skip_the_browser():
+    server = start_fixture_server()
+    search_url = f"http://127.0.0.1:{server.server_address[1]}/search?q=fixture+niche"
+    try:
+        collected = paginate_results(
+            search_url, lambda url: parse_serp_page(decode_body(fetch_url(url)), url), max_results=100
+        )
+    finally:
+        server.shutdown()
+    assert len(collected["results"]) == FIXTURE_SERP_RESULTS
+    assert collected["stats"]["browser_pages"] == 1
+    assert collected["stats"]["prefetched_pages"] == 3
+
+
+def record_fixture_serp(directory, search_url):
+    """Writes the fixture results pages as a recording the replay driver can serve."""
+    (directory / "pages").mkdir()
+    pages = []
+    for number, offset in enumerate(range(0, FIXTURE_SERP_RESULTS, 10)):
+        url = serp_page_url(search_url, offset)
+        html_file = f"pages/{number:05d}.html"
+        (directory / html_file).write_text(fixture_serp_html("fixture niche", BASE_URL, start=offset), encoding="utf-8")
+        pages.append({"url": url, "final_url": url, "title": "fixture niche - Search",
+                      "html_file": html_file, "screenshot_file": None})
+    (directory / "index.json").write_text(json.dumps(pages))
+
+
+@pytest.fixture(params=["replay", "chrome"])
+def search_agent(request, tmp_path, monkeypatch):
+    """The agent pointed at the fixture SERP, served by a recording or by a live fixture server."""
+    agent = pytest.importorskip("ideai.agent")
+    server = None
+    if request.param == "replay":
+        pytest.importorskip("lxml.html")
+        record_fixture_serp(tmp_path, SEARCH_URL)
+        agent.use_browser_backend(f"replay:{tmp_path}")
+        base_url = BASE_URL
+    else:
+        server = start_fixture_server()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        result = agent.initialize_driver()
+        if "Failed" in result:
+            server.shutdown()
+            pytest.skip(result)
+    monkeypatch.setattr(agent, "SEARCH_URL", f"{base_url}/search?q={{query}}")
+    yield agent, base_url
+    agent.close_browser_session()
+    if server is not None:
+        server.shutdown()
+    else:
+        agent.use_browser_backend("chrome")
+
+
+def test_browser_selectors_extract_fixture_results(search_agent):
+    agent, base_url = search_agent
+    assert agent.go_to_url(f"{base_url}/search?q=fixture+niche").startswith("Successfully")
+    results = json.loads(agent.extract_google_search_results())
+    assert [result["url"] for result in results] == [f"{base_url}/site/{i}" for i in range(10)]
+    assert results[0]["title"] == "fixture niche market report 0"
+
+
+def test_collects_every_results_page_in_the_browser(search_agent):
+    agent, base_url = search_agent
+    collected = agent.collect_search_results("fixture niche", max_results=100)
+    assert len(collected["results"]) == FIXTURE_SERP_RESULTS
+    assert collected["stats"]["stopped"] == "last_page"
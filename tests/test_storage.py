@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from fixtures import fixture_corpus
+from ideai.storage import dataset_filename, load_dataset, rows_path, write_dataset
+
+FORMATS = ["json", "jsonl", "jsonl.gz"]
+
+
+@pytest.fixture
+def records():
+    return fixture_corpus(count=6, distinct=3)
+
+
+@pytest.mark.parametrize("dataset_format", FORMATS)
+def test_round_trips_records(tmp_path, records, dataset_format):
+    path = write_dataset(records, str(tmp_path / dataset_filename("data", dataset_format)))
+    assert load_dataset(path) == json.loads(json.dumps(records))
+
+
+def test_reads_legacy_pretty_printed_json(tmp_path, records):
+    path = tmp_path / "business_niche_data_20250519-201502.json"
+    path.write_text(json.dumps(records, indent=2))
+    assert [record["url"] for record in load_dataset(str(path))] == [record["url"] for record in records]
+    assert load_dataset(str(path), ["url", "title"])[0] == {"url": records[0]["url"], "title": records[0]["title"]}
+
+
+@pytest.mark.parametrize("dataset_format", ["jsonl", "jsonl.gz"])
+def test_projection_reads_only_the_rows_file(tmp_path, records, dataset_format):
+    path = write_dataset(records, str(tmp_path / dataset_filename("data", dataset_format)))
+    expected = load_dataset(path, ["url", "title", "figures"])
+    assert expected[0]["figures"]
+    # Corrupting the full records shows the projection never touches them
+    with open(path, "wb") as f:
+        f.write(b"not json\n")
+    assert load_dataset(path, ["url", "title", "figures"]) == expected
+
+
+def test_projection_without_rows_file_decodes_records(tmp_path, records):
+    path = write_dataset(records, str(tmp_path / "data.jsonl"))
+    expected = load_dataset(path, ["url", "figures"])
+    (tmp_path / "data.rows.jsonl").unlink()
+    assert load_dataset(path, ["url", "figures"]) == expected
+    # Columns missing from the rows file still come from the full records
+    assert load_dataset(path, ["url", "content"])[0]["content"] == records[0]["content"]
+
+
+def test_rows_file_sits_next_to_the_dataset():
+    assert rows_path("out/data.jsonl.gz", "jsonl.gz") == "out/data.rows.jsonl.gz"